@@ -1,11 +1,18 @@
 import streamlit as st
-import pandas as pd
+
+from metrics import start_http_exporter
+from warmup import start_warmup
 
 st.set_page_config(
     page_title="Syarah.com Machine Learning",
     page_icon="🚗"
 )
 
+# Preload model & dataset di background begitu proses app dipakai pertama kali
+# (readiness: GET /ready di METRICS_PORT atau READY_FILE, lihat warmup.py)
+start_http_exporter()
+start_warmup()
+
 
 # Override CSS bawaan supaya konten nempel ke kiri
 st.markdown("""
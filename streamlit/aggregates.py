@@ -0,0 +1,72 @@
+"""Price parsing and per-category aggregates for the Data info page.
+
+``category_aggregates`` computes count / sum / mean / median of ``Price`` for
+every categorical column in one go, using ``factorize`` + ``np.bincount``
+(count, sum) and one ``lexsort`` (median) per column. Switching the category
+selectbox then only reads a precomputed table.
+"""
+import numpy as np
+import pandas as pd
+
+_NON_NUMERIC = r"[^0-9,.-]"
+_THOUSANDS_DOT = r"\.(?=\d{3}(\D|$))"
+
+
+def parse_price(s: pd.Series) -> pd.Series:
+    """Price → float.
+
+    Numeric columns are returned as-is. Text is normalised on the *unique*
+    values only (listing prices repeat a lot) and mapped back via codes:
+    strip everything except ``0-9 , . -``, drop thousands dots, comma → dot.
+    Example: ``"SAR 1.234.567,89"`` → ``1234567.89``.
+    """
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.astype("float64")
+
+    codes, uniques = pd.factorize(s, sort=False)
+    u = pd.Series(uniques, dtype="object").astype(str)
+    u = u.str.replace(_NON_NUMERIC, "", regex=True)
+    u = u.str.replace(_THOUSANDS_DOT, "", regex=True)
+    u = u.str.replace(",", ".", regex=False)
+    parsed = pd.to_numeric(u, errors="coerce").to_numpy(dtype="float64")
+
+    out = np.full(len(s), np.nan)
+    valid = codes >= 0
+    out[valid] = parsed[codes[valid]]
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def _group_stats(keys: pd.Series, values: np.ndarray) -> pd.DataFrame:
+    codes, uniques = pd.factorize(keys, sort=False)
+    mask = (codes >= 0) & ~np.isnan(values)
+    c, v = codes[mask], values[mask]
+    k = len(uniques)
+
+    count = np.bincount(c, minlength=k)
+    total = np.bincount(c, weights=v, minlength=k)
+
+    # median: urutkan sekali per (kategori, nilai), ambil elemen tengah tiap blok
+    sorted_v = v[np.lexsort((v, c))]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    present = count > 0
+    lo = starts[present] + (count[present] - 1) // 2
+    hi = starts[present] + count[present] // 2
+
+    name = keys.name
+    return pd.DataFrame({
+        name: np.asarray(uniques)[present],
+        "Count": count[present],
+        "Sum": total[present],
+        "Mean": total[present] / count[present],
+        "Median": (sorted_v[lo] + sorted_v[hi]) / 2.0,
+    })
+
+
+def category_aggregates(df: pd.DataFrame, cat_cols, value_col: str = "Price") -> dict:
+    """``{column: DataFrame[column, Count, Sum, Mean, Median]}`` sorted by Mean desc."""
+    values = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype="float64")
+    out = {}
+    for c in cat_cols:
+        if c in df.columns:
+            out[c] = _group_stats(df[c], values).sort_values("Mean", ascending=False, ignore_index=True)
+    return out
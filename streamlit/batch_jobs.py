@@ -0,0 +1,208 @@
+"""Background batch scoring jobs with results persisted on disk.
+
+An upload is written to ``JOBS_DIR/<job_id>/input.csv`` and scored by a small
+worker pool through ``stream_predict_csv``. Status and progress live in
+``job.json`` next to it, the output in ``result.csv``, so a job survives a tab
+reload (and a process restart: unfinished jobs are re-queued on start).
+
+The job ID is derived from the model SHA-256 + upload bytes, so uploading the
+same file again returns the existing job (and its stored result) instead of
+scoring it twice. A new model gives new IDs.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+
+from batch_stream import DEFAULT_CHUNKSIZE, stream_predict_csv
+from drift import observe as observe_drift
+from metrics import span, inc
+
+JOBS_DIR = Path(os.environ.get("JOBS_DIR", Path.home() / ".cache" / "carprice" / "jobs"))
+# CatBoost sudah multi-thread per predict → 1 worker default cukup
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_TTL_S = float(os.environ.get("JOB_TTL_S", 7 * 24 * 3600))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    filename: str
+    model_sha: str
+    size_bytes: int
+    status: str = QUEUED
+    progress: float = 0.0
+    rows: int = 0
+    invalid_rows: int = 0
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+# bentuk job_id_for(); apa pun selain ini (mis. "../x" dari ?job=) ditolak sebelum jadi path
+_JOB_ID_RE = re.compile(r"[0-9a-f]{20}")
+
+
+def is_valid_job_id(job_id) -> bool:
+    return isinstance(job_id, str) and _JOB_ID_RE.fullmatch(job_id) is not None
+
+
+def job_id_for(data: bytes, model_sha: str) -> str:
+    h = hashlib.sha256(model_sha.encode("utf-8"))
+    h.update(b"\0")
+    h.update(data)
+    return h.hexdigest()[:20]
+
+
+# ---------- READ-ONLY (tanpa worker / model) ----------
+def result_path(job_id: str, jobs_dir=JOBS_DIR) -> Path:
+    """``ValueError`` for anything that is not a job ID (user input reaches here via ``?job=``)."""
+    if not is_valid_job_id(job_id):
+        raise ValueError(f"Invalid job ID: {job_id!r}")
+    return Path(jobs_dir) / job_id / "result.csv"
+
+
+def load_job(job_id: str, jobs_dir=JOBS_DIR) -> Job | None:
+    """The job's metadata, ``None`` if unknown or ``job_id`` is malformed."""
+    if not is_valid_job_id(job_id):
+        return None
+    meta = Path(jobs_dir) / job_id / "job.json"
+    try:
+        return Job(**json.loads(meta.read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def recent_jobs(limit: int = 20, jobs_dir=JOBS_DIR) -> list[Job]:
+    d = Path(jobs_dir)
+    if not d.is_dir():
+        return []
+    jobs = [j for j in (load_job(p.name, d) for p in d.iterdir() if p.is_dir()) if j]
+    return sorted(jobs, key=lambda j: j.created, reverse=True)[:limit]
+
+
+class JobQueue:
+    """``submit(bytes) → (Job, deduplicated)``; status is read back with ``load_job``.
+
+    ``predict_fn(X)`` is the same callable the page uses for in-session scoring.
+    """
+
+    def __init__(self, predict_fn, model_sha: str, jobs_dir=JOBS_DIR, workers: int = JOB_WORKERS,
+                 chunksize: int = DEFAULT_CHUNKSIZE, intervals=None):
+        self.predict_fn = predict_fn
+        self.intervals = intervals
+        self.model_sha = model_sha
+        self.dir = Path(jobs_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.chunksize = chunksize
+        self._lock = threading.Lock()
+        self._inflight: set[str] = set()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch-job")
+        self._cleanup()
+        self._resume()
+
+    # ---------- PATHS ----------
+    def _job_dir(self, job_id: str) -> Path:
+        if not is_valid_job_id(job_id):
+            raise ValueError(f"Invalid job ID: {job_id!r}")
+        return self.dir / job_id
+
+    def input_path(self, job_id: str) -> Path:
+        return self._job_dir(job_id) / "input.csv"
+
+    # ---------- STATE ----------
+    def _write(self, job: Job):
+        job.updated = time.time()
+        meta = self._job_dir(job.job_id) / "job.json"
+        tmp = meta.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(asdict(job)), encoding="utf-8")
+        os.replace(tmp, meta)
+
+    def get(self, job_id: str) -> Job | None:
+        return load_job(job_id, self.dir)
+
+    # ---------- SUBMIT ----------
+    def submit(self, data: bytes, filename: str = "upload.csv") -> tuple[Job, bool]:
+        """Enqueue ``data`` (CSV bytes). Returns ``(job, deduplicated)``."""
+        job_id = job_id_for(data, self.model_sha)
+        with self._lock:
+            existing = self.get(job_id)
+            if existing is not None and existing.status != FAILED:
+                inc("batch_jobs_total", outcome="dedup")
+                return existing, True
+
+            d = self._job_dir(job_id)
+            d.mkdir(parents=True, exist_ok=True)
+            self.input_path(job_id).write_bytes(data)
+            job = Job(job_id=job_id, filename=filename, model_sha=self.model_sha, size_bytes=len(data))
+            self._write(job)
+            self._enqueue(job)
+        inc("batch_jobs_total", outcome="queued")
+        return job, False
+
+    def _enqueue(self, job: Job):
+        if job.job_id in self._inflight:
+            return
+        self._inflight.add(job.job_id)
+        self._pool.submit(self._run, job)
+
+    # ---------- WORKER ----------
+    def _run(self, job: Job):
+        job.status, job.progress, job.rows, job.error = RUNNING, 0.0, 0, ""
+        self._write(job)
+        tmp_out = result_path(job.job_id, self.dir).with_suffix(".csv.part")
+        last = [0.0]
+
+        def _on_progress(frac, rows_done):
+            job.progress, job.rows = frac or job.progress, rows_done
+            now = time.monotonic()
+            if now - last[0] >= 0.5:  # jangan tulis job.json tiap chunk kecil
+                last[0] = now
+                self._write(job)
+
+        try:
+            with open(self.input_path(job.job_id), "rb") as src, span("batch_job", source="jobs"):
+                result = stream_predict_csv(src, self.predict_fn, out_path=tmp_out,
+                                            chunksize=self.chunksize, total_bytes=job.size_bytes,
+                                            on_progress=_on_progress, intervals=self.intervals,
+                                            on_chunk=lambda X: observe_drift(X, "job"))
+            os.replace(tmp_out, result_path(job.job_id, self.dir))
+            self.input_path(job.job_id).unlink(missing_ok=True)  # dedup cukup lewat job.json
+            job.status, job.progress, job.rows, job.invalid_rows = DONE, 1.0, result.rows, result.invalid_rows
+            inc("rows_scored_total", result.rows - result.invalid_rows, source="jobs")
+            inc("batch_jobs_total", outcome="done")
+        except Exception as e:
+            tmp_out.unlink(missing_ok=True)
+            job.status, job.error = FAILED, str(e)[:500]
+            inc("batch_jobs_total", outcome="failed")
+        finally:
+            self._write(job)
+            with self._lock:
+                self._inflight.discard(job.job_id)
+
+    # ---------- HOUSEKEEPING ----------
+    def _resume(self):
+        # job yang terputus (proses restart) dijalankan ulang dari awal
+        for job in recent_jobs(limit=10_000, jobs_dir=self.dir):
+            if not job.finished and job.model_sha == self.model_sha and self.input_path(job.job_id).exists():
+                with self._lock:
+                    self._enqueue(job)
+
+    def _cleanup(self):
+        cutoff = time.time() - JOB_TTL_S
+        for p in self.dir.iterdir():
+            job = self.get(p.name) if p.is_dir() else None
+            if job is not None and job.finished and job.updated < cutoff:
+                shutil.rmtree(p, ignore_errors=True)
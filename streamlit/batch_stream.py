@@ -0,0 +1,90 @@
+"""Chunked CSV → predictions → CSV with bounded memory.
+
+Only one chunk (``chunksize`` rows) of the upload is materialised at a time;
+results are appended to a temp file on disk instead of being built in memory.
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from metrics import span
+from predictor import add_prediction_columns, predict_valid
+from schema import FEATURE_ORDER, CAT_COLS, validate_and_coerce
+
+DEFAULT_CHUNKSIZE = 50_000
+# dtype eksplisit: kategori langsung dibaca sebagai string (tanpa inferensi per chunk)
+READ_DTYPES = {c: "string" for c in CAT_COLS}
+
+
+@dataclass
+class StreamResult:
+    path: Path
+    rows: int
+    chunks: int
+    invalid_rows: int = 0
+
+
+def read_header(src) -> list[str]:
+    """Column names of a CSV without reading the body (rewinds ``src``)."""
+    cols = [c.strip() for c in pd.read_csv(src, nrows=0).columns]
+    if hasattr(src, "seek"):
+        src.seek(0)
+    return cols
+
+
+def stream_predict_csv(src, predict_fn, out_path=None, chunksize: int = DEFAULT_CHUNKSIZE,
+                       total_bytes: int | None = None, on_progress=None, intervals=None,
+                       on_chunk=None) -> StreamResult:
+    """Score ``src`` chunk by chunk and append ``Prediction`` rows to ``out_path``.
+
+    ``predict_fn(X)`` receives the model-ready frame of one chunk (valid rows
+    only); rows failing ``schema.validate_and_coerce`` are written with an
+    empty ``Prediction`` and the reason in ``Error``.
+    With an ``IntervalTable`` (see intervals.py) ``Prediction_Low`` /
+    ``Prediction_High`` are added per chunk as well.
+    ``on_progress(fraction, rows_done)`` is called after every chunk; the
+    fraction is based on bytes consumed when ``total_bytes`` is known.
+    ``on_chunk(frame)`` receives every chunk's model-ready frame (e.g.
+    ``drift.observe``); it must not block.
+    """
+    missing = [c for c in FEATURE_ORDER if c not in read_header(src)]
+    if missing:
+        raise RuntimeError(f"Dataset missing required columns: {', '.join(missing)}")
+
+    if out_path is None:
+        fd, name = tempfile.mkstemp(prefix="predictions_", suffix=".csv")
+        os.close(fd)
+        out_path = Path(name)
+    out_path = Path(out_path)
+
+    rows = chunks = invalid = 0
+    reader = pd.read_csv(src, chunksize=chunksize, dtype=READ_DTYPES)
+    with open(out_path, "w", encoding="utf-8", newline="") as fh:
+        for chunk in reader:
+            chunk.columns = [c.strip() for c in chunk.columns]
+            with span("schema", source="stream"):
+                v = validate_and_coerce(chunk)
+            if on_chunk is not None:
+                on_chunk(v.frame)
+            preds = predict_valid(predict_fn, v)
+            add_prediction_columns(chunk, preds, v.messages(), intervals)
+            invalid += v.n_invalid
+            del v
+            with span("csv_encode", source="stream"):
+                chunk.to_csv(fh, header=(chunks == 0), index=False)
+
+            rows += len(chunk)
+            chunks += 1
+            if on_progress is not None:
+                if total_bytes and hasattr(src, "tell"):
+                    frac = min(src.tell() / total_bytes, 1.0)
+                else:
+                    frac = None
+                on_progress(frac, rows)
+
+    if on_progress is not None:
+        on_progress(1.0, rows)
+    return StreamResult(path=out_path, rows=rows, chunks=chunks, invalid_rows=invalid)
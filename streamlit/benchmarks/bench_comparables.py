@@ -0,0 +1,93 @@
+"""Comparable-listings lookup: index build/load time, single-query latency, batch throughput.
+
+Checks every indexed answer against a naive scan of the same Make/Type
+(exit code 1 on a mismatch).
+
+    python benchmarks/bench_comparables.py --queries 500 --batch 10000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from comparables import NUMERIC, SCALE, ComparablesIndex, build_comparables_index  # noqa: E402
+from dataset_store import load_dataset  # noqa: E402
+
+
+def _naive(df, row, k):
+    # scan penuh DataFrame seperti tanpa index
+    same = df[(df["Make"].astype(str) == row["Make"]) & (df["Type"].astype(str) == row["Type"])]
+    d = np.sqrt(sum(((same[c].to_numpy(dtype="float64") - row[c]) / SCALE[c]) ** 2 for c in NUMERIC))
+    return np.sort(d)[:k]
+
+
+def run(n_queries: int, batch: int, k: int = 5, seed: int = 0) -> dict:
+    df = load_dataset()
+    t0 = time.perf_counter()
+    index = build_comparables_index(df)
+    build_s = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "comparables.npz"
+        index.save(path)
+        t0 = time.perf_counter()
+        index = ComparablesIndex.load(path)
+        load_s = time.perf_counter() - t0
+
+    priced = df[df["Price"] > 0].dropna(subset=["Make", "Type"] + NUMERIC)
+    sample = priced.sample(n=min(n_queries, len(priced)), random_state=seed).reset_index(drop=True)
+    for c in ("Make", "Type"):
+        sample[c] = sample[c].astype(str)
+    records = sample.to_dict("records")
+
+    times, naive_times, mismatches = [], [], 0
+    for row in records:
+        t0 = time.perf_counter()
+        _, dist = index.query_ids(row["Make"], row["Type"], row["Year"], row["Mileage"], row["Engine_Size"], k)
+        times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        ref = _naive(priced, row, k)
+        naive_times.append(time.perf_counter() - t0)
+        mismatches += not np.allclose(dist, ref)
+
+    big = priced.sample(n=batch, replace=True, random_state=seed + 1)
+    t0 = time.perf_counter()
+    ids, _ = index.query_batch(big, k)
+    batch_s = time.perf_counter() - t0
+
+    us = np.asarray(times) * 1e6
+    return {
+        "rows_indexed": len(index),
+        "slices": len(index.keys),
+        "build_ms": round(build_s * 1000, 1),
+        "load_ms": round(load_s * 1000, 2),
+        "single": {"p50_us": round(float(np.percentile(us, 50)), 1),
+                   "p99_us": round(float(np.percentile(us, 99)), 1),
+                   "naive_p50_us": round(float(np.percentile(np.asarray(naive_times) * 1e6, 50)), 1)},
+        "batch": {"rows": batch, "seconds": round(batch_s, 4), "rows_per_s": round(batch / batch_s, 1),
+                  "answered": int((ids[:, 0] >= 0).sum())},
+        "mismatches": mismatches,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--batch", type=int, default=10_000)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    result = run(args.queries, args.batch, args.k, args.seed)
+    print(json.dumps(result, indent=2))
+    if result["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Load time + in-memory size of UsedCarsSA_Clean_EN.csv per loading strategy.
+
+    python benchmarks/bench_dataset.py --repeat 5
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from dataset_store import load_dataset, local_dataset_path, read_csv_compact  # noqa: E402
+
+
+def _measure(fn, repeat: int) -> dict:
+    times, df = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "best_ms": round(min(times) * 1000, 2),
+        "mean_ms": round(sum(times) / len(times) * 1000, 2),
+        "memory_mb": round(df.memory_usage(deep=True).sum() / 1e6, 3),
+        "rows": len(df),
+    }
+
+
+def run(repeat: int) -> dict:
+    csv_path = local_dataset_path()
+    if csv_path is None:
+        raise SystemExit("UsedCarsSA_Clean_EN.csv not found next to the app")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_dataset(csv_path, cache_dir=cache_dir)  # isi cache Parquet
+        results = {
+            "csv_default": _measure(lambda: pd.read_csv(csv_path), repeat),
+            "csv_compact": _measure(lambda: read_csv_compact(csv_path), repeat),
+            "parquet_cache_mmap": _measure(lambda: load_dataset(csv_path, cache_dir=cache_dir), repeat),
+        }
+    base = results["csv_default"]
+    for name, r in results.items():
+        r["speedup_vs_csv_default"] = round(base["best_ms"] / max(r["best_ms"], 1e-9), 2)
+        r["memory_ratio_vs_csv_default"] = round(r["memory_mb"] / max(base["memory_mb"], 1e-9), 3)
+    return {"csv": str(csv_path), "repeat": repeat, "results": results}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
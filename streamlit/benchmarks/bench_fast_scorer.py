@@ -0,0 +1,109 @@
+"""Parity + single-row latency: sklearn pipeline path vs CompiledScorer.
+
+Both paths score what the app sends: ``FEATURE_ORDER`` frames / dicts only
+(model-only features such as ``Negotiable`` come from ``MODEL_DEFAULTS``).
+Exits with status 1 on a parity failure or if the compiled path missed
+(``fast_path_miss_total`` > 0) on any call.
+
+    python benchmarks/bench_fast_scorer.py --rows 500
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from fast_scorer import CompiledScorer  # noqa: E402
+from metrics import REGISTRY, inc  # noqa: E402
+from model_store import MODEL_URL, EXPECTED_SHA256, load_model_artifact  # noqa: E402
+from predictor import ensure_dataframe_schema, predict_safely  # noqa: E402
+from schema import FEATURE_ORDER  # noqa: E402
+
+CSV_PATH = APP_DIR / "UsedCarsSA_Clean_EN.csv"
+
+
+def _percentiles(samples_s) -> dict:
+    us = np.asarray(samples_s) * 1e6
+    return {"mean_us": round(float(us.mean()), 1),
+            "p50_us": round(float(np.percentile(us, 50)), 1),
+            "p99_us": round(float(np.percentile(us, 99)), 1)}
+
+
+def _fast(call, fallback):
+    # sama dengan halaman: miss → dihitung, lalu pipeline
+    try:
+        return call()
+    except (KeyError, TypeError, ValueError):
+        inc("fast_path_miss_total", source="bench")
+        return fallback()
+
+
+def _misses() -> int:
+    return int(sum(r["value"] for r in REGISTRY.counter_rows() if r["metric"] == "fast_path_miss_total"))
+
+
+def run(n_rows: int, seed: int = 0) -> dict:
+    model, sha = load_model_artifact(MODEL_URL, EXPECTED_SHA256)
+    scorer = CompiledScorer.from_pipeline(model)
+
+    df = pd.read_csv(CSV_PATH, usecols=FEATURE_ORDER).dropna()
+    df = df.sample(n=min(n_rows, len(df)), random_state=seed).reset_index(drop=True)
+    X = ensure_dataframe_schema(df)
+    records = X.astype(object).to_dict("records")
+
+    # --- parity (batch) ---
+    ref = predict_safely(model, X)
+    fast = _fast(lambda: scorer.predict_frame(X), lambda: ref)
+    fast_rows = _fast(lambda: scorer.predict_records(records), lambda: ref)
+    rel = np.abs(fast - ref) / np.maximum(np.abs(ref), 1.0)
+
+    # --- single-row latency ---
+    slow_t, fast_t = [], []
+    for rec in records:
+        t0 = time.perf_counter()
+        one = predict_safely(model, ensure_dataframe_schema(pd.DataFrame([rec])))
+        slow_t.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        _fast(lambda: scorer.predict_one(rec), lambda: one[0])
+        fast_t.append(time.perf_counter() - t0)
+
+    slow, quick = _percentiles(slow_t), _percentiles(fast_t)
+    return {
+        "model_sha256": sha,
+        "rows": len(df),
+        "fixed_features": scorer.fixed,
+        "fast_path_misses": _misses(),
+        "parity": {
+            "max_abs_diff": float(np.max(np.abs(fast - ref))),
+            "max_rel_diff": float(rel.max()),
+            "records_vs_frame_max_abs_diff": float(np.max(np.abs(fast_rows - fast))),
+            "allclose": bool(np.allclose(fast, ref, rtol=1e-9, atol=1e-6)),
+        },
+        "single_row": {
+            "pipeline": slow,
+            "compiled": quick,
+            "speedup_p50": round(slow["p50_us"] / max(quick["p50_us"], 1e-9), 1),
+        },
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    result = run(args.rows, args.seed)
+    print(json.dumps(result, indent=2))
+    if not result["parity"]["allclose"] or result["fast_path_misses"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
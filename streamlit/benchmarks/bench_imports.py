@@ -0,0 +1,145 @@
+"""Import-time profile of the app's entry points (``python -X importtime``), with checks.
+
+Each case runs in a fresh interpreter, so nothing is in ``sys.modules`` yet:
+
+* ``homepage``     what Homepage.py imports besides streamlit (metrics, warmup)
+* ``registry``     model_registry / model_store (read on every page rerun)
+* ``pages``        resources + predictor (shared by the Calculator pages)
+* ``scorer_slim``  loading the compiled scorer from its native artifact
+* ``first_predict`` the same, then one ``predict_one`` on an 11-column
+  ``FEATURE_ORDER`` row as the Calculator sends it (first-request cost)
+* ``pipeline``     unpickling the full sklearn pipeline (what startup used to do)
+
+``homepage`` and ``registry`` must not import any of ``HEAVY``; ``scorer_slim``
+and ``first_predict`` must not import sklearn (a compiled-path miss would fall
+back to unpickling the pipeline, and any error fails the case). A violation
+exits with status 1, so the script can run as a check in CI next to the JSON
+it writes.
+
+    python benchmarks/bench_imports.py --out imports.json
+    python benchmarks/bench_imports.py --top 15
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from model_store import MODEL_URL, EXPECTED_SHA256, resolve_model_artifact  # noqa: E402
+
+HEAVY = ("pandas", "numpy", "joblib", "requests", "sklearn", "scipy", "catboost", "pyarrow", "matplotlib")
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """``-X importtime`` lines → ``[{"module", "depth", "self_us", "cumulative_us"}]``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cum, name = line.split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"module": name.strip(), "depth": depth,
+                     "self_us": int(head.split(":", 1)[1]), "cumulative_us": int(cum)})
+    return rows
+
+
+def profile(code: str) -> dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=APP_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    rows = parse_importtime(proc.stderr)
+    top = [r for r in rows if r["depth"] == 0]
+    return {"wall_ms": round(wall * 1000, 1),
+            "import_ms": round(sum(r["cumulative_us"] for r in top) / 1000, 1),
+            "modules": {r["module"] for r in rows},
+            "top": top}
+
+
+def cases(model_path: Path, slim_dir: Path, app_row: dict) -> dict:
+    # nama → (kode, package yang tidak boleh ikut ter-import)
+    first = (f"import json; from fast_scorer import CompiledScorer; "
+             f"CompiledScorer.load(r'{slim_dir}').predict_one(json.loads({json.dumps(app_row)!r}))")
+    return {
+        "homepage": ("import metrics, warmup", HEAVY),
+        "registry": ("import model_registry; model_registry.active_ref()", HEAVY),
+        "pages": ("import resources, predictor", ()),
+        "scorer_slim": (f"from fast_scorer import CompiledScorer; CompiledScorer.load(r'{slim_dir}')",
+                        ("sklearn", "joblib")),
+        "first_predict": (first, ("sklearn", "joblib")),
+        "pipeline": (f"from model_store import load_model; load_model(r'{model_path}')", ()),
+    }
+
+
+def run(top_n: int = 10) -> dict:
+    from dataset_store import load_dataset
+    from fast_scorer import COMPILED_CACHE_DIR, load_or_export_compiled
+    from model_store import load_model
+    from warmup import sample_rows
+
+    path, sha = resolve_model_artifact(MODEL_URL, EXPECTED_SHA256)
+    scorer = load_or_export_compiled(sha, lambda: load_model(path))
+    if scorer is None:
+        raise RuntimeError("Pipeline shape not supported by CompiledScorer; no slim artifact to profile.")
+
+    # satu baris nyata, hanya kolom FEATURE_ORDER (tanpa Negotiable), tipe JSON biasa
+    app_row = {k: (v.item() if hasattr(v, "item") else v)
+               for k, v in sample_rows(load_dataset(), 1).astype(object).iloc[0].items()}
+
+    baseline = profile("pass")
+    result = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "python": sys.version.split()[0], "platform": platform.platform(),
+              "model_sha256": sha, "interpreter_ms": baseline["wall_ms"], "cases": {}, "ok": True}
+    for name, (code, forbidden) in cases(path, COMPILED_CACHE_DIR / sha.lower(), app_row).items():
+        try:
+            p = profile(code)
+        except RuntimeError as e:
+            result["cases"][name] = {"error": str(e), "ok": False}
+            result["ok"] = False
+            continue
+        new = p["modules"] - baseline["modules"]
+        bad = sorted({m.split(".")[0] for m in new} & set(forbidden))
+        top = sorted((r for r in p["top"] if r["module"] in new), key=lambda r: -r["cumulative_us"])[:top_n]
+        result["cases"][name] = {
+            "wall_ms": p["wall_ms"],
+            "import_ms": round(p["import_ms"] - baseline["import_ms"], 1),
+            "modules": len(new),
+            "top": [{"module": r["module"], "ms": round(r["cumulative_us"] / 1000, 1)} for r in top],
+            "forbidden_imported": bad,
+            "ok": not bad,
+        }
+        result["ok"] &= not bad
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import-time profile of the app entry points (JSON output)")
+    ap.add_argument("--top", type=int, default=10, help="slowest top-level imports listed per case")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    result = run(args.top)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Import profile written to {args.out}")
+    else:
+        print(text)
+    for name, case in result["cases"].items():
+        status = "ok" if case["ok"] else ("FAIL " + (case.get("error") or ", ".join(case["forbidden_imported"])))
+        print(f"{name:<12} {case.get('wall_ms', '-'):>8} ms wall  {case.get('import_ms', '-'):>8} ms imports  {status}",
+              file=sys.stderr)
+    if not result["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
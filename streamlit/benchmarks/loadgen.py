@@ -0,0 +1,92 @@
+"""Local load generator for inference_server.py.
+
+Fires single-row /predict requests from N concurrent "users" (rows sampled from
+UsedCarsSA_Clean_EN.csv) and reports throughput and latency percentiles as JSON.
+
+    python inference_server.py &
+    python benchmarks/loadgen.py --url http://127.0.0.1:8765 --users 32 --requests 2000
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from inference_client import predict_records  # noqa: E402
+from schema import FEATURE_ORDER  # noqa: E402
+
+CSV_PATH = APP_DIR / "UsedCarsSA_Clean_EN.csv"
+
+
+def sample_rows(n: int, seed: int = 0) -> list[dict]:
+    df = pd.read_csv(CSV_PATH, usecols=FEATURE_ORDER).dropna()
+    rows = df.sample(n=n, replace=True, random_state=seed)
+    return json.loads(rows.to_json(orient="records"))
+
+
+def run(url: str, users: int, total: int, seed: int = 0) -> dict:
+    rows = sample_rows(total, seed)
+    latencies = np.empty(total, dtype="float64")
+    errors = [0]
+    next_idx = [0]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next_idx[0]
+                next_idx[0] += 1
+            if i >= total:
+                return
+            t0 = time.perf_counter()
+            try:
+                predict_records([rows[i]], url=url)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            latencies[i] = time.perf_counter() - t0
+
+    t_start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t_start
+
+    ms = latencies * 1000.0
+    return {
+        "url": url,
+        "users": users,
+        "requests": total,
+        "errors": errors[0],
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(total / wall, 1),
+        "latency_ms": {
+            "p50": round(float(np.percentile(ms, 50)), 3),
+            "p95": round(float(np.percentile(ms, 95)), 3),
+            "p99": round(float(np.percentile(ms, 99)), 3),
+            "max": round(float(ms.max()), 3),
+        },
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load generator for the local inference service")
+    ap.add_argument("--url", default="http://127.0.0.1:8765")
+    ap.add_argument("--users", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args.url.rstrip("/"), args.users, args.requests, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
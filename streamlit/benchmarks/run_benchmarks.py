@@ -0,0 +1,179 @@
+"""Offline serving benchmark suite → machine-readable JSON.
+
+Measures, on the local joblib artifact:
+
+* ``model_load``    ``resolve_model_artifact`` + ``joblib.load`` time (fresh
+                    resolve and load each repeat), with both parts reported
+* ``single_row``    cold (first call after load) and warm latency through
+                    ``ensure_dataframe_schema`` + ``predict_safely`` (the Calculator path)
+* ``batch``         throughput at 1k / 10k / 100k synthetic rows
+* ``peak_rss_mb``   process high-water mark after each stage
+
+Synthetic rows are drawn from UsedCarsSA_Clean_EN.csv: (Make, Type) and
+(Origin, Region) pairs jointly so combinations stay realistic, other columns
+from their marginal distributions.
+
+    python benchmarks/run_benchmarks.py --out bench_results.json
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --warm 200
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from dataset_store import load_dataset  # noqa: E402
+from model_store import MODEL_URL, EXPECTED_SHA256, resolve_model_artifact, load_model  # noqa: E402
+from predictor import ensure_dataframe_schema, predict_safely  # noqa: E402
+from schema import FEATURE_ORDER, CAT_COLS  # noqa: E402
+
+SCHEMA_VERSION = 2
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: bytes
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def synthetic_rows(n: int, seed: int = 0, source: pd.DataFrame | None = None) -> pd.DataFrame:
+    df = load_dataset() if source is None else source
+    rng = np.random.default_rng(seed)
+    out = {}
+    for pair in (["Make", "Type"], ["Origin", "Region"]):
+        idx = rng.integers(0, len(df), n)
+        for c in pair:
+            out[c] = df[c].to_numpy()[idx]
+    for c in FEATURE_ORDER:
+        if c not in out:
+            out[c] = df[c].to_numpy()[rng.integers(0, len(df), n)]
+    return pd.DataFrame(out, columns=FEATURE_ORDER)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _summary_ms(samples) -> dict:
+    ms = np.asarray(samples) * 1000
+    return {"mean_ms": round(float(ms.mean()), 3),
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(ms, 95)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def _versions() -> dict:
+    out = {"python": platform.python_version()}
+    for mod in ("pandas", "numpy", "sklearn", "catboost", "joblib"):
+        try:
+            out[mod] = __import__(mod).__version__
+        except Exception:
+            out[mod] = None
+    return out
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _predict(model, df: pd.DataFrame):
+    return predict_safely(model, ensure_dataframe_schema(df, FEATURE_ORDER, CAT_COLS), FEATURE_ORDER, CAT_COLS)
+
+
+def run(sizes=DEFAULT_SIZES, load_repeat: int = 3, warm: int = 100, seed: int = 0) -> dict:
+    result = {"schema_version": SCHEMA_VERSION,
+              "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "platform": platform.platform(),
+              "git_commit": _git_commit(),
+              "versions": _versions(),
+              "peak_rss_mb": {"start": peak_rss_mb()}}
+
+    # --- model load ---
+    resolve_times, load_times, model = [], [], None
+    for _ in range(load_repeat):
+        model = None
+        t0 = time.perf_counter()
+        path, sha = resolve_model_artifact(MODEL_URL, EXPECTED_SHA256)
+        t1 = time.perf_counter()
+        model = load_model(path)
+        resolve_times.append(t1 - t0)
+        load_times.append(time.perf_counter() - t1)
+    total = [r + lt for r, lt in zip(resolve_times, load_times)]
+    result["model"] = {"path": str(path), "sha256": sha, "size_bytes": path.stat().st_size}
+    # first/best = resolve + joblib.load; bagian-bagiannya terpisah di bawah
+    result["model_load"] = {"first_ms": _ms(total[0]), "best_ms": _ms(min(total)),
+                            "resolve_first_ms": _ms(resolve_times[0]), "resolve_best_ms": _ms(min(resolve_times)),
+                            "joblib_first_ms": _ms(load_times[0]), "joblib_best_ms": _ms(min(load_times)),
+                            "repeat": load_repeat}
+    result["peak_rss_mb"]["after_load"] = peak_rss_mb()
+
+    # --- single row ---
+    source = load_dataset()
+    rows = synthetic_rows(warm + 1, seed, source)
+    t0 = time.perf_counter()
+    _predict(model, rows.iloc[[0]])
+    cold = time.perf_counter() - t0
+    warm_times = []
+    for i in range(1, warm + 1):
+        one = rows.iloc[[i]]
+        t0 = time.perf_counter()
+        _predict(model, one)
+        warm_times.append(time.perf_counter() - t0)
+    result["single_row"] = {"cold_ms": _ms(cold), "warm": _summary_ms(warm_times), "warm_n": warm}
+    result["peak_rss_mb"]["after_single_row"] = peak_rss_mb()
+
+    # --- batch ---
+    result["batch"] = []
+    for n in sizes:
+        batch = synthetic_rows(n, seed + n, source)
+        t0 = time.perf_counter()
+        preds = _predict(model, batch)
+        dt = time.perf_counter() - t0
+        result["batch"].append({"rows": n, "seconds": round(dt, 4),
+                                "rows_per_s": round(n / dt, 1),
+                                "us_per_row": round(dt / n * 1e6, 3),
+                                "finite_predictions": int(np.isfinite(preds).sum())})
+        result["peak_rss_mb"][f"after_batch_{n}"] = peak_rss_mb()
+        del batch, preds
+
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serving benchmark suite (JSON output)")
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--load-repeat", type=int, default=3)
+    ap.add_argument("--warm", type=int, default=100, help="warm single-row iterations")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    result = run(args.sizes, args.load_repeat, args.warm, args.seed)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Benchmark results written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
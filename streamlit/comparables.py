@@ -0,0 +1,223 @@
+"""Nearest comparable listings from UsedCarsSA_Clean_EN.csv, as evidence next to a prediction.
+
+The index keeps every priced listing sorted by (Make, Type), then Year, so each
+Make/Type is one contiguous slice (``starts``). Within a slice the numeric
+features are scaled so that one model year ≈ ``SCALE["Mileage"]`` km ≈
+``SCALE["Engine_Size"]`` litres and compared with Euclidean distance.
+
+Small slices are searched brute force (one vectorized distance over a few
+hundred rows). Large ones use the sorted Year column: the search starts at the
+query's year and widens the window until the Year gap to the next unseen row
+is larger than the current k-th distance (Year gap is a lower bound of the
+full distance, so the result is exact). Batches are grouped per slice and
+answered with one distance matrix per Make/Type.
+
+Persisted per dataset version as ``comparables_<version>.npz``.
+"""
+import os
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import dataset_version
+
+COMPARABLES_CACHE_DIR = Path(os.environ.get("COMPARABLES_CACHE_DIR", Path.home() / ".cache" / "carprice" / "comparables"))
+DEFAULT_K = 5
+# jarak 1 = 1 tahun model = 25.000 km = 0.5 L mesin
+SCALE = {"Year": 1.0, "Mileage": 25_000.0, "Engine_Size": 0.5}
+NUMERIC = list(SCALE)
+DISPLAY = ["Make", "Type", "Year", "Mileage", "Engine_Size", "Price",
+           "Origin", "Region", "Color", "Options", "Gear_Type", "Fuel_Type"]
+BRUTE_FORCE_MAX = 512
+_SEP = "\x1f"
+
+
+def _key(make, type_) -> str:
+    return f"{str(make).strip()}{_SEP}{str(type_).strip()}"
+
+
+def _scaled(values: dict) -> np.ndarray:
+    return np.column_stack([np.asarray(values[c], dtype="float64") / SCALE[c] for c in NUMERIC])
+
+
+def _dist(points: np.ndarray, q: np.ndarray) -> np.ndarray:
+    diff = points - q
+    diff[np.isnan(diff)] = 0.0  # fitur query kosong → tidak ikut jarak
+    return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+
+def _k_smallest(d: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(d))
+    part = np.argpartition(d, k - 1)[:k] if k < len(d) else np.arange(len(d))
+    return part[np.argsort(d[part], kind="stable")]
+
+
+@dataclass(frozen=True)
+class ComparablesIndex:
+    version: str
+    keys: np.ndarray     # "Make\x1fType" per slice, urut
+    starts: np.ndarray   # int64, len(keys) + 1
+    points: np.ndarray   # (n, 3) Year / Mileage / Engine_Size ter-scale, urut per slice lalu Year
+    columns: dict        # kolom DISPLAY, urutan baris sama dengan points
+
+    @cached_property
+    def _slice_of(self) -> dict:
+        return {k: i for i, k in enumerate(self.keys.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    # ---------- QUERY ----------
+    def _nearest(self, s: int, e: int, q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        pts = self.points[s:e]
+        m = e - s
+        if m <= BRUTE_FORCE_MAX or np.isnan(q[0]):
+            d = _dist(pts, q)
+            order = _k_smallest(d, k)
+            return s + order, d[order]
+
+        pos = int(np.searchsorted(pts[:, 0], q[0]))
+        w = 4 * k
+        while True:
+            lo, hi = max(0, pos - w), min(m, pos + w)
+            d = _dist(pts[lo:hi], q)
+            order = _k_smallest(d, k)
+            d_k = d[order[-1]]
+            done_left = lo == 0 or q[0] - pts[lo - 1, 0] >= d_k
+            done_right = hi == m or pts[hi, 0] - q[0] >= d_k
+            if len(order) == min(k, m) and done_left and done_right:
+                return s + lo + order, d[order]
+            w *= 2
+
+    def query_ids(self, make, type_, year, mileage, engine_size, k: int = DEFAULT_K):
+        """Row positions + distances of the ``k`` nearest listings (empty for an unknown Make/Type)."""
+        i = self._slice_of.get(_key(make, type_))
+        if i is None:
+            return np.empty(0, dtype="int64"), np.empty(0)
+        q = _scaled({"Year": [year], "Mileage": [mileage], "Engine_Size": [engine_size]})[0]
+        return self._nearest(int(self.starts[i]), int(self.starts[i + 1]), q, k)
+
+    def rows(self, ids, dist=None) -> pd.DataFrame:
+        out = pd.DataFrame({c: self.columns[c][ids] for c in DISPLAY})
+        if dist is not None:
+            out["Distance"] = np.round(dist, 3)
+        return out
+
+    def query(self, make, type_, year, mileage, engine_size, k: int = DEFAULT_K) -> pd.DataFrame:
+        """The ``k`` nearest listings of the same Make/Type, closest first."""
+        return self.rows(*self.query_ids(make, type_, year, mileage, engine_size, k))
+
+    def query_batch(self, df: pd.DataFrame, k: int = DEFAULT_K) -> tuple[np.ndarray, np.ndarray]:
+        """``(ids, dist)`` of shape ``(len(df), k)``; ``-1`` / NaN where fewer than ``k`` exist.
+
+        Queries are grouped per Make/Type and each group is answered with one
+        ``(queries × slice)`` distance matrix.
+        """
+        n = len(df)
+        ids = np.full((n, k), -1, dtype="int64")
+        dist = np.full((n, k), np.nan)
+        slot = (df["Make"].astype("string").str.strip() + _SEP + df["Type"].astype("string").str.strip())
+        slot = slot.map(self._slice_of).to_numpy(dtype="float64", na_value=np.nan)
+        q = _scaled({c: pd.to_numeric(df[c], errors="coerce") for c in NUMERIC})
+        known = ~np.isnan(slot)
+        if not known.any():
+            return ids, dist
+        rows = np.flatnonzero(known)
+        codes = slot[rows].astype("int64")
+        order = np.argsort(codes, kind="stable")
+        rows, codes = rows[order], codes[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        for group in np.split(np.arange(len(rows)), bounds):
+            i = codes[group[0]]
+            s, e = int(self.starts[i]), int(self.starts[i + 1])
+            qr = rows[group]
+            kk = min(k, e - s)
+            if len(qr) * (e - s) <= 4_000_000:
+                diff = self.points[s:e][None, :, :] - q[qr][:, None, :]
+                diff[np.isnan(diff)] = 0.0
+                d = np.sqrt(np.einsum("qmj,qmj->qm", diff, diff))
+                if kk < e - s:
+                    part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+                else:
+                    part = np.broadcast_to(np.arange(e - s), d.shape)
+                dk = np.take_along_axis(d, part, axis=1)
+                o = np.argsort(dk, axis=1, kind="stable")
+                ids[qr, :kk] = s + np.take_along_axis(part, o, axis=1)
+                dist[qr, :kk] = np.take_along_axis(dk, o, axis=1)
+            else:
+                for r in qr:
+                    got, dd = self._nearest(s, e, q[r], k)
+                    ids[r, :len(got)], dist[r, :len(got)] = got, dd
+        return ids, dist
+
+    def summarize(self, df: pd.DataFrame, k: int = DEFAULT_K) -> pd.DataFrame:
+        """Per query row: median price and count of its ``k`` comparables (for batch uploads)."""
+        ids, _ = self.query_batch(df, k)
+        price = np.where(ids >= 0, self.columns["Price"][np.clip(ids, 0, None)], np.nan)
+        n = (ids >= 0).sum(axis=1)
+        median = np.full(len(df), np.nan)
+        has = n > 0
+        if has.any():
+            median[has] = np.nanmedian(price[has], axis=1)
+        return pd.DataFrame({"Comparables_N": n, "Comparables_Median_Price": pd.array(np.rint(median), dtype="Int64")},
+                            index=df.index)
+
+    # ---------- PERSIST ----------
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, version=np.array(self.version), keys=self.keys, starts=self.starts, points=self.points,
+                     **{f"col_{c}": v for c, v in self.columns.items()})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> "ComparablesIndex":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(version=str(z["version"]), keys=z["keys"], starts=z["starts"], points=z["points"],
+                       columns={c: z[f"col_{c}"] for c in DISPLAY})
+
+
+def build_comparables_index(df: pd.DataFrame, version: str | None = None) -> ComparablesIndex:
+    d = pd.DataFrame({c: df[c] for c in DISPLAY})
+    d["Price"] = pd.to_numeric(d["Price"], errors="coerce")
+    for c in NUMERIC:
+        d[c] = pd.to_numeric(d[c], errors="coerce")
+    d = d[d["Price"] > 0].dropna(subset=["Make", "Type", "Price"] + NUMERIC)
+    for c in DISPLAY:
+        if c not in NUMERIC and c != "Price":
+            d[c] = d[c].astype("string").fillna("").str.strip()
+    d = d.sort_values(["Make", "Type", "Year"], kind="stable").reset_index(drop=True)
+
+    key = (d["Make"] + _SEP + d["Type"]).to_numpy(dtype=str, na_value="")
+    change = np.flatnonzero(key[1:] != key[:-1]) + 1
+    starts = np.concatenate([[0], change, [len(d)]]).astype("int64")
+    return ComparablesIndex(
+        version=version or dataset_version(df),
+        keys=key[starts[:-1]] if len(d) else np.empty(0, dtype=str),
+        starts=starts if len(d) else np.zeros(1, dtype="int64"),
+        points=_scaled({c: d[c] for c in NUMERIC}),
+        columns={c: d[c].to_numpy(dtype="float64") if c in NUMERIC or c == "Price" else d[c].to_numpy(dtype=str, na_value="")
+                 for c in DISPLAY},
+    )
+
+
+def load_or_build_comparables_index(df: pd.DataFrame, cache_dir=COMPARABLES_CACHE_DIR) -> ComparablesIndex:
+    """Read ``comparables_<version>.npz`` if present, otherwise build and persist it."""
+    version = dataset_version(df)
+    path = Path(cache_dir) / f"comparables_{version[:16]}.npz"
+    if path.exists():
+        try:
+            return ComparablesIndex.load(path)
+        except (OSError, ValueError, KeyError):
+            pass  # artifact rusak → build ulang
+    index = build_comparables_index(df, version)
+    try:
+        index.save(path)
+    except OSError:
+        pass  # read-only FS: tetap pakai index di memori
+    return index
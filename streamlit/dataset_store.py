@@ -0,0 +1,99 @@
+"""Shared dataset layer for UsedCarsSA_Clean_EN.csv.
+
+The CSV shipped with the app is parsed once into a compact frame
+(``category`` for the 8 categorical columns, narrow ints/floats for the
+numerics) and written to a Parquet cache keyed by the CSV's SHA-256.
+Later loads read that Parquet file memory-mapped instead of re-parsing CSV.
+Without ``pyarrow`` the compact frame is still returned, just not cached.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from model_store import APP_DIR, sha256_file
+from schema import CAT_COLS
+
+DATASET_FILENAME = "UsedCarsSA_Clean_EN.csv"
+CSV_URL = "https://raw.githubusercontent.com/irwans007/finalproject/refs/heads/main/streamlit/UsedCarsSA_Clean_EN.csv"
+LOCAL_DATASET_PATHS = [APP_DIR / DATASET_FILENAME, APP_DIR.parent / DATASET_FILENAME]
+DATASET_CACHE_DIR = Path(os.environ.get("DATASET_CACHE_DIR", Path.home() / ".cache" / "carprice" / "datasets"))
+
+# Tipe sempit untuk kolom numerik (cukup untuk rentang data: Mileage s/d 20jt, Price s/d ~1,2jt)
+NUMERIC_DTYPES = {"Year": "int16", "Engine_Size": "float32", "Mileage": "int32", "Price": "int32"}
+
+
+def dataset_version(df: pd.DataFrame) -> str:
+    """Content hash of a frame (vectorised row hashes, no CSV re-serialisation)."""
+    h = hashlib.sha256(",".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def local_dataset_path() -> Path | None:
+    for p in LOCAL_DATASET_PATHS:
+        if p.is_file():
+            return p
+    return None
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert to category / narrow numeric dtypes (NaN-safe); modifies ``df``."""
+    for c in CAT_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    for c, dtype in NUMERIC_DTYPES.items():
+        if c not in df.columns:
+            continue
+        s = pd.to_numeric(df[c], errors="coerce")
+        if s.isna().any() and dtype.startswith("int"):
+            dtype = dtype.capitalize()  # nullable Int16/Int32
+        df[c] = s.astype(dtype)
+    # Negotiable: bool kalau bersih; ada nilai kotor ("Fals") → simpan sebagai category apa adanya
+    if "Negotiable" in df.columns and df["Negotiable"].dtype == object:
+        df["Negotiable"] = df["Negotiable"].astype("category")
+    return df
+
+
+def read_csv_compact(src) -> pd.DataFrame:
+    # kategori langsung dibaca sebagai category → tidak ada kolom object besar di memori
+    dtypes = {c: "category" for c in CAT_COLS}
+    return compact_frame(pd.read_csv(src, dtype=dtypes))
+
+
+def parquet_cache_path(csv_sha256: str, cache_dir=DATASET_CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{Path(DATASET_FILENAME).stem}_{csv_sha256[:16]}.parquet"
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_dataset(csv_path=None, cache_dir=DATASET_CACHE_DIR, use_cache: bool = True) -> pd.DataFrame:
+    """Compact dataset: Parquet cache → local CSV (then cache it) → CSV_URL."""
+    csv_path = Path(csv_path) if csv_path is not None else local_dataset_path()
+    if csv_path is None:
+        # tidak ada file lokal: fallback ke raw URL (tanpa cache)
+        return read_csv_compact(CSV_URL)
+
+    if not (use_cache and _has_pyarrow()):
+        return read_csv_compact(csv_path)
+
+    cache = parquet_cache_path(sha256_file(csv_path), cache_dir)
+    if cache.exists():
+        return pd.read_parquet(cache, memory_map=True)
+
+    df = read_csv_compact(csv_path)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, cache)
+    except OSError:
+        pass  # read-only FS: tetap kembalikan frame di memori
+    return df
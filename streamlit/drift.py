@@ -0,0 +1,352 @@
+"""Drift / data-quality monitor over scored traffic, compared to the training data.
+
+Baseline (per dataset version, persisted as ``drift_baseline_<version>.json``),
+from the priced listings of UsedCarsSA_Clean_EN.csv, i.e. what the model saw:
+
+* numerics: ``NUM_BINS`` quantile bins + proportions, and the (min, max) range
+* categoricals: proportion of every value
+
+Live side, bounded memory whatever the traffic volume:
+
+* numerics: counts per baseline bin (fixed-size array) + below / above range
+* categoricals: counts per *known* value (≤ baseline vocabulary) + one unseen
+  counter + a Space-Saving top-``TOP_UNSEEN`` of unseen values
+* missing counts per feature
+
+From those: PSI per feature (categoricals: baseline values + one "unseen"
+bin) and novelty rates (unseen category / outside training range).
+
+``observe(X, source)`` is all the pages / services call: it keeps only the
+monitored columns of at most ``SAMPLE_MAX_ROWS`` rows (plus the row count the
+sample stands for) and does a non-blocking ``put_nowait``. The queue is capped
+by rows (``QUEUE_MAX_ROWS``), not frames, so a streamed upload never parks its
+chunks there. A daemon worker loads the baseline and updates the sketches
+column-wise; when it falls behind, samples are dropped (counted), never
+waited for. PSI / novelty are also exported as gauges (``carprice_drift_*``).
+"""
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import inc, set_gauge
+from schema import CAT_COLS, NUM_COLS
+
+DRIFT_CACHE_DIR = Path(os.environ.get("DRIFT_CACHE_DIR", Path.home() / ".cache" / "carprice" / "drift"))
+NUM_BINS = 10
+TOP_UNSEEN = 32
+# frame besar (batch) cukup di-sample untuk proporsi; jumlah baris tetap dihitung penuh.
+# Sample diambil di observe(), jadi antrean tidak pernah memegang chunk utuh.
+SAMPLE_MAX_ROWS = 2_000
+# batas antrean dalam baris (sample), bukan jumlah item
+QUEUE_MAX_ROWS = 50_000
+GAUGE_INTERVAL_S = 10.0
+# ambang PSI yang umum dipakai
+PSI_MODERATE, PSI_MAJOR = 0.1, 0.25
+_EPS = 1e-4
+
+
+@dataclass(frozen=True)
+class Baseline:
+    version: str
+    rows: int
+    edges: dict      # kolom numerik → batas dalam (NUM_BINS - 1 quantile)
+    num_props: dict  # kolom numerik → proporsi per bin
+    ranges: dict     # kolom numerik → [min, max]
+    cat_props: dict  # kolom kategori → {nilai: proporsi}
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "Baseline":
+        return cls(**json.loads(text))
+
+
+def _clean_cat(s: pd.Series) -> pd.Series:
+    s = s.astype("string").str.strip()
+    return s.mask(s == "")
+
+
+def build_baseline(df: pd.DataFrame, version: str | None = None) -> Baseline:
+    from dataset_store import dataset_version
+
+    if "Price" in df.columns:
+        df = df[pd.to_numeric(df["Price"], errors="coerce") > 0]
+    edges, num_props, ranges = {}, {}, {}
+    for c in NUM_COLS:
+        x = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        x = x[~np.isnan(x)]
+        e = np.unique(np.quantile(x, np.linspace(0, 1, NUM_BINS + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(e, x, side="right"), minlength=len(e) + 1)
+        edges[c] = e.tolist()
+        num_props[c] = (counts / max(len(x), 1)).tolist()
+        ranges[c] = [float(x.min()), float(x.max())]
+    cat_props = {}
+    for c in CAT_COLS:
+        vc = _clean_cat(df[c]).dropna().value_counts(normalize=True)
+        cat_props[c] = {str(k): float(v) for k, v in vc.items()}
+    return Baseline(version=version or dataset_version(df), rows=int(len(df)), edges=edges,
+                    num_props=num_props, ranges=ranges, cat_props=cat_props)
+
+
+def load_or_build_baseline(df: pd.DataFrame, cache_dir=DRIFT_CACHE_DIR) -> Baseline:
+    """Read ``drift_baseline_<version>.json`` if present, otherwise build and persist it."""
+    from dataset_store import dataset_version
+
+    version = dataset_version(df)
+    path = Path(cache_dir) / f"drift_baseline_{version[:16]}.json"
+    if path.exists():
+        try:
+            return Baseline.from_json(path.read_text(encoding="utf-8"))
+        except (ValueError, TypeError, KeyError):
+            pass  # artifact rusak → build ulang
+    baseline = build_baseline(df, version)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(baseline.to_json(), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only FS: tetap pakai baseline di memori
+    return baseline
+
+
+def psi(expected, actual) -> float:
+    """Population stability index of two proportion vectors (same bins)."""
+    e = np.clip(np.asarray(expected, dtype="float64"), _EPS, None)
+    a = np.clip(np.asarray(actual, dtype="float64"), _EPS, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in ``capacity`` counters (Metwally et al.); counts are upper bounds."""
+
+    def __init__(self, capacity: int = TOP_UNSEEN):
+        self.capacity = capacity
+        self.counts: dict = {}
+
+    def add(self, value, count: int = 1):
+        if value in self.counts or len(self.counts) < self.capacity:
+            self.counts[value] = self.counts.get(value, 0) + count
+            return
+        victim = min(self.counts, key=self.counts.get)
+        self.counts[value] = self.counts.pop(victim) + count
+
+    def top(self, n: int = 10) -> list[tuple]:
+        return sorted(self.counts.items(), key=lambda kv: -kv[1])[:n]
+
+
+class DriftMonitor:
+    """Bounded-memory sketches of live feature distributions against a ``Baseline``."""
+
+    def __init__(self, baseline: Baseline):
+        self.baseline = baseline
+        self.rows = 0
+        self.sampled_rows = 0
+        self.sources: dict = {}
+        self._edges = {c: np.asarray(e, dtype="float64") for c, e in baseline.edges.items()}
+        self.num_counts = {c: np.zeros(len(e) + 1, dtype="int64") for c, e in self._edges.items()}
+        self.below = dict.fromkeys(NUM_COLS, 0)
+        self.above = dict.fromkeys(NUM_COLS, 0)
+        self.cat_counts = {c: {} for c in CAT_COLS}
+        self.unseen = dict.fromkeys(CAT_COLS, 0)
+        self.unseen_top = {c: SpaceSaving() for c in CAT_COLS}
+        self.missing = dict.fromkeys(NUM_COLS + CAT_COLS, 0)
+
+    def update(self, df: pd.DataFrame, source: str = "", weight: int | None = None):
+        """Add one frame (``weight``: rows it stands for when ``df`` is a sample)."""
+        self.rows += weight or len(df)
+        self.sampled_rows += len(df)
+        self.sources[source] = self.sources.get(source, 0) + (weight or len(df))
+        for c in NUM_COLS:
+            if c not in df.columns:
+                continue
+            x = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            nan = np.isnan(x)
+            self.missing[c] += int(nan.sum())
+            x = x[~nan]
+            self.num_counts[c] += np.bincount(np.searchsorted(self._edges[c], x, side="right"),
+                                              minlength=len(self._edges[c]) + 1)
+            lo, hi = self.baseline.ranges[c]
+            self.below[c] += int((x < lo).sum())
+            self.above[c] += int((x > hi).sum())
+        for c in CAT_COLS:
+            if c not in df.columns:
+                continue
+            s = _clean_cat(df[c])
+            self.missing[c] += int(s.isna().sum())
+            known, counts = self.baseline.cat_props[c], self.cat_counts[c]
+            for v, n in s.dropna().value_counts().items():
+                if v in known:
+                    counts[v] = counts.get(v, 0) + int(n)
+                else:
+                    self.unseen[c] += int(n)
+                    self.unseen_top[c].add(v, int(n))
+
+    # ---------- REPORT ----------
+    def distribution(self, feature: str) -> pd.DataFrame:
+        """Baseline vs live proportions per bin / category (categories: + ``(unseen)``)."""
+        if feature in NUM_COLS:
+            e = self.baseline.edges[feature]
+            lo, hi = self.baseline.ranges[feature]
+            bounds = [lo] + list(e) + [hi]
+            labels = [f"{a:,.6g}–{b:,.6g}" for a, b in zip(bounds[:-1], bounds[1:])]
+            live = self.num_counts[feature]
+            return pd.DataFrame({"bin": labels, "baseline": self.baseline.num_props[feature],
+                                 "live": live / max(int(live.sum()), 1)})
+        base = self.baseline.cat_props[feature]
+        counts = self.cat_counts[feature]
+        total = sum(counts.values()) + self.unseen[feature]
+        labels = list(base) + ["(unseen)"]
+        live = [counts.get(v, 0) for v in base] + [self.unseen[feature]]
+        return pd.DataFrame({"bin": labels, "baseline": list(base.values()) + [0.0],
+                             "live": np.asarray(live, dtype="float64") / max(total, 1)})
+
+    def report(self) -> list[dict]:
+        out = []
+        for c in NUM_COLS + CAT_COLS:
+            dist = self.distribution(c)
+            if c in NUM_COLS:
+                seen = int(self.num_counts[c].sum())
+                novel = self.below[c] + self.above[c]
+                detail = f"{self.below[c]:,} below / {self.above[c]:,} above training range"
+            else:
+                seen = sum(self.cat_counts[c].values()) + self.unseen[c]
+                novel = self.unseen[c]
+                detail = ", ".join(f"{v} ({n:,})" for v, n in self.unseen_top[c].top(5))
+            value = psi(dist["baseline"], dist["live"]) if seen else float("nan")
+            out.append({
+                "feature": c, "kind": "numeric" if c in NUM_COLS else "categorical",
+                "observed": seen, "missing_rate": self.missing[c] / max(seen + self.missing[c], 1),
+                "psi": value, "novelty_rate": novel / max(seen, 1),
+                "status": ("-" if not seen else "major" if value >= PSI_MAJOR
+                           else "moderate" if value >= PSI_MODERATE else "stable"),
+                "novel_detail": detail,
+            })
+        return out
+
+
+# ---------- PROSES: queue + worker ----------
+_q: "queue.Queue[tuple]" = queue.Queue()
+_queued_rows = 0  # baris sample di _q (dijaga _q_lock)
+_q_lock = threading.Lock()
+_rng = np.random.default_rng()
+_lock = threading.Lock()
+_thread = None
+_monitor: DriftMonitor | None = None
+_status = {"state": "idle", "error": ""}
+
+
+def _sample(X) -> tuple[pd.DataFrame, int]:
+    # (salinan kolom yang dimonitor, ≤ SAMPLE_MAX_ROWS baris; jumlah baris asli)
+    df = _to_frame(X)
+    n = len(df)
+    cols = [c for c in CAT_COLS + NUM_COLS if c in df.columns]
+    if n > SAMPLE_MAX_ROWS:
+        idx = np.sort(_rng.choice(n, SAMPLE_MAX_ROWS, replace=False))
+        return df.iloc[idx][cols].reset_index(drop=True), n
+    return df[cols].copy(), n
+
+
+def observe(X, source: str = ""):
+    """Queue a sample of a scored frame (or list of row dicts) for the monitor; never blocks.
+
+    Only a copy of at most ``SAMPLE_MAX_ROWS`` rows is queued (with the full
+    row count as weight), so ``X`` can be reused or freed right after the call.
+    """
+    global _thread, _queued_rows
+    if _thread is None:
+        with _lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_worker, name="drift-monitor", daemon=True)
+                _thread.start()
+    try:
+        df, n = _sample(X)
+    except Exception:
+        inc("drift_errors_total", source=source)
+        return
+    with _q_lock:
+        if _queued_rows + len(df) > QUEUE_MAX_ROWS:
+            inc("drift_dropped_total", source=source)
+            return
+        _queued_rows += len(df)
+    _q.put_nowait((df, n, source))
+
+
+def _to_frame(X) -> pd.DataFrame:
+    if isinstance(X, pd.DataFrame):
+        return X
+    from predictor import records_to_frame
+
+    return records_to_frame(X)
+
+
+def _export_gauges(mon: DriftMonitor):
+    for r in mon.report():
+        if r["observed"]:
+            set_gauge("drift_psi", r["psi"], feature=r["feature"])
+            set_gauge("drift_novelty_rate", r["novelty_rate"], feature=r["feature"])
+
+
+def _worker():
+    global _monitor, _queued_rows
+    try:
+        from dataset_store import load_dataset
+
+        baseline = load_or_build_baseline(load_dataset())
+    except Exception as e:  # tanpa baseline monitor mati, predict tetap jalan
+        _status.update(state="failed", error=str(e))
+        return
+    with _lock:
+        _monitor = DriftMonitor(baseline)
+    _status.update(state="running")
+    last_export = 0.0
+    while True:
+        df, n, source = _q.get()
+        with _q_lock:
+            _queued_rows -= len(df)
+        try:
+            with _lock:
+                _monitor.update(df, source, weight=n)
+            inc("drift_rows_total", n, source=source)
+            if time.monotonic() - last_export >= GAUGE_INTERVAL_S:
+                with _lock:
+                    _export_gauges(_monitor)
+                last_export = time.monotonic()
+        except Exception:
+            inc("drift_errors_total", source=source)
+
+
+def report() -> list[dict]:
+    """Current per-feature report (empty until the baseline is loaded)."""
+    with _lock:
+        return [] if _monitor is None else _monitor.report()
+
+
+def distribution(feature: str) -> pd.DataFrame | None:
+    with _lock:
+        return None if _monitor is None else _monitor.distribution(feature)
+
+
+def status() -> dict:
+    with _lock:
+        mon = _monitor
+        return dict(_status, queued=_q.qsize(), queued_rows=_queued_rows,
+                    rows=mon.rows if mon else 0, sources=dict(mon.sources) if mon else {},
+                    baseline_rows=mon.baseline.rows if mon else 0,
+                    baseline_version=mon.baseline.version[:16] if mon else "")
+
+
+def reset():
+    """Start the live side from zero (same baseline)."""
+    global _monitor
+    with _lock:
+        if _monitor is not None:
+            _monitor = DriftMonitor(_monitor.baseline)
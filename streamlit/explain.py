@@ -0,0 +1,87 @@
+"""Per-prediction feature contributions from CatBoost's native SHAP values.
+
+``explain_frame`` runs ``get_feature_importance(type="ShapValues")`` on the
+compiled scorer's input buffer, so a whole upload is explained in one call.
+The buffer already holds the pipeline's input columns (the scaler is affine,
+categoricals pass through), so every CatBoost feature maps straight back to
+one of the form / CSV columns. Model-only features the user never enters
+(``scorer.fixed``, e.g. ``Negotiable``) are folded into ``base``, so the
+explanation covers exactly the input columns and stays additive.
+
+Contributions are on the model's raw scale. For the log1p target that means
+``log1p(price) = base + Σ values``, i.e. each feature multiplies ``price + 1``
+by ``exp(value)``; ``effects()`` reports that as a percentage.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+PREFIX = "SHAP_"
+
+
+@dataclass(frozen=True)
+class Explanation:
+    features: list         # kolom input, urutan sama dengan kolom values
+    base: np.ndarray       # (n,) expected value (skala raw model)
+    values: np.ndarray     # (n, len(features)) kontribusi per fitur
+    multiplicative: bool   # True → target log1p, efek dalam %
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def effects(self) -> np.ndarray:
+        """Per feature: % change of the price (log target) or SAR (plain target)."""
+        return np.expm1(self.values) * 100 if self.multiplicative else self.values
+
+    def base_price(self) -> np.ndarray:
+        return np.expm1(self.base) if self.multiplicative else self.base
+
+    def row(self, i: int = 0, inputs: dict | None = None) -> pd.DataFrame:
+        """One prediction as a table, largest contribution first."""
+        out = pd.DataFrame({"Feature": self.features,
+                            "Contribution": self.values[i],
+                            "Effect": self.effects()[i]})
+        if inputs is not None:
+            out.insert(1, "Value", [str(inputs.get(f, "")) for f in self.features])
+        order = np.argsort(-np.abs(self.values[i]), kind="stable")
+        return out.iloc[order].reset_index(drop=True)
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        """``SHAP_<feature>`` columns plus ``SHAP_base`` (raw scale), for joining onto a batch."""
+        out = pd.DataFrame(np.round(self.values, 5), columns=[PREFIX + f for f in self.features], index=index)
+        out[PREFIX + "base"] = np.round(self.base, 5)
+        return out
+
+    def mean_abs(self) -> pd.Series:
+        """Mean |contribution| per feature over the batch (global importance)."""
+        return pd.Series(np.abs(self.values).mean(axis=0) if len(self) else 0.0,
+                         index=self.features).sort_values(ascending=False)
+
+    def to_json(self) -> dict:
+        return {"features": list(self.features), "base": self.base.tolist(),
+                "values": self.values.tolist(), "multiplicative": self.multiplicative}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Explanation":
+        features = list(d["features"])
+        return cls(features=features,
+                   base=np.asarray(d["base"], dtype="float64"),
+                   values=np.asarray(d["values"], dtype="float64").reshape(-1, len(features)),
+                   multiplicative=bool(d["multiplicative"]))
+
+
+def explain_frame(scorer, df: pd.DataFrame, thread_count: int = -1) -> Explanation:
+    """Native SHAP for every row of ``df`` through a ``CompiledScorer``."""
+    raw = scorer.shap_values(df, thread_count).reshape(len(df), len(scorer.columns) + 1)
+    features = list(dict.fromkeys(scorer.input_columns))
+    # kolom yang muncul lebih dari sekali (mis. dua transformer) dijumlahkan;
+    # fitur tetap (bukan input) masuk ke base
+    onehot = np.zeros((len(scorer.columns), len(features)))
+    pos = [i for i, c in enumerate(scorer.columns) if c in scorer.fixed]
+    for i, c in enumerate(scorer.columns):
+        if c not in scorer.fixed:
+            onehot[i, features.index(c)] = 1.0
+    base = raw[:, -1] + raw[:, pos].sum(axis=1)
+    return Explanation(features=features, base=base, values=raw[:, :-1] @ onehot,
+                       multiplicative=scorer.inverse_func is np.expm1)
@@ -0,0 +1,310 @@
+"""Compiled scoring object for the fitted sklearn pipeline.
+
+``CompiledScorer.from_pipeline`` walks ``Pipeline → [ColumnTransformer] →
+TransformedTargetRegressor → CatBoostRegressor`` once and keeps only what the
+hot path needs:
+
+* the source column feeding every CatBoost feature position; model features
+  the app never sends (``schema.MODEL_DEFAULTS``, e.g. ``Negotiable``) are
+  filled with their fixed value,
+* scalers (RobustScaler / StandardScaler) folded into ``(x - offset) / scale``,
+* the target ``inverse_func`` (``np.expm1`` for our log1p model),
+* the native CatBoost booster, evaluated on a preallocated object array.
+
+No pandas, no sklearn validation, no ColumnTransformer per call.
+
+``save`` / ``load`` keep it as a slim native artifact (``model.cbm`` +
+``scorer.json``) so a process that already compiled once never unpickles the
+sklearn pipeline again: loading imports catboost only, not sklearn / scipy.
+``load_or_export_compiled`` does that per model SHA-256 in ``COMPILED_CACHE_DIR``.
+
+Export / benchmark::
+
+    python fast_scorer.py --out compiled_scorer.joblib
+    python benchmarks/bench_fast_scorer.py
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+
+COMPILED_FILENAME = "compiled_scorer.joblib"
+COMPILED_CACHE_DIR = Path(os.environ.get("COMPILED_CACHE_DIR", Path.home() / ".cache" / "carprice" / "compiled"))
+
+# inverse_func yang bisa diserialisasi ke scorer.json (log1p model → expm1)
+_INVERSE_FUNCS = {"expm1": np.expm1, "exp": np.exp}
+
+_AFFINE_SCALERS = {
+    # nama kelas → atribut (offset, scale) setelah fit
+    "RobustScaler": ("center_", "scale_"),
+    "StandardScaler": ("mean_", "scale_"),
+}
+
+
+def _split_pipeline(model):
+    """Return ``(preprocessor or None, final_estimator)``."""
+    steps = getattr(model, "steps", None)
+    if steps is None:
+        return None, model
+    pre = [est for _, est in steps[:-1] if est not in (None, "passthrough")]
+    if len(pre) > 1:
+        raise ValueError(f"Unsupported pipeline: {len(pre)} preprocessing steps")
+    return (pre[0] if pre else None), steps[-1][1]
+
+
+def _affine_for(transformer, n_cols: int):
+    if transformer == "passthrough":
+        return np.zeros(n_cols), np.ones(n_cols)
+    name = type(transformer).__name__
+    if name not in _AFFINE_SCALERS:
+        raise ValueError(f"Cannot fold transformer {name} into the compiled scorer")
+    off_attr, scale_attr = _AFFINE_SCALERS[name]
+    offset = getattr(transformer, off_attr, None)
+    scale = getattr(transformer, scale_attr, None)
+    offset = np.zeros(n_cols) if offset is None else np.asarray(offset, dtype="float64")
+    scale = np.ones(n_cols) if scale is None else np.asarray(scale, dtype="float64")
+    return offset, scale
+
+
+class CompiledScorer:
+    """Pipeline-equivalent ``predict`` on plain dict rows / numpy, without pandas."""
+
+    def __init__(self, booster, columns, cat_positions, offset, scale, inverse_func=None, fixed=None):
+        self.booster = booster
+        self.columns = list(columns)
+        self.cat_positions = sorted(cat_positions)
+        self.offset = np.asarray(offset, dtype="float64")
+        self.scale = np.asarray(scale, dtype="float64")
+        self.inverse_func = inverse_func
+        # {kolom: nilai} untuk fitur model yang bukan input app
+        self.fixed = dict(fixed or {})
+        fixed_pos = {i for i, c in enumerate(self.columns) if c in self.fixed}
+        self._fixed_values = {i: self._encode(i, self.fixed[self.columns[i]]) for i in sorted(fixed_pos)}
+        self.num_positions = [i for i in range(len(self.columns))
+                              if i not in set(self.cat_positions) and i not in fixed_pos]
+        self.cat_positions_in = [i for i in self.cat_positions if i not in fixed_pos]
+        self._local = threading.local()
+
+    def _encode(self, i: int, value):
+        if i in self.cat_positions:
+            return str(value)
+        return (float(value) - self.offset[i]) / self.scale[i] if value is not None else np.nan
+
+    @property
+    def input_columns(self) -> list:
+        """Columns read from the caller's rows (everything except ``fixed``)."""
+        return [c for c in self.columns if c not in self.fixed]
+
+    # ---------- BUILD ----------
+    @classmethod
+    def from_pipeline(cls, model, inputs=None, defaults=None) -> "CompiledScorer":
+        """Compile ``model`` for rows with ``inputs`` columns (default ``schema.FEATURE_ORDER``).
+
+        Model features outside ``inputs`` take their value from ``defaults``
+        (``schema.MODEL_DEFAULTS``); any other missing feature is a ``ValueError``.
+        """
+        if inputs is None or defaults is None:
+            from schema import FEATURE_ORDER, MODEL_DEFAULTS  # hanya saat compile, bukan saat load
+
+            inputs = FEATURE_ORDER if inputs is None else inputs
+            defaults = MODEL_DEFAULTS if defaults is None else defaults
+        pre, final = _split_pipeline(model)
+
+        inverse_func = None
+        booster = final
+        if hasattr(final, "regressor_"):  # TransformedTargetRegressor
+            booster = final.regressor_
+            if getattr(final, "transformer", None) is not None:
+                raise ValueError("TransformedTargetRegressor with a custom transformer is not supported")
+            inverse_func = final.inverse_func
+        if not hasattr(booster, "get_cat_feature_indices"):
+            raise ValueError(f"Final estimator {type(booster).__name__} is not a CatBoost model")
+
+        n_features = len(booster.feature_names_)
+        cat_positions = set(booster.get_cat_feature_indices())
+
+        if pre is None:
+            columns = list(booster.feature_names_)
+            offset, scale = np.zeros(n_features), np.ones(n_features)
+        else:
+            if not hasattr(pre, "transformers_"):
+                raise ValueError(f"Unsupported preprocessor {type(pre).__name__}")
+            columns, offsets, scales = [], [], []
+            for _, trans, cols in pre.transformers_:
+                if trans == "drop" or len(cols) == 0:
+                    continue
+                cols = list(cols)
+                if any(not isinstance(c, str) for c in cols):
+                    raise ValueError("ColumnTransformer must select columns by name")
+                o, s = _affine_for(trans, len(cols))
+                columns += cols
+                offsets.append(o)
+                scales.append(s)
+            offset, scale = np.concatenate(offsets), np.concatenate(scales)
+
+        if len(columns) != n_features:
+            raise ValueError(f"Model expects {n_features} features, preprocessing yields {len(columns)}")
+        # fitur kategori tidak di-scale
+        for i in cat_positions:
+            offset[i], scale[i] = 0.0, 1.0
+        fixed = {}
+        for c in columns:
+            if c not in inputs:
+                if c not in defaults:
+                    raise ValueError(f"Model feature {c!r} is neither an app input nor in MODEL_DEFAULTS")
+                fixed[c] = defaults[c]
+        return cls(booster, columns, cat_positions, offset, scale, inverse_func, fixed)
+
+    # ---------- PREDICT ----------
+    def _buffer(self, n: int) -> np.ndarray:
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] != n:
+            buf = self._local.buf = np.empty((n, len(self.columns)), dtype=object)
+            for i, v in self._fixed_values.items():
+                buf[:, i] = v
+        return buf
+
+    def _finish(self, buf: np.ndarray, thread_count: int | None = None) -> np.ndarray:
+        if thread_count is None:
+            thread_count = 1 if buf.shape[0] == 1 else -1
+        raw = self.booster.predict(buf, prediction_type="RawFormulaVal", thread_count=thread_count)
+        raw = np.asarray(raw, dtype="float64").reshape(-1)
+        return self.inverse_func(raw) if self.inverse_func is not None else raw
+
+    def predict_records(self, rows) -> np.ndarray:
+        """Score a list of dicts keyed by input column name."""
+        rows = list(rows)
+        buf = self._buffer(len(rows))
+        cols, off, sc = self.columns, self.offset, self.scale
+        for r, row in enumerate(rows):
+            for i in self.cat_positions_in:
+                buf[r, i] = str(row[cols[i]])
+            for i in self.num_positions:
+                v = row[cols[i]]
+                buf[r, i] = (float(v) - off[i]) / sc[i] if v is not None else np.nan
+        return self._finish(buf)
+
+    def predict_one(self, row: dict) -> float:
+        return float(self.predict_records([row])[0])
+
+    def _frame_buffer(self, df) -> np.ndarray:
+        buf = np.empty((len(df), len(self.columns)), dtype=object)
+        for i, v in self._fixed_values.items():
+            buf[:, i] = v
+        for i in self.cat_positions_in:
+            buf[:, i] = df[self.columns[i]].astype(str).to_numpy()
+        for i in self.num_positions:
+            x = np.asarray(df[self.columns[i]], dtype="float64")
+            buf[:, i] = (x - self.offset[i]) / self.scale[i]
+        return buf
+
+    def predict_frame(self, df, thread_count: int | None = None) -> np.ndarray:
+        """Vectorised variant for DataFrames (column-wise fill, no per-row Python loop)."""
+        return self._finish(self._frame_buffer(df), thread_count)
+
+    def shap_values(self, df, thread_count: int = -1) -> np.ndarray:
+        """CatBoost native SHAP on the raw (pre-``inverse_func``) scale.
+
+        ``(n, len(columns) + 1)``: one column per feature position, the last
+        one is the expected value. Computed for the whole frame in one call.
+        """
+        from catboost import Pool
+
+        pool = Pool(self._frame_buffer(df), cat_features=self.cat_positions)
+        return np.asarray(self.booster.get_feature_importance(pool, type="ShapValues", thread_count=thread_count),
+                          dtype="float64")
+
+    # ---------- SLIM ARTIFACT ----------
+    def save(self, out_dir) -> Path:
+        """Write ``model.cbm`` (CatBoost native) + ``scorer.json``; ``ValueError`` if not serialisable."""
+        inverse = None
+        if self.inverse_func is not None:
+            inverse = next((k for k, f in _INVERSE_FUNCS.items() if f is self.inverse_func), None)
+            if inverse is None:
+                raise ValueError(f"inverse_func {self.inverse_func!r} cannot be stored natively")
+        out_dir = Path(out_dir)
+        tmp = out_dir.with_name(out_dir.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        self.booster.save_model(str(tmp / "model.cbm"), format="cbm")
+        (tmp / "scorer.json").write_text(json.dumps({
+            "columns": self.columns, "cat_positions": self.cat_positions,
+            "offset": self.offset.tolist(), "scale": self.scale.tolist(), "inverse_func": inverse,
+            "fixed": self.fixed,
+        }), encoding="utf-8")
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp, out_dir)
+        return out_dir
+
+    @classmethod
+    def load(cls, in_dir) -> "CompiledScorer":
+        from catboost import CatBoostRegressor  # tanpa sklearn
+
+        in_dir = Path(in_dir)
+        meta = json.loads((in_dir / "scorer.json").read_text(encoding="utf-8"))
+        if "fixed" not in meta:
+            raise ValueError("scorer.json without 'fixed' (older format)")  # → compile ulang
+        booster = CatBoostRegressor()
+        booster.load_model(str(in_dir / "model.cbm"), format="cbm")
+        inverse = meta.get("inverse_func")
+        return cls(booster, meta["columns"], meta["cat_positions"], meta["offset"], meta["scale"],
+                   _INVERSE_FUNCS[inverse] if inverse else None, meta["fixed"])
+
+    # pickle tanpa thread-local buffer
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_local", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+
+def load_or_export_compiled(model_sha: str, load_pipeline, cache_dir=COMPILED_CACHE_DIR):
+    """Compiled scorer for ``model_sha``, unpickling the pipeline (``load_pipeline()``) only once.
+
+    Returns ``None`` when the pipeline shape is not supported by ``from_pipeline``.
+    """
+    path = Path(cache_dir) / model_sha.lower()
+    if (path / "scorer.json").exists():
+        try:
+            return CompiledScorer.load(path)
+        except Exception:  # CatBoostError bukan subclass ValueError
+            pass  # artifact rusak / versi catboost beda → compile ulang
+    try:
+        scorer = CompiledScorer.from_pipeline(load_pipeline())
+    except ValueError:
+        return None
+    try:
+        scorer.save(path)
+    except Exception:
+        pass  # read-only FS / inverse_func custom: tetap pakai scorer di memori
+    return scorer
+
+
+def export_compiled(model, out_path) -> Path:
+    import joblib
+
+    out_path = Path(out_path)
+    joblib.dump(CompiledScorer.from_pipeline(model), out_path)
+    return out_path
+
+
+def main(argv=None):
+    from model_store import MODEL_URL, EXPECTED_SHA256, APP_DIR, load_model_artifact
+
+    ap = argparse.ArgumentParser(description="Export the fitted pipeline as a CompiledScorer")
+    ap.add_argument("--out", default=str(APP_DIR / COMPILED_FILENAME))
+    args = ap.parse_args(argv)
+    model, sha = load_model_artifact(MODEL_URL, EXPECTED_SHA256)
+    path = export_compiled(model, args.out)
+    print(f"Compiled scorer for model {sha[:12]} written to {path}")
+
+
+if __name__ == "__main__":
+    main()
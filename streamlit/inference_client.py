@@ -0,0 +1,78 @@
+"""Thin client for inference_server.py.
+
+Pages use the service when ``INFERENCE_URL`` is set (e.g. ``http://127.0.0.1:8765``)
+and fall back to the in-process model otherwise.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+INFERENCE_URL = os.environ.get("INFERENCE_URL", "").rstrip("/")
+
+_local = threading.local()
+
+
+def _session():
+    # satu Session per thread → koneksi keep-alive dipakai ulang
+    s = getattr(_local, "session", None)
+    if s is None:
+        import requests
+        s = _local.session = requests.Session()
+    return s
+
+
+def predict_records(records, url: str = INFERENCE_URL, timeout: float = 60) -> np.ndarray:
+    """POST rows (list of JSON-serialisable dicts) and return predictions as a 1-D array."""
+    records = list(records)
+    if not records:
+        return np.empty(0, dtype="float64")
+    body = {"row": records[0]} if len(records) == 1 else {"rows": records}
+    return _post(json.dumps(body), url, timeout)
+
+
+def predict_frame(df, url: str = INFERENCE_URL, timeout: float = 60) -> np.ndarray:
+    """Same as ``predict_records`` for a DataFrame (numpy scalars/NaN handled by ``to_json``)."""
+    if len(df) == 0:
+        return np.empty(0, dtype="float64")
+    return _post('{"rows": ' + df.to_json(orient="records") + "}", url, timeout)
+
+
+def predict_frame_with_sha(df, url: str = INFERENCE_URL, timeout: float = 60) -> tuple[np.ndarray, str]:
+    """``predict_frame`` plus the sha256 of the model that scored it (from the same response, no extra request)."""
+    payload = _post_json('{"rows": ' + df.to_json(orient="records") + "}", url, timeout)
+    return np.asarray(payload["predictions"], dtype="float64"), payload["model_sha256"]
+
+
+def _post_json(body: str, url: str, timeout: float) -> dict:
+    if not url:
+        raise RuntimeError("INFERENCE_URL belum diset.")
+    r = _session().post(f"{url}/predict", data=body.encode("utf-8"),
+                        headers={"Content-Type": "application/json"}, timeout=timeout)
+    if r.status_code != 200:
+        raise RuntimeError(f"Inference service error {r.status_code}: {r.text[:200]}")
+    return r.json()
+
+
+def _post(body: str, url: str, timeout: float) -> np.ndarray:
+    return np.asarray(_post_json(body, url, timeout)["predictions"], dtype="float64")
+
+
+def explain_frame(df, url: str = INFERENCE_URL, timeout: float = 60):
+    """Native SHAP contributions for every row of ``df`` from the service's ``/explain`` → ``Explanation``."""
+    from explain import Explanation
+
+    if not url:
+        raise RuntimeError("INFERENCE_URL belum diset.")
+    r = _session().post(f"{url}/explain", data=('{"rows": ' + df.to_json(orient="records") + "}").encode("utf-8"),
+                        headers={"Content-Type": "application/json"}, timeout=timeout)
+    if r.status_code != 200:
+        raise RuntimeError(f"Inference service error {r.status_code}: {r.text[:200]}")
+    return Explanation.from_json(r.json())
+
+
+def health(url: str = INFERENCE_URL, timeout: float = 2) -> dict:
+    r = _session().get(f"{url}/health", timeout=timeout)
+    r.raise_for_status()
+    return r.json()
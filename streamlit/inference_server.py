@@ -0,0 +1,292 @@
+"""Standalone prediction service shared by all Streamlit sessions/replicas.
+
+Loads the pipeline once and serves:
+
+* ``GET  /health``  → ``{"ready": true, "model_sha256": ..., "model_version": ...}``
+* ``GET  /stats``   → request / micro-batch / cache counters
+* ``GET  /metrics`` → stage latency histograms (Prometheus text format)
+* ``POST /predict`` → body ``{"row": {...}}`` or ``{"rows": [{...}, ...]}``,
+  answer ``{"predictions": [...]}``
+* ``POST /explain`` → same body, answer the native SHAP contributions
+  (``Explanation.to_json()``, see explain.py)
+
+Single-row requests are answered from the prediction cache when possible;
+misses are queued and scored together in one ``model.predict`` call
+(micro-batching). Explicit batches go straight to the model.
+
+The served model is the active version of model_registry.py; a watcher
+re-checks it every ``MODEL_RELOAD_INTERVAL_S`` and swaps a ``promote``\d
+version in (loaded + warmed first) without restarting. A configured shadow
+candidate is scored on sampled requests in the background (shadow.py), and
+every scored row feeds the drift monitor (drift.py).
+
+Run::
+
+    python inference_server.py --host 127.0.0.1 --port 8765
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fast_scorer import CompiledScorer
+from metrics import REGISTRY, span, inc
+from model_registry import ModelRef, active_ref
+from prediction_cache import PREDICTION_CACHE_DB, PredictionCache
+from predictor import records_to_frame, ensure_dataframe_schema, predict_safely
+from warmup import sample_rows, warm_model
+from drift import observe as observe_drift
+from explain import explain_frame
+import shadow
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL_S = float(os.environ.get("MODEL_RELOAD_INTERVAL_S", "5"))
+
+
+class MicroBatcher:
+    """Collect single rows for up to ``max_wait_ms`` (or ``max_batch`` rows) and score them together."""
+
+    def __init__(self, score_fn, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: "queue.Queue[tuple[dict, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.stats = {"rows": 0, "batches": 0, "max_batch_seen": 0, "batch_retries": 0}
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: dict) -> Future:
+        fut: Future = Future()
+        self._q.put((row, fut))
+        return fut
+
+    def _score_each(self, items):
+        inc("microbatch_retry_total", source="service")
+        with self._lock:
+            self.stats["batch_retries"] += 1
+        for row, fut in items:
+            try:
+                fut.set_result(float(self.score_fn([row])[0]))
+            except Exception as e:
+                fut.set_exception(e)
+
+    def _loop(self):
+        while True:
+            items = [self._q.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            rows = [r for r, _ in items]
+            try:
+                preds = self.score_fn(rows)
+            except Exception as e:
+                if len(items) == 1:
+                    items[0][1].set_exception(e)
+                    continue
+                # satu row rusak tidak boleh menggagalkan client lain di batch yang sama
+                self._score_each(items)
+                continue
+            for (_, fut), p in zip(items, preds):
+                fut.set_result(float(p))
+            with self._lock:
+                self.stats["rows"] += len(items)
+                self.stats["batches"] += 1
+                self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(items))
+
+
+def predict_rows(model, rows, scorer=None):
+    if scorer is not None:
+        try:
+            # fast path: CatBoost native tanpa pandas (lihat fast_scorer.py)
+            with span("predict", source="service", path="compiled"):
+                return scorer.predict_records(rows)
+        except (KeyError, TypeError, ValueError):
+            inc("fast_path_miss_total", source="service")
+    with span("schema", source="service"):
+        df_pred = ensure_dataframe_schema(records_to_frame(rows))
+    with span("predict", source="service", path="pipeline"):
+        return predict_safely(model, df_pred)
+
+
+class ActiveModel:
+    """The served (model, compiled scorer, sha256), replaced atomically when the registry changes."""
+
+    def __init__(self, ref: ModelRef, warm_rows=None):
+        self._lock = threading.Lock()
+        self._warm_rows = warm_rows
+        self._swap(ref)
+
+    def _swap(self, ref: ModelRef):
+        # load + warm di luar lock: request tetap dilayani model lama sampai yang baru siap
+        model, sha = ref.load()
+        try:
+            scorer = CompiledScorer.from_pipeline(model)
+        except ValueError as e:
+            print(f"Compiled scorer unavailable ({e}); using the sklearn pipeline.")
+            scorer = None
+        if self._warm_rows is not None:
+            with span("warmup", source="service"):
+                for err in warm_model(model, scorer, self._warm_rows):
+                    print(f"Warm-up: {err}")
+        with self._lock:
+            self.ref, self.sha, self._model, self._scorer = ref, sha, model, scorer
+
+    def score(self, rows):
+        with self._lock:
+            model, scorer, ref = self._model, self._scorer, self.ref
+        t0 = time.perf_counter()
+        preds = predict_rows(model, rows, scorer)
+        shadow.submit(rows, preds, time.perf_counter() - t0, ref.version, "service")
+        observe_drift(rows, "service")
+        return preds
+
+    def explain(self, rows):
+        with self._lock:
+            scorer = self._scorer
+        if scorer is None:
+            raise ValueError("Explanations need the compiled scorer; this model is served by the sklearn pipeline.")
+        with span("explain", source="service"):
+            return explain_frame(scorer, ensure_dataframe_schema(records_to_frame(rows)))
+
+    def watch(self, interval: float = RELOAD_INTERVAL_S):
+        """Poll ``active_ref()`` in a daemon thread and swap when it changes."""
+        def _loop():
+            failed = None
+            while True:
+                time.sleep(interval)
+                ref = active_ref()
+                if ref == self.ref or ref == failed:
+                    continue
+                try:
+                    self._swap(ref)
+                    inc("model_reload_total", source="service")
+                    print(f"Now serving model {ref.version} ({self.sha[:12]})")
+                except Exception as e:  # artifact rusak / hilang → tetap serve versi lama
+                    failed = ref
+                    inc("model_reload_failures_total", source="service")
+                    print(f"Reload of {ref.version} failed ({e}); still serving {self.ref.version}")
+
+        threading.Thread(target=_loop, name="model-watch", daemon=True).start()
+
+
+def make_handler(active: ActiveModel, batcher: MicroBatcher, cache: PredictionCache, timeout: float = 30.0):
+    counters = {"requests": 0, "errors": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):  # access log terlalu berisik di bawah load
+            pass
+
+        def _send(self, code: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"ready": True, "model_sha256": active.sha, "model_version": active.ref.version})
+            elif self.path == "/metrics":
+                body = REGISTRY.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == "/stats":
+                with lock:
+                    snap = dict(counters)
+                with batcher._lock:
+                    snap.update(batcher.stats)
+                snap["cache"] = cache.snapshot()
+                self._send(200, snap)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path not in ("/predict", "/explain"):
+                self._send(404, {"error": "not found"})
+                return
+            with lock:
+                counters["requests"] += 1
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                rows = [payload["row"]] if "row" in payload else payload.get("rows")
+                model_sha = active.sha
+                if self.path == "/explain":
+                    if not rows:
+                        raise ValueError("Body harus berisi 'row' atau 'rows'.")
+                    self._send(200, {**active.explain(rows).to_json(), "model_sha256": model_sha})
+                    return
+                if rows is not None and len(rows) == 1:
+                    row = rows[0]
+                    value, _ = cache.get_or_compute(
+                        model_sha, row, lambda: batcher.submit(row).result(timeout=timeout)
+                    )
+                    preds = [value]
+                elif rows is not None:
+                    preds = [float(p) for p in active.score(rows)] if rows else []
+                else:
+                    raise ValueError("Body harus berisi 'row' atau 'rows'.")
+                self._send(200, {"predictions": preds, "model_sha256": model_sha})
+            except Exception as e:
+                with lock:
+                    counters["errors"] += 1
+                self._send(400, {"error": str(e)})
+
+    return Handler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          max_batch: int = 64, max_wait_ms: float = 5.0):
+    # warm-up sebelum listen (dan sebelum tiap swap): request pertama tidak membayar first-call CatBoost
+    try:
+        from dataset_store import load_dataset
+        warm_rows = sample_rows(load_dataset())
+    except Exception as e:  # dataset tidak ada → lewati warm-up, tetap serve
+        print(f"Warm-up skipped ({e})")
+        warm_rows = None
+    active = ActiveModel(active_ref(), warm_rows)
+    active.watch()
+    batcher = MicroBatcher(active.score, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    cache = PredictionCache(db_path=PREDICTION_CACHE_DB)
+    httpd = ThreadingHTTPServer((host, port), make_handler(active, batcher, cache))
+    httpd.daemon_threads = True
+    print(f"Serving model {active.ref.version} ({active.sha[:12]}) on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = ap.parse_args(argv)
+    serve(args.host, args.port, args.max_batch, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
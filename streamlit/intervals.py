@@ -0,0 +1,197 @@
+"""Per-prediction price intervals from conformal residual quantiles.
+
+The model predicts ``log1p(Price)``, so errors are roughly multiplicative.
+On the notebook's held-out split (Price > 0, ``dropna``,
+``train_test_split(test_size=0.2, random_state=0)``) we take the residuals
+``r = log1p(y) - log1p(ŷ)``. For each (Make, Year bucket) cell we keep the
+split-conformal lower/upper quantiles of ``r``, so that
+
+    [expm1(log1p(ŷ) + q_lo), expm1(log1p(ŷ) + q_hi)]
+
+covers ``coverage`` of unseen listings. Cells with fewer than ``MIN_CELL_COUNT``
+residuals fall back to the Make, then the Year bucket, then the global
+quantiles. The fallback is resolved at build time into a dense
+``(n_makes + 1, n_buckets, 2)`` array, so serving is two index lookups plus an
+add (scalar or vectorized over a whole batch).
+
+The table is persisted as a small JSON artifact per model SHA-256 + dataset version.
+
+    python intervals.py --coverage 0.8 --out intervals.json
+"""
+import argparse
+import json
+import os
+from dataclasses import dataclass, asdict
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import dataset_version
+
+INTERVALS_CACHE_DIR = Path(os.environ.get("INTERVALS_CACHE_DIR", Path.home() / ".cache" / "carprice" / "intervals"))
+DEFAULT_COVERAGE = 0.8
+MIN_CELL_COUNT = 30
+# batas kiri bucket tahun: <2005, 2005-09, 2010-13, 2014-16, 2017-19, >=2020
+YEAR_EDGES = (2005, 2010, 2014, 2017, 2020)
+
+# split yang sama dengan gamma_final.ipynb → residual dari data yang tidak dilihat model
+HOLDOUT_SIZE = 0.20
+HOLDOUT_SEED = 0
+
+
+def holdout_split(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of the notebook's test split (Price > 0, no missing values)."""
+    from sklearn.model_selection import train_test_split
+
+    d = df.copy()
+    d["Price"] = pd.to_numeric(d["Price"], errors="coerce")
+    d = d[d["Price"] > 0].dropna()
+    _, test = train_test_split(d, test_size=HOLDOUT_SIZE, random_state=HOLDOUT_SEED)
+    return test
+
+
+def _conformal_bounds(r: np.ndarray, alpha: float) -> tuple:
+    # quantile split-conformal dengan koreksi sampel hingga (n + 1), per sisi α/2
+    r = np.sort(r)
+    n = len(r)
+    k_lo = max(1, int(np.floor((n + 1) * alpha / 2))) - 1
+    k_hi = min(n, int(np.ceil((n + 1) * (1 - alpha / 2)))) - 1
+    return float(r[k_lo]), float(r[k_hi])
+
+
+def year_bucket(year) -> np.ndarray:
+    # NaN / tahun kosong → bucket terakhir (searchsorted menaruh NaN di ujung)
+    year = pd.to_numeric(pd.Series(year, copy=False), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return np.searchsorted(YEAR_EDGES, year, side="right")
+
+
+@dataclass(frozen=True)
+class IntervalTable:
+    version: str
+    coverage: float
+    makes: list
+    quantiles: list  # [make (+ unknown)][year bucket] → [q_lo, q_hi] (log space)
+    n_calibration: int
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "IntervalTable":
+        return cls(**json.loads(text))
+
+    @cached_property
+    def _q(self) -> np.ndarray:
+        return np.asarray(self.quantiles, dtype="float64")
+
+    @cached_property
+    def _make_index(self) -> dict:
+        return {m: i for i, m in enumerate(self.makes)}
+
+    def interval(self, make, year, pred: float) -> tuple[float, float]:
+        """Single prediction → ``(low, high)`` in SAR."""
+        mi = self._make_index.get(str(make).strip(), len(self.makes))
+        q_lo, q_hi = self._q[mi, year_bucket([year])[0]]
+        lp = np.log1p(max(float(pred), 0.0))
+        return float(np.expm1(lp + q_lo)), float(np.expm1(lp + q_hi))
+
+    def bounds(self, make, year, pred) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized ``interval`` for whole columns (no per-row Python loop)."""
+        make = pd.Series(make, copy=False).astype("string").str.strip()
+        mi = make.map(self._make_index).fillna(len(self.makes)).to_numpy(dtype="int64")
+        q = self._q[mi, year_bucket(year)]
+        lp = np.log1p(np.clip(np.asarray(pred, dtype="float64"), 0.0, None))
+        return np.expm1(lp + q[:, 0]), np.expm1(lp + q[:, 1])
+
+    def add_columns(self, df: pd.DataFrame, pred, prefix: str = "Prediction") -> pd.DataFrame:
+        """Append ``<prefix>_Low`` / ``<prefix>_High`` (rounded like ``Prediction``); modifies ``df``."""
+        lo, hi = self.bounds(df["Make"], df["Year"], pred)
+        # Int64: baris tanpa prediksi (NaN) tetap kosong
+        df[f"{prefix}_Low"] = pd.array(np.rint(lo), dtype="Int64")
+        df[f"{prefix}_High"] = pd.array(np.rint(hi), dtype="Int64")
+        return df
+
+
+def build_interval_table(df: pd.DataFrame, predict_fn, coverage: float = DEFAULT_COVERAGE,
+                         version: str = "", min_count: int = MIN_CELL_COUNT) -> IntervalTable:
+    """Calibrate on the held-out split; ``predict_fn(X)`` returns prices for a frame."""
+    cal = holdout_split(df)
+    X = cal.drop(columns=["Price"])
+    for c in X.columns:
+        if isinstance(X[c].dtype, pd.CategoricalDtype):
+            X[c] = X[c].astype(str)
+    pred = np.clip(np.asarray(predict_fn(X), dtype="float64").reshape(-1), 0.0, None)
+    r = np.log1p(cal["Price"].to_numpy(dtype="float64")) - np.log1p(pred)
+
+    alpha = 1.0 - coverage
+    make_codes, makes = pd.factorize(cal["Make"].astype(str).str.strip(), sort=True)
+    buckets = year_bucket(cal["Year"])
+    n_buckets = len(YEAR_EDGES) + 1
+
+    def _q(mask):
+        return _conformal_bounds(r[mask], alpha) if mask.sum() >= min_count else None
+
+    global_q = _conformal_bounds(r, alpha)
+    bucket_q = [_q(buckets == b) or global_q for b in range(n_buckets)]
+    table = []
+    for m in range(len(makes)):
+        in_make = make_codes == m
+        make_q = _q(in_make)
+        table.append([_q(in_make & (buckets == b)) or make_q or bucket_q[b] for b in range(n_buckets)])
+    table.append(list(bucket_q))  # Make tidak dikenal
+
+    return IntervalTable(
+        version=version,
+        coverage=coverage,
+        makes=[str(m) for m in makes],
+        quantiles=[[list(q) for q in row] for row in table],
+        n_calibration=int(len(r)),
+    )
+
+
+def load_or_build_interval_table(df: pd.DataFrame, predict_fn, model_sha: str,
+                                 coverage: float = DEFAULT_COVERAGE,
+                                 cache_dir=INTERVALS_CACHE_DIR) -> IntervalTable:
+    """Read ``intervals_<model>_<dataset>_<coverage>.json`` if present, otherwise build and persist it."""
+    version = f"{model_sha[:16]}-{dataset_version(df)[:16]}"
+    path = Path(cache_dir) / f"intervals_{version}_{int(round(coverage * 100))}.json"
+    if path.exists():
+        try:
+            return IntervalTable.from_json(path.read_text(encoding="utf-8"))
+        except (ValueError, TypeError, KeyError):
+            pass  # artifact rusak → build ulang
+    table = build_interval_table(df, predict_fn, coverage, version)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(table.to_json(), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only FS: tetap pakai table di memori
+    return table
+
+
+def main(argv=None):
+    from dataset_store import load_dataset
+    from model_store import MODEL_URL, EXPECTED_SHA256, load_model_artifact
+    from predictor import predict_safely
+
+    ap = argparse.ArgumentParser(description="Calibrate conformal price intervals on the held-out split")
+    ap.add_argument("--coverage", type=float, default=DEFAULT_COVERAGE)
+    ap.add_argument("--out", help="also write the table here (e.g. for score_cli.py --intervals)")
+    args = ap.parse_args(argv)
+
+    model, sha = load_model_artifact(MODEL_URL, EXPECTED_SHA256)
+    table = load_or_build_interval_table(load_dataset(), lambda X: predict_safely(model, X), sha, args.coverage)
+    if args.out:
+        Path(args.out).write_text(table.to_json(), encoding="utf-8")
+    q = np.asarray(table.quantiles)
+    print(f"Intervals for model {sha[:12]}: coverage {table.coverage:.0%}, "
+          f"{table.n_calibration:,} held-out rows, {len(table.makes)} makes; "
+          f"median width ×{np.median(np.exp(q[..., 1] - q[..., 0])):.2f}")
+
+
+if __name__ == "__main__":
+    main()
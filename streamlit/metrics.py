@@ -0,0 +1,250 @@
+"""In-process timing spans, histograms and counters with Prometheus text export.
+
+The registry is module-level, so every Streamlit session in the same process
+records into the same histograms.
+
+    with span("predict", page="calculator"):
+        ...
+    inc("predict_fallback_total", page="team", path="catboost_pool")
+
+Export (both optional):
+
+* ``METRICS_PORT=9108`` → ``GET http://127.0.0.1:9108/metrics`` (and ``/ready``,
+  200 once the ``ready`` gauge is set, see warmup.py)
+* ``METRICS_FILE=/var/lib/node_exporter/carprice.prom`` → textfile, rewritten
+  at most every ``METRICS_FILE_INTERVAL_S`` seconds
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "carprice_"
+# detik; cukup rapat di bawah 10 ms untuk predict single-row
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0") or 0)
+METRICS_FILE = os.environ.get("METRICS_FILE", "")
+METRICS_FILE_INTERVAL_S = float(os.environ.get("METRICS_FILE_INTERVAL_S", "10"))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # slot terakhir = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate from buckets (linear interpolation inside the bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = BUCKETS[i - 1] if i > 0 else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: dict[tuple, Histogram] = {}
+        self.counters: dict[tuple, float] = {}
+        self.gauges: dict[tuple, float] = {}
+        self._last_file_write = 0.0
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = Histogram()
+            h.observe(value)
+        self._maybe_write_file()
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+        self._maybe_write_file()
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.gauges[key] = float(value)
+        self._maybe_write_file()
+
+    def gauge(self, name: str, default: float = 0.0, **labels) -> float:
+        with self._lock:
+            return self.gauges.get(self._key(name, labels), default)
+
+    # ---------- EXPORT ----------
+    def render_prometheus(self) -> str:
+        def fmt_labels(items, extra=()):
+            items = list(items) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+        lines = []
+        with self._lock:
+            hists = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            hist_snap = [(k, list(h.counts), h.sum, h.count) for k, h in hists]
+
+        typed = set()
+        for (name, labels), counts, total, n in hist_snap:
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cum = 0
+            for b, c in zip(list(BUCKETS) + ["+Inf"], counts):
+                cum += c
+                lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', b)])} {cum}")
+            lines.append(f"{metric}_sum{fmt_labels(labels)} {total:.9f}")
+            lines.append(f"{metric}_count{fmt_labels(labels)} {n}")
+        for (name, labels), value in counters:
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{fmt_labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} gauge")
+                typed.add(metric)
+            lines.append(f"{metric}{fmt_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[dict]:
+        """Rows for the admin page: one per histogram series."""
+        rows = []
+        with self._lock:
+            items = sorted(self.histograms.items())
+            for (name, labels), h in items:
+                rows.append({
+                    "metric": name,
+                    **dict(labels),
+                    "count": h.count,
+                    "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else None,
+                    "p50_ms": round(h.quantile(0.5) * 1000, 3) if h.count else None,
+                    "p95_ms": round(h.quantile(0.95) * 1000, 3) if h.count else None,
+                    "total_s": round(h.sum, 3),
+                })
+        return rows
+
+    def counter_rows(self) -> list[dict]:
+        with self._lock:
+            return [{"metric": name, **dict(labels), "value": v}
+                    for (name, labels), v in sorted(self.counters.items())]
+
+    def _maybe_write_file(self):
+        if not METRICS_FILE:
+            return
+        now = time.monotonic()
+        if now - self._last_file_write < METRICS_FILE_INTERVAL_S:
+            return
+        self._last_file_write = now
+        write_prometheus_file(METRICS_FILE)
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """Time a block into ``carprice_stage_seconds{stage=...}`` (recorded even if it raises)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("stage_seconds", time.perf_counter() - t0, stage=stage, **labels)
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    REGISTRY.inc(name, amount, **labels)
+
+
+def set_gauge(name: str, value: float, **labels):
+    REGISTRY.set_gauge(name, value, **labels)
+
+
+def write_prometheus_file(path: str):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(REGISTRY.render_prometheus())
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+_exporter_lock = threading.Lock()
+_exporter = None
+
+
+def start_http_exporter(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """Serve ``/metrics`` from a daemon thread; no-op if already running or port is 0."""
+    global _exporter
+    if not port:
+        return None
+    with _exporter_lock:
+        if _exporter is not None:
+            return _exporter
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/ready":
+                    ready = REGISTRY.gauge("ready") > 0
+                    body = b"ready\n" if ready else b"warming up\n"
+                    self.send_response(200 if ready else 503)
+                    self.send_header("Content-Type", "text/plain")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = REGISTRY.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            return None  # port sudah dipakai (mis. proses lain) → lewati
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+        _exporter = server
+        return server
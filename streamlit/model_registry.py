@@ -0,0 +1,255 @@
+"""Local model registry: versioned joblib artifacts + which one is live.
+
+Layout under ``MODEL_REGISTRY_DIR``::
+
+    artifacts/<sha256>.joblib   content-addressed, same naming as model_store's cache
+    versions/<version>.json     {"version", "sha256", "size_bytes", "created", "source", ...metadata}
+    state.json                  {"active": v, "shadow": v | null, "shadow_rate": 0.1, "updated": ...}
+
+``active_ref()`` is what the pages / inference_server.py load. It costs one
+``stat`` of state.json per call (parsed again only when the mtime changes), so
+callers ask on every request and pick up ``promote`` without a restart. With
+an empty registry it falls back to the built-in ``MODEL_URL`` /
+``EXPECTED_SHA256`` from model_store.py.
+
+``shadow_ref()`` names an optional candidate that shadow.py scores on a
+sample (``shadow_rate``) of live requests, off the request path.
+
+    python model_registry.py register artifacts/best_catboost_pipeline.joblib --version v2-shallow \\
+        --report artifacts/training_report.json
+    python model_registry.py shadow v2-shallow --rate 0.2
+    python model_registry.py promote v2-shallow
+    python model_registry.py list
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from model_store import CACHE_DIR, EXPECTED_SHA256, MODEL_URL, cache_path, load_model_artifact, sha256_file
+
+REGISTRY_DIR = Path(os.environ.get("MODEL_REGISTRY_DIR", Path.home() / ".cache" / "carprice" / "registry"))
+DEFAULT_SHADOW_RATE = 0.1
+BUILTIN_VERSION = "builtin"
+
+_STATE_FILE = "state.json"
+_EMPTY_STATE = {"active": None, "shadow": None, "shadow_rate": DEFAULT_SHADOW_RATE, "updated": None}
+
+_lock = threading.Lock()
+_state_cache: dict = {}  # path state.json → (mtime_ns, state)
+
+
+@dataclass(frozen=True)
+class ModelRef:
+    """Enough to resolve one model artifact through model_store (hashable → cache key)."""
+    version: str
+    sha256: str
+    url: str = ""
+    cache_dir: str = ""
+
+    def load(self, mmap: bool = True):
+        """``(model, sha256)``; the artifact is verified against ``sha256`` when it is set."""
+        return load_model_artifact(self.url, self.sha256, mmap, cache_dir=self.cache_dir or CACHE_DIR)
+
+
+BUILTIN_REF = ModelRef(BUILTIN_VERSION, EXPECTED_SHA256, MODEL_URL, str(CACHE_DIR))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _write_json(path: Path, payload: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)  # atomic: reader tidak pernah melihat file setengah jadi
+
+
+def _artifacts_dir(root) -> Path:
+    return Path(root) / "artifacts"
+
+
+def _version_path(version: str, root) -> Path:
+    if not version or "/" in version or "\\" in version or version.startswith("."):
+        raise ValueError(f"Invalid version name: {version!r}")
+    return Path(root) / "versions" / f"{version}.json"
+
+
+# ---------- VERSIONS ----------
+def register(path, version: str | None = None, meta: dict | None = None, root=REGISTRY_DIR) -> dict:
+    """Copy ``path`` into the registry under ``version`` (default: timestamp) and return its metadata.
+
+    Registering the same file under the same version again is a no-op; reusing
+    a version name for different bytes raises ``ValueError``.
+    """
+    path = Path(path)
+    digest = sha256_file(path)
+    version = version or time.strftime("v%Y%m%d-%H%M%S")
+    vpath = _version_path(version, root)
+    if vpath.exists():
+        existing = json.loads(vpath.read_text(encoding="utf-8"))
+        if existing["sha256"] != digest:
+            raise ValueError(f"Version {version} already registered with sha256 {existing['sha256'][:12]}")
+        return existing
+
+    dest = cache_path(digest, _artifacts_dir(root))
+    if not dest.exists():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix(".part")
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)
+    info = dict(meta or {})
+    info.update(version=version, sha256=digest, size_bytes=dest.stat().st_size,
+                created=_now(), source=str(path))
+    _write_json(vpath, info)
+    return info
+
+
+def get_version(version: str, root=REGISTRY_DIR) -> dict:
+    vpath = _version_path(version, root)
+    if not vpath.exists():
+        raise KeyError(f"Unknown model version: {version}")
+    return json.loads(vpath.read_text(encoding="utf-8"))
+
+
+def list_versions(root=REGISTRY_DIR) -> list[dict]:
+    """All registered versions, oldest first."""
+    vdir = Path(root) / "versions"
+    if not vdir.is_dir():
+        return []
+    out = []
+    for p in vdir.glob("*.json"):
+        try:
+            out.append(json.loads(p.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue  # file rusak / sedang ditulis → lewati
+    return sorted(out, key=lambda m: m.get("created") or "")
+
+
+def ref_for(version: str, root=REGISTRY_DIR) -> ModelRef:
+    if version == BUILTIN_VERSION:
+        return BUILTIN_REF
+    return ModelRef(version, get_version(version, root)["sha256"], "", str(_artifacts_dir(root)))
+
+
+# ---------- STATE ----------
+def read_state(root=REGISTRY_DIR) -> dict:
+    """Current ``state.json`` (cached per mtime, so cheap to call per request)."""
+    path = Path(root) / _STATE_FILE
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return dict(_EMPTY_STATE)
+    with _lock:
+        hit = _state_cache.get(path)
+        if hit is not None and hit[0] == mtime:
+            return dict(hit[1])
+    try:
+        state = dict(_EMPTY_STATE, **json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return dict(_EMPTY_STATE)
+    with _lock:
+        _state_cache[path] = (mtime, state)
+    return dict(state)
+
+
+def _update_state(root, **changes) -> dict:
+    state = read_state(root)
+    state.update(changes, updated=_now())
+    _write_json(Path(root) / _STATE_FILE, state)
+    return state
+
+
+def promote(version: str, root=REGISTRY_DIR) -> dict:
+    """Make ``version`` the live model (the shadow is cleared if it was this version)."""
+    ref_for(version, root)  # KeyError kalau belum diregister
+    state = read_state(root)
+    shadow = None if state.get("shadow") == version else state.get("shadow")
+    return _update_state(root, active=version, shadow=shadow)
+
+
+def set_shadow(version: str | None, rate: float = DEFAULT_SHADOW_RATE, root=REGISTRY_DIR) -> dict:
+    """Score ``rate`` of live requests with ``version`` as well (``None`` switches shadow off)."""
+    if version is not None:
+        ref_for(version, root)
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError("shadow rate must be in [0, 1]")
+    return _update_state(root, shadow=version, shadow_rate=float(rate))
+
+
+def active_ref(root=REGISTRY_DIR) -> ModelRef:
+    """The model to serve now; the built-in MODEL_URL when nothing is promoted."""
+    version = read_state(root).get("active")
+    if not version:
+        return BUILTIN_REF
+    try:
+        return ref_for(version, root)
+    except (KeyError, ValueError, OSError):
+        return BUILTIN_REF  # state menunjuk versi yang sudah dihapus → jangan matikan app
+
+
+def shadow_ref(root=REGISTRY_DIR) -> tuple[ModelRef, float] | None:
+    """``(candidate, sample rate)`` when shadow scoring is on, else ``None``."""
+    state = read_state(root)
+    version, rate = state.get("shadow"), float(state.get("shadow_rate") or 0.0)
+    if not version or rate <= 0.0 or version == (state.get("active") or BUILTIN_VERSION):
+        return None
+    try:
+        return ref_for(version, root), rate
+    except (KeyError, ValueError, OSError):
+        return None
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Manage the local model registry")
+    ap.add_argument("--root", default=str(REGISTRY_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("register", help="copy a joblib artifact in as a new version")
+    p.add_argument("path")
+    p.add_argument("--version")
+    p.add_argument("--report", help="training_report.json (from train.py) stored as metadata")
+    p.add_argument("--promote", action="store_true")
+
+    p = sub.add_parser("promote", help="make a version live")
+    p.add_argument("version")
+
+    p = sub.add_parser("shadow", help="shadow-score a candidate on a sample of requests")
+    p.add_argument("version", help="version name, or 'off'")
+    p.add_argument("--rate", type=float, default=DEFAULT_SHADOW_RATE)
+
+    sub.add_parser("list", help="show versions and state")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "register":
+        meta = json.loads(Path(args.report).read_text(encoding="utf-8")) if args.report else {}
+        info = register(args.path, args.version, meta, args.root)
+        print(f"Registered {info['version']} (sha256 {info['sha256'][:12]}, {info['size_bytes']:,} bytes)")
+        if args.promote:
+            promote(info["version"], args.root)
+            print(f"Promoted {info['version']}")
+    elif args.cmd == "promote":
+        promote(args.version, args.root)
+        print(f"Promoted {args.version}")
+    elif args.cmd == "shadow":
+        off = args.version == "off"
+        set_shadow(None if off else args.version, args.rate, args.root)
+        print("Shadow scoring off" if off else f"Shadow {args.version} at {args.rate:.0%} of requests")
+    else:
+        state = read_state(args.root)
+        active = state.get("active") or BUILTIN_VERSION
+        for m in list_versions(args.root):
+            mark = "*" if m["version"] == active else ("s" if m["version"] == state.get("shadow") else " ")
+            print(f"{mark} {m['version']:<24} {m['sha256'][:12]}  {m['created']}")
+        print(f"active: {active}, shadow: {state.get('shadow') or '-'} @ {state.get('shadow_rate', 0):.0%}")
+
+
+if __name__ == "__main__":
+    main()
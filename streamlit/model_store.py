@@ -0,0 +1,168 @@
+"""Shared model loading for all pages.
+
+Resolution order for the joblib pipeline:
+1. a local copy shipped with the app (``streamlit/`` or repo root),
+2. the content-addressed disk cache (``<cache>/<sha256>.joblib``): the pinned
+   hash if there is one, otherwise the last verified download of the URL
+   (``<cache>/latest-<url hash>``, written after each download),
+3. HTTP download from ``MODEL_URL`` into that cache.
+
+When ``EXPECTED_SHA256`` (or env ``MODEL_SHA256``) is set, every candidate is
+verified against it and mismatching files are skipped.
+
+Which version is live (and where its artifact lives) is decided by
+model_registry.py; these constants are its fallback when nothing is promoted.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from metrics import span, inc
+
+# ================== KONFIG ==================
+MODEL_FILENAME = "best_catboost_pipeline.joblib"
+MODEL_URL = "https://raw.githubusercontent.com/irwans007/finalproject/main/best_catboost_pipeline.joblib"
+
+# (Opsional) pin hash model; kosongkan jika tidak dipakai
+EXPECTED_SHA256 = os.environ.get("MODEL_SHA256", "")
+
+APP_DIR = Path(__file__).resolve().parent
+LOCAL_MODEL_PATHS = [APP_DIR / MODEL_FILENAME, APP_DIR.parent / MODEL_FILENAME]
+CACHE_DIR = Path(os.environ.get("MODEL_CACHE_DIR", Path.home() / ".cache" / "carprice" / "models"))
+
+_CHUNK = 1 << 20
+
+
+# ---------- UTIL HASH ----------
+def sha256_file(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _matches(digest: str, expected: str) -> bool:
+    return not expected or digest.lower() == expected.lower()
+
+
+def cache_path(digest: str, cache_dir=CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{digest.lower()}.joblib"
+
+
+def _latest_pointer(url: str, cache_dir=CACHE_DIR) -> Path:
+    # satu pointer per URL: isinya sha256 download terakhir yang sudah terverifikasi
+    return Path(cache_dir) / f"latest-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _read_latest(url: str, cache_dir=CACHE_DIR) -> str:
+    try:
+        digest = _latest_pointer(url, cache_dir).read_text(encoding="utf-8").strip().lower()
+    except OSError:
+        return ""
+    return digest if len(digest) == 64 and cache_path(digest, cache_dir).exists() else ""
+
+
+def _write_latest(url: str, digest: str, cache_dir=CACHE_DIR):
+    path = _latest_pointer(url, cache_dir)
+    try:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(digest.lower(), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only FS: proses berikutnya download lagi
+
+
+# ---------- DOWNLOAD ----------
+def _download_to_cache(url: str, cache_dir=CACHE_DIR, timeout: int = 60) -> tuple[Path, str]:
+    """Stream ``url`` to a temp file, hash it on the fly, then move it to ``<sha256>.joblib``."""
+    import requests  # hanya dibutuhkan kalau file lokal & cache tidak ada
+
+    inc("model_download_total")
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+    try:
+        with requests.get(url, timeout=timeout, stream=True) as r, os.fdopen(fd, "wb") as out:
+            r.raise_for_status()
+            first = True
+            for block in r.iter_content(chunk_size=_CHUNK):
+                if first:
+                    # Cek konten: pastikan bukan HTML (berarti salah URL)
+                    head = block[:256].lower()
+                    if head.startswith(b"<!doctype html") or b"<html" in head:
+                        raise RuntimeError("URL bukan raw file. Gunakan raw.githubusercontent.com atau tambahkan ?raw=1.")
+                    first = False
+                h.update(block)
+                out.write(block)
+        digest = h.hexdigest()
+        dest = cache_path(digest, cache_dir)
+        os.replace(tmp_name, dest)
+        return dest, digest
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+# ---------- RESOLVE ----------
+def resolve_model_artifact(url: str = MODEL_URL,
+                           expected_sha256: str = EXPECTED_SHA256,
+                           local_paths=None,
+                           cache_dir=CACHE_DIR) -> tuple[Path, str]:
+    """Return ``(path, sha256)`` of a verified model file, downloading only as a last resort."""
+    expected = (expected_sha256 or "").strip()
+
+    # 1) cache berbasis hash: kalau hash dipin dan file sudah ada, tidak perlu hashing ulang
+    if expected:
+        cached = cache_path(expected, cache_dir)
+        if cached.exists():
+            return cached, expected.lower()
+
+    # 2) file lokal yang ikut di-deploy bersama app
+    for p in (local_paths if local_paths is not None else LOCAL_MODEL_PATHS):
+        p = Path(p)
+        if p.is_file():
+            digest = sha256_file(p)
+            if _matches(digest, expected):
+                return p, digest
+
+    if not url:
+        raise RuntimeError("Model file not found locally and no MODEL_URL configured.")
+
+    # 3) tanpa pin: download terverifikasi terakhir dari URL ini (tanpa network)
+    if not expected:
+        latest = _read_latest(url, cache_dir)
+        if latest:
+            return cache_path(latest, cache_dir), latest
+
+    # 4) download ke cache
+    path, digest = _download_to_cache(url, cache_dir)
+    if not _matches(digest, expected):
+        path.unlink(missing_ok=True)
+        raise RuntimeError(f"Hash mismatch. expected={expected} got={digest}")
+    _write_latest(url, digest, cache_dir)
+    return path, digest
+
+
+def load_model(path, mmap: bool = True):
+    """Load the pipeline straight from disk (no in-memory bytes copy).
+
+    With ``mmap=True`` numpy arrays stored by joblib are memory-mapped read-only
+    instead of copied into the heap.
+    """
+    import joblib  # lazy: unpickle menarik sklearn + catboost, jangan di import time
+
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def load_model_artifact(url: str = MODEL_URL, expected_sha256: str = EXPECTED_SHA256, mmap: bool = True,
+                        cache_dir=CACHE_DIR):
+    """Convenience wrapper: resolve + load. Returns ``(model, sha256)``."""
+    with span("model_resolve"):
+        path, digest = resolve_model_artifact(url, expected_sha256, cache_dir=cache_dir)
+    with span("model_load"):
+        model = load_model(path, mmap=mmap)
+    return model, digest
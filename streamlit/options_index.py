@@ -0,0 +1,105 @@
+"""Precomputed form options for the single-car Calculator.
+
+Built once per dataset version (one ``groupby`` per dependency instead of a
+filter per Make/Origin on every rerun) and persisted as a small JSON artifact:
+
+* ``make_types``     Make   → sorted Types
+* ``origin_regions`` Origin → sorted Regions
+* ``vocab``          sorted values of every categorical column
+* ``bounds``         (min, max) for Year / Engine_Size / Mileage
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import dataset_version
+from schema import CAT_COLS, NUM_COLS
+
+OPTIONS_CACHE_DIR = Path(os.environ.get("OPTIONS_CACHE_DIR", Path.home() / ".cache" / "carprice" / "options"))
+
+# "iqr": pagar Tukey (Q1 - 1.5·IQR, Q3 + 1.5·IQR) dipotong ke min/max data. Untuk
+# Mileage memotong outlier ekstrem (batas atas ≈ 381000 pada dataset sekarang,
+# dulu hardcode 376000).
+# "range": min/max apa adanya. Year: rentang diskrit kecil, pagar IQR memotong
+# tahun model yang memang ada di data (2003-2004, 2022).
+BOUND_RULES = {"Year": "range", "Mileage": "iqr", "Engine_Size": "range"}
+
+
+@dataclass(frozen=True)
+class OptionsIndex:
+    version: str
+    make_types: dict
+    origin_regions: dict
+    vocab: dict
+    bounds: dict
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "OptionsIndex":
+        d = json.loads(text)
+        d["bounds"] = {k: tuple(v) for k, v in d["bounds"].items()}
+        return cls(**d)
+
+
+def _dependent(df: pd.DataFrame, parent: str, child: str) -> dict:
+    pairs = df[[parent, child]].dropna().drop_duplicates()
+    grouped = pairs.groupby(parent, sort=True, observed=True)[child].agg(lambda s: sorted(map(str, s)))
+    return {str(k): v for k, v in grouped.items()}
+
+
+def _bounds(s: pd.Series, rule: str) -> tuple:
+    x = pd.to_numeric(s, errors="coerce").dropna().to_numpy()
+    lo, hi = float(x.min()), float(x.max())
+    if rule == "iqr":
+        q1, q3 = np.percentile(x, [25, 75])
+        iqr = q3 - q1
+        lo, hi = max(lo, float(q1 - 1.5 * iqr)), min(hi, float(q3 + 1.5 * iqr))
+    return lo, hi
+
+
+def build_options_index(df: pd.DataFrame, version: str | None = None) -> OptionsIndex:
+    # batas numerik dihitung dari listing yang punya harga (sama dengan data training)
+    priced = df.loc[pd.to_numeric(df["Price"], errors="coerce") > 0] if "Price" in df.columns else df
+    bounds = {}
+    for c in NUM_COLS:
+        lo, hi = _bounds(priced[c], BOUND_RULES.get(c, "range"))
+        if c != "Engine_Size":
+            lo, hi = float(np.floor(lo)), float(np.ceil(hi))
+        bounds[c] = (lo, hi)
+
+    return OptionsIndex(
+        version=version or dataset_version(df),
+        make_types=_dependent(df, "Make", "Type"),
+        origin_regions=_dependent(df, "Origin", "Region"),
+        vocab={c: sorted(map(str, df[c].dropna().unique())) for c in CAT_COLS if c in df.columns},
+        bounds=bounds,
+    )
+
+
+def load_or_build_options_index(df: pd.DataFrame, cache_dir=OPTIONS_CACHE_DIR) -> OptionsIndex:
+    """Read ``options_<version>_<rules>.json`` if present, otherwise build and persist it."""
+    version = dataset_version(df)
+    # aturan batas ikut di nama file: ganti BOUND_RULES → artifact lama tidak dipakai lagi
+    rules = hashlib.sha256(json.dumps(BOUND_RULES, sort_keys=True).encode()).hexdigest()[:8]
+    path = Path(cache_dir) / f"options_{version[:16]}_{rules}.json"
+    if path.exists():
+        try:
+            return OptionsIndex.from_json(path.read_text(encoding="utf-8"))
+        except (ValueError, TypeError, KeyError):
+            pass  # artifact rusak → build ulang
+    index = build_options_index(df, version)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(index.to_json(), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only FS: tetap pakai index di memori
+    return index
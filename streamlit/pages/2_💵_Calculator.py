@@ -1,113 +1,80 @@
-import json, io, hashlib
+import json
+import time
 from pathlib import Path
 import pandas as pd
 import streamlit as st
-import joblib
-import requests  
+
+from inference_client import INFERENCE_URL, predict_frame, predict_frame_with_sha, explain_frame as explain_remote
+from prediction_cache import PREDICTION_CACHE_DB
+from metrics import span, inc, start_http_exporter
+from options_index import OptionsIndex
+from predictor import ensure_dataframe_schema, predict_safely
+from resources import (active_model_sha, remote_model_sha, load_model_cached, load_compiled_scorer,
+                       frame_predictor, frame_explainer,
+                       get_prediction_cache, get_options_index, get_interval_table, get_comparables_index)
+import shadow
+import drift
+from warmup import start_warmup
+from schema import FEATURE_ORDER, CAT_COLS
+from whatif import CATEGORICAL_AXES, NUMERIC_AXES, cache_key, numeric_values, sweep
 
 st.title(" Predict Used Car Price")
 
-# ================== KONFIG ==================
-# Raw URL model & CSV di GitHub (public)
-MODEL_URL = "https://raw.githubusercontent.com/irwans007/finalproject/main/best_catboost_pipeline.joblib"
-CSV_URL   = "https://raw.githubusercontent.com/irwans007/finalproject/refs/heads/main/streamlit/UsedCarsSA_Clean_EN.csv"
+start_http_exporter()  # no-op kecuali METRICS_PORT diset
+start_warmup()         # idempotent: preload model/dataset di background kalau belum
 
-# (Opsional) verifikasi integritas file model; kosongkan jika tidak dipakai
-EXPECTED_SHA256 = ""  # contoh: "3b5d5c3712955042212316173ccf37be..."
+# ================== KONFIG ==================
+# Model: versi aktif di model_registry.py (fallback model_store.py), dataset: dataset_store.py
 
 # ====== metadata fitur ======
-NUM_COLS = ["Mileage", "Engine_Size", "Year"]
-CAT_COLS = ["Make", "Type", "Origin", "Color", "Options", "Fuel_Type", "Gear_Type", "Region"]
-ALL_COLS = CAT_COLS + NUM_COLS
-
+# urutan kolom, dtype & vocab: schema.py (sama untuk semua halaman)
 FEATURES_JSON = Path("feature_names.json")
 CATCOLS_JSON  = Path("cat_cols.json")
 
-# ---------- UTIL HASH ----------
-def _sha256_bytes(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()
-
 # ---------- CACHE: DATASET & MODEL ----------
-@st.cache_data(show_spinner="Loading dataset…")
-def load_dataset_from_github(csv_url: str) -> pd.DataFrame:
-    # pd.read_csv bisa langsung dari URL raw
-    return pd.read_csv(csv_url)
-
-@st.cache_resource(show_spinner="Downloading model from GitHub…")
-def download_model_bytes(url: str) -> bytes:
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    # Cek konten: pastikan bukan HTML (berarti salah URL)
-    ctype = r.headers.get("Content-Type", "")
-    if "text/html" in ctype.lower() and not url.endswith("?raw=1"):
-        raise RuntimeError("URL bukan raw file. Gunakan raw.githubusercontent.com atau tambahkan ?raw=1.")
-    return r.content
-
-@st.cache_resource(show_spinner="Loading model into memory…")
-def load_joblib_from_bytes(b: bytes):
-    return joblib.load(io.BytesIO(b))
+# loader bersama (resources.py): entry cache sama dengan halaman lain & warm-up saat start
 
 # ---------- SCHEMA & PREDIKSI ----------
-def _ensure_dataframe_schema(df_in: pd.DataFrame, feature_names, cat_cols):
-    df_pred = df_in.reindex(columns=feature_names)
-    for c in cat_cols:
-        if c in df_pred.columns:
-            df_pred[c] = df_pred[c].astype("string")
-    for c in NUM_COLS:
-        if c in df_pred.columns:
-            df_pred[c] = pd.to_numeric(df_pred[c], errors="coerce")
-    return df_pred
-
-def _predict_safely(model_obj, df_pred, feature_names, cat_cols):
-    try:
-        return model_obj.predict(df_pred)
-    except Exception:
-        # fallback CatBoost murni
-        try:
-            from catboost import Pool
-        except ImportError as ie:
-            raise RuntimeError("Model kemungkinan CatBoost. Install dulu: pip install catboost") from ie
-        cat_in_df = [c for c in cat_cols if c in df_pred.columns]
-        pool = Pool(df_pred, cat_features=cat_in_df, feature_names=feature_names)
-        return model_obj.predict(pool)
+# predictor.predict_safely (pipeline → fallback Pool CatBoost), sama untuk semua halaman
+
+# ---------- PENJELASAN (SHAP) ----------
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _explain_spec(model_sha: str, spec_json: str, _explain_fn):
+    # key = model + spec: spec yang sering diulang tidak menghitung SHAP lagi
+    spec = json.loads(spec_json)
+    with span("explain", page="calculator"):
+        expl = _explain_fn(ensure_dataframe_schema(pd.DataFrame([spec])))
+    return expl.row(0, spec), float(expl.base_price()[0]), expl.multiplicative
 
 # -------- UI: FORM INPUT --------
-def user_input_features(df: pd.DataFrame) -> pd.DataFrame:
-    # Make & Type (dependent)
-    list_brand, list_type = [], []
-    for brand in sorted(df["Make"].dropna().unique()):
-        types = sorted(df.loc[df["Make"] == brand, "Type"].dropna().unique().tolist())
-        list_brand.append(brand); list_type.append(types)
-    df_brand_type = pd.DataFrame({"Make": list_brand, "Type": list_type})
+def _clamp(v, lo, hi):
+    return min(max(v, lo), hi)
 
-    Make = st.selectbox("Select Make (Brand of Car)", options=df_brand_type["Make"].tolist())
-    Type_allowed_values = df_brand_type[df_brand_type["Make"] == Make]["Type"].tolist()[0]
-    Type = st.selectbox("Select Type", options=Type_allowed_values)
+def user_input_features(opts: OptionsIndex) -> pd.DataFrame:
+    # Semua pilihan dibaca dari index yang sudah dihitung (O(1) per rerun)
+    # Make & Type (dependent)
+    Make = st.selectbox("Select Make (Brand of Car)", options=list(opts.make_types))
+    Type = st.selectbox("Select Type", options=opts.make_types[Make])
 
     # Origin & Region (dependent)
-    list_Origin, list_Region = [], []
-    for origin in sorted(df["Origin"].dropna().unique()):
-        regions = sorted(df.loc[df["Origin"] == origin, "Region"].dropna().unique().tolist())
-        list_Origin.append(origin); list_Region.append(regions)
-    df_origin_region = pd.DataFrame({"Origin": list_Origin, "Region": list_Region})
+    Origin = st.selectbox("Select Origin", options=list(opts.origin_regions))
+    Region = st.selectbox("Select Region", options=opts.origin_regions[Origin])
 
-    Origin = st.selectbox("Select Origin", options=df_origin_region["Origin"].tolist())
-    Region_allowed_values = df_origin_region[df_origin_region["Origin"] == Origin]["Region"].tolist()[0]
-    Region = st.selectbox("Select Region", options=Region_allowed_values)
-
-    Gear_Type = st.radio("Choose Gear Type:", sorted(df["Gear_Type"].dropna().unique().tolist()), horizontal=True)
-    Options   = st.radio("Choose Options:",   sorted(df["Options"].dropna().unique().tolist()),   horizontal=True)
+    Gear_Type = st.radio("Choose Gear Type:", opts.vocab["Gear_Type"], horizontal=True)
+    Options   = st.radio("Choose Options:",   opts.vocab["Options"],   horizontal=True)
 
     # Color & Fuel
-    color_vals = sorted(df["Color"].dropna().unique().tolist())
-    Color = st.selectbox("Select Color", color_vals)
-
-    fuel_vals = sorted(df["Fuel_Type"].dropna().unique().tolist())
-    Fuel_Type = st.selectbox("Select Fuel Type", fuel_vals)
-
-    Engine_Size = st.number_input("Fill Engine Size", min_value=1.0, max_value=9.0, step=0.1, value=5.0)
-    Year        = st.number_input("Fill Year (2003 - 2022)", min_value=2003, max_value=2022, step=1, value=2010)
-    Mileage     = st.number_input("Fill Mileage (in KM per hour)", min_value=0, max_value=376000, step=100, value=0)
+    Color = st.selectbox("Select Color", opts.vocab["Color"])
+    Fuel_Type = st.selectbox("Select Fuel Type", opts.vocab["Fuel_Type"])
+
+    eng_lo, eng_hi = opts.bounds["Engine_Size"]
+    year_lo, year_hi = (int(v) for v in opts.bounds["Year"])
+    km_hi = int(opts.bounds["Mileage"][1])
+    Engine_Size = st.number_input("Fill Engine Size", min_value=float(eng_lo), max_value=float(eng_hi), step=0.1,
+                                  value=float(_clamp(5.0, eng_lo, eng_hi)))
+    Year        = st.number_input(f"Fill Year ({year_lo} - {year_hi})", min_value=year_lo, max_value=year_hi, step=1,
+                                  value=_clamp(2010, year_lo, year_hi))
+    Mileage     = st.number_input("Fill Mileage (in KM per hour)", min_value=0, max_value=km_hi, step=100, value=0)
 
     df_new = pd.DataFrame({
         "Make": [Make], "Type": [Type], "Year": [Year], "Origin": [Origin],
@@ -122,39 +89,92 @@ col1, col2, col3 = st.columns([10, 1, 4])
 
 with col1:
     st.write("Fill the Detail")
-    # Load dataset sekali, cached
-    df_full = load_dataset_from_github(CSV_URL)
-    df_customer = user_input_features(df_full)
+    # Options form dari index (dataset dimuat & diindex sekali, cached)
+    opts = get_options_index()
+    df_customer = user_input_features(opts)
     do_predict = st.button("Predict")
 
     price_val = None
+    price_range = None
+    comparables = None
+    explanation = None
     err_msg = None
 
 # ====== PREDIKSI ======
 if do_predict:
+    drift.observe(df_customer, "calculator")  # non-blocking; sketch diupdate di thread drift
     try:
-        # 1) Unduh bytes model (cached)
-        model_bytes = download_model_bytes(MODEL_URL)
-
-        # 2) (opsional) verifikasi SHA256
-        if EXPECTED_SHA256:
-            got = _sha256_bytes(model_bytes)
-            if got.lower() != EXPECTED_SHA256.lower():
-                raise RuntimeError(f"Hash mismatch. expected={EXPECTED_SHA256} got={got}")
-
-        # 3) Load model dari bytes
-        model_loaded = load_joblib_from_bytes(model_bytes)
-
-        # 4) Baca metadata fitur jika ada; jika tidak, gunakan default
-        feature_names = json.loads(FEATURES_JSON.read_text()) if FEATURES_JSON.exists() else ALL_COLS
-        cat_cols      = json.loads(CATCOLS_JSON.read_text())  if CATCOLS_JSON.exists()  else CAT_COLS
-
-        # 5) Siapkan data & prediksi
-        df_pred = _ensure_dataframe_schema(df_customer, feature_names, cat_cols)
-        price = _predict_safely(model_loaded, df_pred, feature_names, cat_cols)
-
-        price_val = float(price[0])
-        st.success("Model loaded from GitHub")
+        if INFERENCE_URL:
+            # Thin client: model dipegang inference_server.py, bukan tiap session
+            # sha256 model ikut di response /predict: tanpa round-trip /health tambahan
+            with span("predict_remote", page="calculator"):
+                price, model_sha = predict_frame_with_sha(df_customer)
+            price_val = float(price[0])
+            interval_table = get_interval_table(model_sha, predict_frame)
+            explain_fn = explain_remote
+            st.success("Predicted by inference service")
+        else:
+            # 1-3) Versi aktif dari registry (hot-swap), resolve + verifikasi hash (cached);
+            #      pipeline sklearn baru di-unpickle kalau fast path gagal
+            model_sha, model_ref = active_model_sha()
+
+            # 4) Baca metadata fitur jika ada; jika tidak, gunakan default
+            feature_names = json.loads(FEATURES_JSON.read_text()) if FEATURES_JSON.exists() else FEATURE_ORDER
+            cat_cols      = json.loads(CATCOLS_JSON.read_text())  if CATCOLS_JSON.exists()  else CAT_COLS
+
+            # 5) Prediksi: fast path CatBoost native, fallback ke pipeline sklearn
+            def _score():
+                scorer = load_compiled_scorer(model_ref.url, model_ref.sha256, model_ref.cache_dir)
+                if scorer is not None:
+                    try:
+                        with span("predict", page="calculator", path="compiled"):
+                            return scorer.predict_one(spec)
+                    except (KeyError, TypeError, ValueError):
+                        inc("fast_path_miss_total", page="calculator")
+                with span("schema", page="calculator"):
+                    df_pred = ensure_dataframe_schema(df_customer, feature_names, cat_cols)
+                model_loaded, _ = load_model_cached(model_ref.url, model_ref.sha256, model_ref.cache_dir)
+                with span("predict", page="calculator", path="pipeline"):
+                    return predict_safely(model_loaded, df_pred, feature_names, cat_cols)[0]
+
+            def _compute_price():
+                t0 = time.perf_counter()
+                price = _score()
+                # shadow: kandidat di-score di background, tidak menambah latency request ini
+                shadow.submit(df_customer, [price], time.perf_counter() - t0, model_ref.version, "calculator")
+                return price
+
+            # 6) Cache hasil per spec (spec identik → tanpa panggil model)
+            spec = df_customer.iloc[0].to_dict()
+            with span("request", page="calculator"):
+                price_val, cache_hit = get_prediction_cache(PREDICTION_CACHE_DB).get_or_compute(
+                    model_sha, spec, _compute_price
+                )
+            inc("prediction_cache_total", page="calculator", result="hit" if cache_hit else "miss")
+            interval_table = get_interval_table(model_sha, frame_predictor(model_ref))
+            explain_fn = frame_explainer(model_ref)
+            st.success(f"Model {model_ref.version} loaded (sha256 {model_sha[:12]})"
+                       + (" · cached result" if cache_hit else ""))
+
+        # 7) Interval per prediksi: lookup tabel (Make, bucket Year), tanpa panggil model lagi
+        if interval_table is not None:
+            with span("interval", page="calculator"):
+                price_range = interval_table.interval(df_customer.at[0, "Make"], df_customer.at[0, "Year"], price_val)
+
+        # 8) Listing nyata paling mirip (Make/Type sama) sebagai bukti harga
+        with span("comparables", page="calculator"):
+            row = df_customer.iloc[0]
+            comparables = get_comparables_index().query(
+                row["Make"], row["Type"], row["Year"], row["Mileage"], row["Engine_Size"]
+            )
+
+        # 9) Kontribusi per fitur (SHAP native CatBoost), cached per model + spec
+        try:
+            spec_json = json.dumps(df_customer.iloc[0].to_dict(), sort_keys=True,
+                                   default=lambda v: v.item() if hasattr(v, "item") else str(v))
+            explanation = _explain_spec(model_sha, spec_json, explain_fn)
+        except Exception as e:
+            explanation = e  # harga tetap tampil; penjelasan saja yang gagal
 
     except Exception as e:
         err_msg = f"Gagal memuat model atau melakukan prediksi: {e}"
@@ -168,17 +188,124 @@ with col3:
         if err_msg:
             st.error(err_msg)
         elif price_val is not None:
-            range_error = 18
             price_formated = f"{price_val:,.0f}"
-            price_down = f"{price_val * (1 - range_error/100):,.0f}"
-            price_up   = f"{price_val * (1 + range_error/100):,.0f}"
+            if price_range is not None:
+                price_down, price_up = (f"{v:,.0f}" for v in price_range)
+                range_label = f"{interval_table.coverage:.0%} interval, calibrated on similar listings"
+            else:
+                range_error = 18
+                price_down = f"{price_val * (1 - range_error/100):,.0f}"
+                price_up   = f"{price_val * (1 + range_error/100):,.0f}"
+                range_label = f"±{range_error}%"
 
             st.title("SAR " + price_formated)
             st.markdown("---")
-            st.write(f"Estimation (±{range_error}%)")
+            st.write(f"Estimation ({range_label})")
             st.write(f"SAR {price_down} - {price_up}")
+            if comparables is not None and len(comparables):
+                st.caption(f"Median of {len(comparables)} comparable listings: "
+                           f"SAR {comparables['Price'].median():,.0f}")
         else:
             st.info("Silakan isi form lalu tekan tombol Predict.")
     else:
         st.caption("Isi form di kiri, lalu klik **Predict** untuk melihat hasil.")
 
+if do_predict and comparables is not None:
+    st.subheader("🔎 Comparable listings")
+    if len(comparables):
+        st.caption("Listing nyata dengan Make/Type sama, terdekat di Year / Mileage / Engine_Size.")
+        st.dataframe(comparables, hide_index=True, use_container_width=True,
+                     column_config={"Price": st.column_config.NumberColumn(format="SAR %.0f"),
+                                    "Mileage": st.column_config.NumberColumn(format="%.0f km")})
+    else:
+        st.caption("Tidak ada listing dengan Make/Type ini di dataset.")
+
+if do_predict and explanation is not None and err_msg is None:
+    st.subheader("🧠 Why this price?")
+    if isinstance(explanation, Exception):
+        st.caption(f"Explanation unavailable: {explanation}")
+    else:
+        contrib, base_price, multiplicative = explanation
+        if multiplicative:
+            st.caption(f"Model mulai dari SAR {base_price:,.0f} (rata-rata training); tiap fitur mengalikan harga "
+                       "dengan (1 + Effect). SHAP values native CatBoost, dihitung pada skala log harga.")
+            effect_fmt = "%+.1f%%"
+        else:
+            st.caption(f"Model mulai dari SAR {base_price:,.0f} (rata-rata training); tiap fitur menambah Effect SAR.")
+            effect_fmt = "SAR %+.0f"
+        st.bar_chart(contrib.set_index("Feature")["Effect"], horizontal=True)
+        st.dataframe(contrib, hide_index=True, use_container_width=True,
+                     column_config={"Effect": st.column_config.NumberColumn(format=effect_fmt),
+                                    "Contribution": st.column_config.NumberColumn(format="%.4f")})
+
+# ====== WHAT-IF SWEEP ======
+def _sweep_model():
+    # (model sha, X -> harga untuk satu frame, interval table): satu batch predict per sweep
+    if INFERENCE_URL:
+        sha = remote_model_sha(INFERENCE_URL)
+        return sha, predict_frame, get_interval_table(sha, predict_frame)
+    sha, ref = active_model_sha()
+    fn = frame_predictor(ref)
+    return sha, fn, get_interval_table(sha, fn)
+
+
+@st.cache_data(show_spinner="Scoring sweep…", max_entries=256)
+def _cached_sweep(model_sha: str, base_json: str, axes_json: str, _predict_fn, _intervals) -> pd.DataFrame:
+    # key = model + spec dasar + grid → sweep yang sama diulang langsung dari cache
+    with span("sweep", page="calculator"):
+        return sweep(json.loads(base_json), json.loads(axes_json), _predict_fn, _intervals)
+
+
+def _plot_sweep(res: pd.DataFrame):
+    axes = [c for c in res.columns if not c.startswith("Price")]
+    bands = [c for c in ("Price_Low", "Price", "Price_High") if c in res.columns]
+    if len(axes) == 2:
+        # satu kurva per nilai fitur kedua
+        st.line_chart(res.pivot(index=axes[0], columns=axes[1], values="Price"))
+    elif axes[0] in NUMERIC_AXES:
+        st.line_chart(res.set_index(axes[0])[bands])
+    else:
+        st.bar_chart(res.set_index(axes[0])["Price"].sort_values())
+    st.dataframe(res, hide_index=True, use_container_width=True,
+                 column_config={c: st.column_config.NumberColumn(format="%.0f") for c in bands})
+
+
+st.markdown("---")
+st.subheader("🔀 What-if sweep")
+st.caption("Mobil yang sama dengan form di atas, dengan Mileage / Year / Engine_Size lain atau warna / region lain. "
+           "Seluruh grid di-score dalam satu batch predict; sweep yang sama untuk spec yang sama langsung dari cache.")
+sweep_mode = st.radio("Sweep over", ["Numbers", "Alternatives"], horizontal=True)
+sweep_axes = {}
+if sweep_mode == "Numbers":
+    chosen = st.multiselect("Features (max 2)", NUMERIC_AXES, default=["Mileage"], max_selections=2)
+    points = st.slider("Points per feature", 5, 50, 20)
+    for c in chosen:
+        lo, hi = opts.bounds[c]
+        if c == "Engine_Size":
+            rng = st.slider(f"{c} range", float(lo), float(hi), (float(lo), float(hi)), step=0.1)
+        else:
+            rng = st.slider(f"{c} range", int(lo), int(hi), (int(lo), int(hi)))
+        sweep_axes[c] = numeric_values(c, rng[0], rng[1], points)
+else:
+    c = st.selectbox("Feature", CATEGORICAL_AXES)
+    sweep_axes[c] = st.multiselect(f"{c} values", opts.vocab[c], default=opts.vocab[c])
+
+if st.button("Run sweep", disabled=not sweep_axes):
+    st.session_state["whatif"] = cache_key(df_customer.iloc[0].to_dict(), sweep_axes)
+
+if "whatif" in st.session_state:
+    base_json, axes_json = st.session_state["whatif"]
+    try:
+        model_sha, predict_fn, intervals = _sweep_model()
+        sweep_res = _cached_sweep(model_sha, base_json, axes_json, predict_fn, intervals)
+    except Exception as e:
+        st.error(f"Sweep gagal: {e}")
+    else:
+        base = json.loads(base_json)
+        st.write(f"{base['Make']} {base['Type']} · {base['Year']} · {base['Mileage']:,} km · "
+                 f"{base['Color']} · {base['Region']}")
+        _plot_sweep(sweep_res)
+
+if not INFERENCE_URL:
+    with st.sidebar.expander("⚡ Prediction cache"):
+        st.json(get_prediction_cache(PREDICTION_CACHE_DB).snapshot())
@@ -1,9 +1,19 @@
-import io
-import numpy as np
+import time
+
 import pandas as pd
 import streamlit as st
-import joblib
-import requests
+
+from inference_client import INFERENCE_URL, predict_frame, explain_frame as explain_remote
+from predictor import add_prediction_columns, predict_safely, predict_valid
+from schema import FEATURE_ORDER, validate_and_coerce
+from metrics import span, inc, start_http_exporter
+from batch_stream import DEFAULT_CHUNKSIZE, read_header, stream_predict_csv
+from batch_jobs import DONE, FAILED, JobQueue, load_job, recent_jobs, result_path
+from resources import (active_model_sha, remote_model_sha, load_model_cached, load_compiled_scorer, frame_explainer,
+                       get_interval_table, get_comparables_index)
+import shadow
+import drift
+from warmup import start_warmup
 
 st.set_page_config(
     page_title="Syarah.com Car Price Machine Learning",
@@ -13,70 +23,134 @@ st.set_page_config(
 
 st.title("🚘 Predict Used Car Price for Batch Data")
 
+start_http_exporter()  # no-op kecuali METRICS_PORT diset
+start_warmup()         # idempotent: preload model/dataset di background kalau belum
+
 # ====== KONFIGURASI ======
 
-MODEL_URL = "https://raw.githubusercontent.com/irwans007/finalproject/main/best_catboost_pipeline.joblib"
+# Urutan fitur, dtype, vocab & rentang nilai: schema.py
+
+# File di atas ukuran ini otomatis diproses per chunk (streaming)
+STREAM_THRESHOLD_BYTES = 20 * 1024 * 1024
 
-# Urutan fitur FINAL yang dipakai model (harus cocok dengan training)
-FEATURE_ORDER = [
-    "Make","Type","Year","Origin","Color","Options",
-    "Engine_Size","Fuel_Type","Gear_Type","Mileage","Region"
-]
-CAT_COLS = ["Make","Type","Origin","Color","Options","Fuel_Type","Gear_Type","Region"]
-NUM_COLS = ["Year","Engine_Size","Mileage"]
+# Shadow scoring (model_registry.py): maks baris per batch yang ikut dibandingkan
+SHADOW_SAMPLE_ROWS = 256
 
 # ====== UTIL ======
-@st.cache_resource(show_spinner="📥 Downloading model from GitHub (RAW)...")
-def _download_model_bytes(url: str) -> bytes:
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    # Cek agar bukan HTML (menandakan URL bukan RAW)
-    head = r.content[:256].lower()
-    if head.startswith(b"<!doctype html") or b"<html" in head:
-        raise RuntimeError("MODEL_URL tampaknya bukan RAW. Pakai raw.githubusercontent.com atau tambah ?raw=1.")
-    return r.content
-
-@st.cache_resource(show_spinner="🧠 Loading model into memory...")
-def _load_model_from_bytes(b: bytes):
-    return joblib.load(io.BytesIO(b))
-
-def _prepare_df_exact(df: pd.DataFrame) -> pd.DataFrame:
-    # Validasi kolom
-    missing = [c for c in FEATURE_ORDER if c not in df.columns]
-    if missing:
-        raise RuntimeError(f"Dataset missing required columns: {', '.join(missing)}")
-
-    X = df[FEATURE_ORDER].copy()
-
-    # Normalisasi tipe
-    for c in CAT_COLS:
-        if c in X.columns:
-            X[c] = X[c].astype("string")
-    for c in NUM_COLS:
-        if c in X.columns:
-            X[c] = pd.to_numeric(X[c], errors="coerce")
-
-    # Tangani NaN numerik (opsional: strategi sederhana)
-    if X[NUM_COLS].isna().any().any():
-        X[NUM_COLS] = X[NUM_COLS].fillna(0)
-
-    return X
-
-def _predict_any(model, X: pd.DataFrame):
-    # 1) Coba pipeline sklearn (umum)
-    try:
-        return model.predict(X)
-    except Exception:
-        pass
+def _get_predict_fn():
+    # (callable X -> preds, model sha256): inference service kalau ada, kalau tidak model in-process
+    if INFERENCE_URL:
+        # Thin client: scoring di inference_server.py (model dimuat sekali untuk semua session)
+        model_sha = remote_model_sha(INFERENCE_URL)  # TTL 30 s, bukan /health per run
+        with st.expander("🔎 Model details"):
+            st.write("Inference service:", INFERENCE_URL)
+            st.write("Feature order (used for predict):", FEATURE_ORDER)
+        def _remote(X):
+            with span("predict_remote", page="team"):
+                return predict_frame(X)
+        return _remote, model_sha
 
-    # 2) Fallback CatBoost (model asli tanpa pipeline)
-    try:
-        from catboost import Pool
-    except ImportError as ie:
-        raise RuntimeError("Model kemungkinan CatBoost murni. Tambahkan 'catboost' di requirements.txt") from ie
-    pool = Pool(X, cat_features=[c for c in X.columns if c in CAT_COLS],
-                feature_names=list(X.columns))
-    return model.predict(pool)
+    # versi aktif registry; entry cache yang sama dengan Calculator & warm-up (resources.py)
+    model_sha, model_ref = active_model_sha()
+    scorer = load_compiled_scorer(model_ref.url, model_ref.sha256, model_ref.cache_dir)
+    with st.expander("🔎 Model details"):
+        st.write("Model version:", model_ref.version, f"(sha256 {model_sha[:12]})")
+        st.write("Scorer:", "compiled CatBoost" if scorer is not None else "sklearn pipeline")
+        st.write("Feature order (used for predict):", FEATURE_ORDER)
+
+    def _pipeline_predict(X):
+        # pipeline sklearn baru di-unpickle di sini, tidak saat halaman dibuka
+        model, _ = load_model_cached(model_ref.url, model_ref.sha256, model_ref.cache_dir)
+        with span("predict", page="team", path="pipeline"):
+            return predict_safely(model, X)
+
+    def _scored(X):
+        if scorer is not None:
+            try:
+                with span("predict", page="team", path="compiled"):
+                    return scorer.predict_frame(X)
+            except (KeyError, TypeError, ValueError):
+                inc("fast_path_miss_total", page="team")
+        return _pipeline_predict(X)
+
+    def _local(X):
+        t0 = time.perf_counter()
+        preds = _scored(X)
+        # shadow hanya untuk potongan awal batch; latency live diskalakan ke jumlah baris itu
+        shadow.submit(X.head(SHADOW_SAMPLE_ROWS), preds[:SHADOW_SAMPLE_ROWS],
+                      (time.perf_counter() - t0) * min(1.0, SHADOW_SAMPLE_ROWS / max(len(X), 1)),
+                      model_ref.version, "team")
+        return preds
+    return _local, model_sha
+
+def _get_explain_fn():
+    # X -> Explanation (SHAP native CatBoost), satu panggilan untuk seluruh upload
+    if INFERENCE_URL:
+        return explain_remote
+    _, model_ref = active_model_sha()
+    return frame_explainer(model_ref)
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue(model_sha: str, _predict_fn):
+    # satu worker pool per proses & versi model; job lama yang terputus dilanjutkan di sini
+    return JobQueue(_predict_fn, model_sha, intervals=get_interval_table(model_sha, _predict_fn))
+
+# ====== BACKGROUND JOBS ======
+def _show_job(job_id: str):
+    job = load_job(job_id)
+    if job is None:
+        st.warning(f"Job `{job_id}` not found (expired or wrong ID).")
+        return
+    polling = not job.finished
+
+    @st.fragment(run_every=2 if polling else None)
+    def _panel():
+        j = load_job(job_id)
+        label = f"Job `{j.job_id}` · {j.filename} ({j.size_bytes / 1e6:,.1f} MB)"
+        if polling and j.finished:
+            st.rerun()  # selesai → render ulang sekali tanpa polling
+        if j.status == DONE:
+            st.success(f"✅ {label}: {j.rows:,} rows processed.")
+            if j.invalid_rows:
+                st.warning(f"{j.invalid_rows:,} row(s) failed validation and were not scored (see the `Error` column).")
+            path = result_path(j.job_id)
+            st.caption("Showing the first 1,000 rows.")
+            st.dataframe(pd.read_csv(path, nrows=1000), height=340, use_container_width=True)
+            with open(path, "rb") as fh:
+                st.download_button(
+                    label="💾 Download Prediction Result (CSV)",
+                    data=fh,
+                    file_name=f"predictions_{j.job_id}.csv",
+                    mime="text/csv",
+                    key="job_download",
+                    use_container_width=True
+                )
+        elif j.status == FAILED:
+            st.error(f"❌ {label}: {j.error}")
+        else:
+            st.progress(j.progress, text=f"{label}: {j.status}, {j.rows:,} rows scored")
+            st.caption("You can close this tab; open this page again with the same link to download the result.")
+
+    _panel()
+
+job_param = st.sidebar.text_input(
+    "Job ID", value=st.query_params.get("job", ""),
+    help="Background jobs keep running after a reload. Paste a job ID to get its result back."
+).strip()
+if job_param:
+    st.query_params["job"] = job_param
+    st.subheader("🗂️ Background job")
+    _show_job(job_param)
+    st.divider()
+
+with st.sidebar.expander("Recent jobs"):
+    jobs = recent_jobs(limit=10)
+    if jobs:
+        st.dataframe(pd.DataFrame([{"job_id": j.job_id, "file": j.filename, "status": j.status,
+                                    "rows": j.rows} for j in jobs]),
+                     hide_index=True, use_container_width=True)
+    else:
+        st.caption("No jobs yet.")
 
 # ====== UI UPLOAD ======
 uploaded_file = st.sidebar.file_uploader(
@@ -91,53 +165,148 @@ if uploaded_file is None:
 
 st.sidebar.success(f"File '{uploaded_file.name}' successfully uploaded!")
 
+background = st.sidebar.toggle(
+    "Run as background job",
+    value=uploaded_file.size >= STREAM_THRESHOLD_BYTES,
+    help="Queue the file and score it in a worker. The result is stored under a job ID, survives a reload, and identical uploads reuse it."
+)
+streaming = background or st.sidebar.toggle(
+    "Streaming mode (large files)",
+    value=uploaded_file.size >= STREAM_THRESHOLD_BYTES,
+    help="Read & predict per chunk, results are written to a temp file. Memory stays bounded for files with hundreds of thousands of rows."
+)
+with_comparables = not streaming and st.sidebar.toggle(
+    "Add comparable listings",
+    value=False,
+    help="Per row: how many real listings of the same Make/Type are nearest in Year / Mileage / Engine_Size (max 5), and their median price."
+)
+with_explanations = not streaming and st.sidebar.toggle(
+    "Add explanations (SHAP)",
+    value=False,
+    help="Per row and feature: its contribution to log(1 + price) (native CatBoost SHAP values), as SHAP_<feature> "
+         "columns plus SHAP_base. SHAP_base + the sum of the row's SHAP columns = log(1 + Prediction)."
+)
+
 # Baca CSV
 try:
-    # streamlit UploadedFile bisa langsung ke pandas
-    data = pd.read_csv(uploaded_file)
+    if streaming:
+        # cukup header + 10 baris untuk preview; body dibaca per chunk saat Predict
+        columns = read_header(uploaded_file)
+        preview = pd.read_csv(uploaded_file, nrows=10)
+        uploaded_file.seek(0)
+    else:
+        # streamlit UploadedFile bisa langsung ke pandas
+        with span("read_csv", page="team"):
+            data = pd.read_csv(uploaded_file)
+        columns = list(data.columns)
+        preview = data.head(10)
 except Exception as e:
     st.error(f"❌ Error reading file: {e}")
     st.stop()
 
 st.write("Preview of your data:")
-st.dataframe(data.head(10), height=220, use_container_width=True)
+st.dataframe(preview, height=220, use_container_width=True)
 
 # Validasi kolom
-missing_cols = [c for c in FEATURE_ORDER if c not in data.columns]
+missing_cols = [c for c in FEATURE_ORDER if c not in columns]
 if missing_cols:
     st.error(f"⚠️ Your dataset is missing required columns: {', '.join(missing_cols)}")
     st.stop()
+elif streaming:
+    st.success(f"✅ Dataset valid! File size: {uploaded_file.size / 1e6:,.1f} MB (streaming mode)")
 else:
     st.success(f"✅ Dataset valid! Total rows: {data.shape[0]}")
 
 # ====== PREDICT ======
 if st.button("🚀 Predict the Price", use_container_width=True):
     try:
-        model_bytes = _download_model_bytes(MODEL_URL)
-        model = _load_model_from_bytes(model_bytes)
+        predict_fn, model_sha = _get_predict_fn()
 
-        with st.expander("🔎 Model details"):
-            st.write("Model class:", type(model).__name__)
-            st.write("Feature order (used for predict):", FEATURE_ORDER)
+        if background:
+            job, dedup = get_job_queue(model_sha, predict_fn).submit(uploaded_file.getvalue(), uploaded_file.name)
+            if dedup:
+                st.toast(f"Same file already submitted: reusing job {job.job_id}.")
+            st.query_params["job"] = job.job_id
+            st.rerun()
+        elif streaming:
+            bar = st.progress(0.0, text="Scoring…")
+
+            def _on_progress(frac, rows_done):
+                bar.progress(frac or 0.0, text=f"Scored {rows_done:,} rows")
+
+            uploaded_file.seek(0)
+            with span("stream_total", page="team"):
+                result = stream_predict_csv(
+                    uploaded_file, predict_fn,
+                    chunksize=DEFAULT_CHUNKSIZE,
+                    total_bytes=uploaded_file.size,
+                    on_progress=_on_progress,
+                    intervals=get_interval_table(model_sha, predict_fn),
+                    on_chunk=lambda X: drift.observe(X, "team"),
+                )
+            inc("rows_scored_total", result.rows - result.invalid_rows, page="team", mode="stream")
+
+            st.subheader("🔮 Prediction Result")
+            if result.invalid_rows:
+                st.warning(f"{result.invalid_rows:,} row(s) failed validation and were not scored (see the `Error` column).")
+            st.caption(f"{result.rows:,} rows processed in {result.chunks} chunk(s). Showing the first 1,000 rows.")
+            st.dataframe(pd.read_csv(result.path, nrows=1000), height=340, use_container_width=True)
 
-        X = _prepare_df_exact(data)
-        preds = _predict_any(model, X)
+            try:
+                with open(result.path, "rb") as fh:
+                    st.download_button(
+                        label="💾 Download Prediction Result (CSV)",
+                        data=fh,
+                        file_name="predictions.csv",
+                        mime="text/csv",
+                        use_container_width=True
+                    )
+            finally:
+                result.path.unlink(missing_ok=True)
+        else:
+            with span("schema", page="team"):
+                v = validate_and_coerce(data)
+            drift.observe(v.frame, "team")
+            preds = predict_valid(predict_fn, v)
+            inc("rows_scored_total", len(data) - v.n_invalid, page="team", mode="memory")
 
-        preds = np.asarray(preds).reshape(-1)  
-        out = data.copy()
-        out["Prediction"] = np.rint(preds).astype("int64")  # bulatkan ke integer
+            out = add_prediction_columns(data.copy(), preds, v.messages(),
+                                         get_interval_table(model_sha, predict_fn))
+            if with_comparables:
+                with span("comparables", page="team"):
+                    out = out.join(get_comparables_index().summarize(v.frame))
+            expl, expl_error = None, None
+            if with_explanations and v.valid.any():
+                # seluruh baris valid dijelaskan dalam satu panggilan ShapValues;
+                # gagal → prediksi tetap tampil, hanya kolom SHAP yang tidak ada
+                valid = v.valid
+                try:
+                    with span("explain", page="team"):
+                        expl = _get_explain_fn()(v.frame if valid.all() else v.frame[valid])
+                    out = out.join(expl.to_frame(index=v.frame.index[valid]))
+                except Exception as e:
+                    expl, expl_error = None, e
+                    inc("explain_failures_total", page="team")
 
-        st.subheader("🔮 Prediction Result")
-        st.dataframe(out, height=340, use_container_width=True)
+            st.subheader("🔮 Prediction Result")
+            if v.n_invalid:
+                st.warning(f"{v.n_invalid:,} row(s) failed validation and were not scored (see the `Error` column).")
+            if expl_error is not None:
+                st.warning(f"Explanations unavailable ({expl_error}); predictions are complete.")
+            st.dataframe(out, height=340, use_container_width=True)
+            if expl is not None:
+                st.caption("Mean |SHAP| per feature across this upload (which features move prices most).")
+                st.bar_chart(expl.mean_abs(), horizontal=True)
 
-        csv = out.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="💾 Download Prediction Result (CSV)",
-            data=csv,
-            file_name="predictions.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+            with span("csv_encode", page="team"):
+                csv = out.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                label="💾 Download Prediction Result (CSV)",
+                data=csv,
+                file_name="predictions.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
 
     except Exception as e:
         st.error(f"❌ Error: {e}")
@@ -1,9 +1,14 @@
 # pages/01_Data_Overview.py
 import io
+import hashlib
 import streamlit as st
 import pandas as pd
 import numpy as np
 
+from aggregates import parse_price, category_aggregates
+from dataset_store import dataset_version
+from schema import CAT_COLS
+
 # ────────────────────────────────────────────────────────────────────────────────
 # PAGE CONFIG
 # Call this before any other Streamlit commands
@@ -16,15 +21,8 @@ st.write(
 
 # ────────────────────────────────────────────────────────────────────────────────
 # KONFIGURASI
-FEATURE_COLUMNS = [
-    "Type", "Region", "Make", "Gear_Type", "Origin", "Options",
-    "Color", "Fuel_Type",
-    "Year", "Engine_Size", "Mileage",
-]
-CATEGORICAL = [
-    "Type", "Region", "Make", "Gear_Type", "Origin", "Options",
-    "Color", "Fuel_Type",
-]
+# kolom kategori dari schema.py (sama dengan Calculator)
+CATEGORICAL = CAT_COLS
 
 # ────────────────────────────────────────────────────────────────────────────────
 # HELPERS
@@ -36,38 +34,29 @@ def read_csv_safely(file) -> pd.DataFrame:
     else:
         buffer = file
 
-    df = pd.read_csv(buffer, low_memory=False)
+    # Kolom kategori langsung sebagai category (hemat memori untuk upload besar)
+    df = pd.read_csv(buffer, low_memory=False, dtype={c: "category" for c in CATEGORICAL})
 
     # Normalisasi nama kolom (trim spasi)
     df.columns = [c.strip() for c in df.columns]
 
-    # Harga → numeric (handle koma pemisah ribuan/desimal)
+    # Harga → numeric (handle koma pemisah ribuan/desimal), lihat aggregates.parse_price
     if "Price" in df.columns:
-        # Hilangkan karakter non-digit kecuali tanda titik/koma
-        # Lalu ganti koma menjadi titik jika tampak seperti desimal
-        s = df["Price"].astype(str).str.replace(r"[^0-9,.-]", "", regex=True)
-        # Jika ada koma dan titik, coba heuristik: ubah pemisah ribuan
-        # Contoh: 1.234.567,89 → 1234567.89
-        s = s.str.replace(r"\.(?=\d{3}(\D|$))", "", regex=True)
-        s = s.str.replace(",", ".", regex=False)
-        df["Price"] = pd.to_numeric(s, errors="coerce")
+        df["Price"] = parse_price(df["Price"])
 
     return df
 
 
-def summarize_by_category(df: pd.DataFrame, cat_col: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    avg_df = (
-        df.groupby(cat_col, dropna=True)[["Price"]]
-        .mean(numeric_only=True)
-        .reset_index()
-        .sort_values("Price", ascending=False)
-    )
-    cnt_df = (
-        df.groupby(cat_col, dropna=True)[["Price"]]
-        .size()
-        .reset_index(name="Count")
-        .sort_values("Count", ascending=False)
-    )
+@st.cache_data(show_spinner="Computing category summaries…")
+def all_category_aggregates(data_key: str, _df: pd.DataFrame) -> dict:
+    # Semua kategori dihitung sekali per file (key = hash isi); ganti selectbox = lookup saja
+    return category_aggregates(_df, CATEGORICAL)
+
+
+def summarize_by_category(aggs: dict, cat_col: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    agg = aggs[cat_col]
+    avg_df = agg[[cat_col, "Mean"]].rename(columns={"Mean": "Price"})
+    cnt_df = agg[[cat_col, "Count"]].sort_values("Count", ascending=False, ignore_index=True)
     return avg_df, cnt_df
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -82,12 +71,14 @@ _df_session = st.session_state.get("data_df")
 if uploaded is not None:
     try:
         data = read_csv_safely(uploaded)
+        data_key = hashlib.sha256(uploaded.getvalue()).hexdigest()
         st.success(f"File `{uploaded.name}` loaded. Rows: {len(data):,}")
     except Exception as e:
         st.error(f"Gagal baca CSV: {e}")
         st.stop()
 elif _df_session is not None:
-    data = _df_session.copy()
+    data = _df_session
+    data_key = dataset_version(data)
     st.info("Pakai data dari session (halaman lain).")
 else:
     st.info("👈 Upload CSV dulu ")
@@ -100,7 +91,6 @@ if "Price" not in data.columns:
     st.stop()
 
 # Drop baris tanpa Price atau Price non-positif (opsional)
-data = data.copy()
 price_na = data["Price"].isna().sum()
 if price_na:
     st.warning(f"{price_na:,} baris memiliki Price tidak valid dan akan diabaikan.")
@@ -140,16 +130,17 @@ st.subheader("🏷️ Category Averages (Price)")
 if available_cats:
     opt = st.selectbox("Choose a category:", available_cats, index=0)
 
+    aggs = all_category_aggregates(data_key, data)
+    avg_df, cnt_df = summarize_by_category(aggs, opt)
+
     # Batasi jumlah kategori yang divisualisasikan agar chart tetap ringan
-    nunique = data[opt].nunique(dropna=True)
+    nunique = len(avg_df)
     if nunique > 200:
         st.info(
             f"Kolom **{opt}** memiliki {nunique:,} kategori. "
             "Grafik akan menampilkan 200 kategori teratas berdasarkan rata-rata Price."
         )
 
-    avg_df, cnt_df = summarize_by_category(data, opt)
-
     # Untuk chart, batasi top-N agar tetap terbaca
     top_n = 200 if len(avg_df) > 200 else len(avg_df)
     avg_for_chart = avg_df.head(top_n)
@@ -164,7 +155,7 @@ if available_cats:
 
     # Tabel lengkap rata-rata
     st.write("### Tabel Rata-rata Price per Kategori")
-    st.dataframe(avg_df, use_container_width=True, height=360)
+    st.dataframe(aggs[opt], use_container_width=True, height=360)
 
     # Download CSV (pastikan bytes, bukan string)
     csv_bytes = avg_df.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,146 @@
+import hmac
+import os
+
+import pandas as pd
+import streamlit as st
+
+from metrics import REGISTRY, METRICS_PORT, METRICS_FILE, start_http_exporter
+from model_registry import BUILTIN_VERSION, list_versions, promote, read_state, set_shadow
+import shadow
+from warmup import start_warmup, status as warmup_status
+
+st.set_page_config(page_title="🛠️ Admin", page_icon="🛠️", layout="wide")
+st.title("🛠️ Admin: Latency & Metrics")
+
+start_http_exporter()  # no-op kecuali METRICS_PORT diset
+start_warmup()
+
+
+def _admin_token() -> str:
+    # st.secrets["admin_token"] atau env ADMIN_TOKEN; kosong → halaman read-only
+    try:
+        token = st.secrets.get("admin_token", "")
+    except Exception:  # tidak ada secrets.toml
+        token = ""
+    return str(token or os.environ.get("ADMIN_TOKEN", ""))
+
+
+def _can_change() -> bool:
+    """Registry / shadow controls only for a visitor who entered the configured token."""
+    token = _admin_token()
+    if not token:
+        return False
+    entered = st.sidebar.text_input("Admin token", type="password",
+                                    help="Required to promote versions or change shadow routing.")
+    return bool(entered) and hmac.compare_digest(entered.encode("utf-8"), token.encode("utf-8"))
+
+st.caption(
+    "Angka di halaman ini adalah agregat proses Streamlit ini (semua session). "
+    + (f"Prometheus: http://127.0.0.1:{METRICS_PORT}/metrics. " if METRICS_PORT else "")
+    + (f"Textfile: {METRICS_FILE}." if METRICS_FILE else "")
+)
+
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+# ────────────────────────────────────────────────────────────────────────────────
+# WARM-UP / READINESS
+ws = warmup_status()
+if ws["ready"]:
+    st.success(f"✅ Ready (warm-up {ws['seconds']}s)")
+elif ws["state"] == "failed":
+    st.error("❌ Warm-up failed")
+else:
+    st.info(f"⏳ Warming up… {ws['step']}")
+if ws["error"]:
+    with st.expander("Warm-up errors"):
+        st.code(ws["error"], language="text")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# MODEL REGISTRY & SHADOW
+st.subheader("📦 Model registry")
+state = read_state()
+active = state.get("active") or BUILTIN_VERSION
+versions = list_versions()
+st.write(f"Active: **{active}** (warmed up at start: {ws.get('version') or '-'}) · "
+         f"Shadow: **{state.get('shadow') or '-'}** @ {state.get('shadow_rate', 0):.0%}")
+if versions:
+    df_ver = pd.DataFrame(versions)
+    lead = [c for c in ("version", "sha256", "created", "size_bytes", "source") if c in df_ver.columns]
+    st.dataframe(df_ver[lead], use_container_width=True, hide_index=True)
+
+    if _can_change():
+        names = [m["version"] for m in versions]
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            to_promote = st.selectbox("Promote version", names, index=len(names) - 1)
+            if st.button("🚀 Promote", disabled=to_promote == active):
+                promote(to_promote)
+                st.rerun()
+        with c2:
+            candidate = st.selectbox("Shadow candidate", ["off"] + [n for n in names if n != active])
+        with c3:
+            rate = st.slider("Shadow sample rate", 0.0, 1.0, float(state.get("shadow_rate") or 0.1), 0.05)
+            if st.button("👥 Apply shadow"):
+                set_shadow(None if candidate == "off" else candidate, rate)
+                st.rerun()
+    else:
+        # app publik: tanpa token tidak ada yang bisa mengubah model untuk semua user
+        st.caption("🔒 Read-only. Promote / shadow controls need an admin token "
+                   "(`admin_token` in st.secrets or env `ADMIN_TOKEN`), or run "
+                   "`python model_registry.py promote|shadow ...` on the server.")
+else:
+    st.caption("Registry kosong: app memakai model bawaan (MODEL_URL). "
+               "Tambah versi: `python model_registry.py register <file.joblib> --version <nama>`.")
+
+shadow_rows = shadow.recent()
+if shadow_rows:
+    df_sh = pd.DataFrame(shadow_rows)
+    df_sh["latency_ratio"] = df_sh["shadow_ms"] / df_sh["live_ms"].where(df_sh["live_ms"] > 0)
+    st.dataframe(
+        df_sh.groupby(["live", "shadow"]).agg(
+            comparisons=("rows", "size"), rows=("rows", "sum"),
+            median_delta_pct=("mean_delta_ratio", lambda x: 100 * x.median()),
+            p90_delta_pct=("mean_delta_ratio", lambda x: 100 * x.quantile(0.9)),
+            median_live_ms=("live_ms", "median"), median_shadow_ms=("shadow_ms", "median"),
+            median_latency_ratio=("latency_ratio", "median"),
+        ).reset_index(),
+        use_container_width=True, hide_index=True,
+    )
+
+# ────────────────────────────────────────────────────────────────────────────────
+# LATENCY PER STAGE
+st.subheader("⏱️ Stage latency")
+stage_rows = REGISTRY.summary()
+if stage_rows:
+    df_stage = pd.DataFrame(stage_rows).drop(columns=["metric"])
+    lead = [c for c in ("page", "source", "stage", "path") if c in df_stage.columns]
+    df_stage = df_stage[lead + [c for c in df_stage.columns if c not in lead]]
+    st.dataframe(df_stage.sort_values("total_s", ascending=False), use_container_width=True)
+else:
+    st.info("Belum ada request. Lakukan prediksi di halaman Calculator dulu.")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# COUNTERS
+st.subheader("🔢 Counters")
+counter_rows = REGISTRY.counter_rows()
+if counter_rows:
+    df_cnt = pd.DataFrame(counter_rows)
+    st.dataframe(df_cnt, use_container_width=True)
+
+    fallbacks = df_cnt.loc[df_cnt["metric"] == "predict_fallback_total", "value"].sum()
+    if fallbacks:
+        st.warning(
+            f"{fallbacks:,.0f} prediksi jatuh ke fallback CatBoost `Pool` setelah pipeline gagal "
+            "(biaya request ≈ 2x). Cek schema input / versi model."
+        )
+else:
+    st.caption("Belum ada counter.")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# EXPORT
+with st.expander("Prometheus text format"):
+    text = REGISTRY.render_prometheus()
+    st.code(text, language="text")
+    st.download_button("💾 Download metrics.prom", text.encode("utf-8"),
+                       file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,76 @@
+import pandas as pd
+import streamlit as st
+
+import drift
+from metrics import start_http_exporter
+from warmup import start_warmup
+
+st.set_page_config(page_title="📡 Drift", page_icon="📡", layout="wide")
+st.title("📡 Drift & Data Quality")
+
+start_http_exporter()  # no-op kecuali METRICS_PORT diset
+start_warmup()
+
+st.caption(
+    "Fitur mobil yang di-score (Calculator, Calculator for team, background job, inference service) "
+    "dibandingkan dengan listing berharga di UsedCarsSA_Clean_EN.csv (data training). "
+    f"PSI < {drift.PSI_MODERATE} stabil, {drift.PSI_MODERATE}–{drift.PSI_MAJOR} perlu dicek, "
+    f"≥ {drift.PSI_MAJOR} bergeser besar. Angka = agregat proses ini sejak start / reset."
+)
+
+c1, c2 = st.columns([1, 1])
+with c1:
+    if st.button("🔄 Refresh"):
+        st.rerun()
+with c2:
+    if st.button("🧹 Reset live counts"):
+        drift.reset()
+        st.rerun()
+
+# ────────────────────────────────────────────────────────────────────────────────
+# STATUS
+ds = drift.status()
+if ds["state"] == "failed":
+    st.error(f"❌ Baseline tidak bisa dimuat: {ds['error']}")
+    st.stop()
+if ds["state"] == "idle" or not ds["rows"]:
+    st.info("Belum ada traffic yang di-score sejak proses start. Lakukan prediksi di halaman Calculator dulu.")
+    st.stop()
+
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Rows observed", f"{ds['rows']:,}")
+m2.metric("Baseline rows", f"{ds['baseline_rows']:,}")
+m3.metric("Queued rows", f"{ds['queued_rows']:,}", help=f"{ds['queued']} sample(s) waiting for the drift worker")
+m4.metric("Sources", ", ".join(f"{k or '-'}: {v:,}" for k, v in ds["sources"].items()))
+
+# ────────────────────────────────────────────────────────────────────────────────
+# RINGKASAN PER FITUR
+st.subheader("📊 Per feature")
+df_rep = pd.DataFrame(drift.report())
+df_rep[["missing_rate", "novelty_rate"]] *= 100
+st.dataframe(
+    df_rep,
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "psi": st.column_config.NumberColumn("PSI", format="%.3f"),
+        "missing_rate": st.column_config.NumberColumn("missing", format="%.2f%%"),
+        "novelty_rate": st.column_config.NumberColumn("unseen / out of range", format="%.2f%%"),
+        "novel_detail": st.column_config.TextColumn("top unseen / range detail"),
+    },
+)
+major = df_rep.loc[df_rep["status"] == "major", "feature"].tolist()
+if major:
+    st.warning(f"Distribusi bergeser besar (PSI ≥ {drift.PSI_MAJOR}): {', '.join(major)}. "
+               "Prediksi untuk data seperti ini kurang bisa dipercaya; pertimbangkan retrain (train.py).")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# DISTRIBUSI
+st.subheader("🔍 Baseline vs live")
+feature = st.selectbox("Feature", df_rep["feature"].tolist())
+dist = drift.distribution(feature)
+if dist is not None:
+    if len(dist) > 30:
+        # kategori banyak (Type/Make): tampilkan yang paling beda saja
+        dist = dist.assign(gap=(dist["live"] - dist["baseline"]).abs()).nlargest(30, "gap").drop(columns="gap")
+    st.bar_chart(dist.set_index("bin")[["baseline", "live"]], stack=False)
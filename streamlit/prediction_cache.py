@@ -0,0 +1,117 @@
+"""Prediction result cache keyed by normalized car spec + model SHA-256.
+
+Two tiers:
+
+* in-process LRU with TTL (shared by all Streamlit sessions via ``st.cache_resource``),
+* optional SQLite file (``PREDICTION_CACHE_DB``) shared by replicas on the same host
+  and surviving restarts.
+
+Because the model hash is part of the key, deploying a new model invalidates
+every entry without any explicit flush.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from schema import FEATURE_ORDER, CAT_COLS
+
+PREDICTION_CACHE_DB = os.environ.get("PREDICTION_CACHE_DB", "")
+DEFAULT_MAXSIZE = 50_000
+DEFAULT_TTL_S = 6 * 3600
+
+
+def normalize_spec(row: dict) -> tuple:
+    """The 11 model inputs as a hashable tuple (same coercion as ``ensure_dataframe_schema``)."""
+    out = []
+    for c in FEATURE_ORDER:
+        v = row.get(c)
+        if c in CAT_COLS:
+            out.append(None if v is None else str(v).strip())
+        else:
+            v = None if v is None else float(v)
+            out.append(int(v) if v is not None and v.is_integer() else v)
+    return tuple(out)
+
+
+def make_key(model_sha: str, row: dict) -> str:
+    return json.dumps([model_sha, *normalize_spec(row)], separators=(",", ":"))
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl_s: float = DEFAULT_TTL_S, db_path: str = ""):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._mem: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "mem_hits": 0, "disk_hits": 0, "evictions": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value REAL NOT NULL, created REAL NOT NULL)"
+            )
+            # buang entry kedaluwarsa sekali saat start
+            self._db.execute("DELETE FROM predictions WHERE created < ?", (time.time() - ttl_s,))
+
+    # ---------- LOOKUP ----------
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None and now - hit[1] <= self.ttl_s:
+                self._mem.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["mem_hits"] += 1
+                return hit[0]
+            if hit is not None:
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl_s:
+                    self._put_mem(key, row[0], row[1])
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return row[0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: float):
+        now = time.time()
+        value = float(value)
+        with self._lock:
+            self._put_mem(key, value, now)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO predictions (key, value, created) VALUES (?, ?, ?)",
+                                 (key, value, now))
+
+    def _put_mem(self, key: str, value: float, created: float):
+        self._mem[key] = (value, created)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_or_compute(self, model_sha: str, row: dict, compute):
+        """Return ``(value, hit)``; ``compute()`` only runs on a miss."""
+        key = make_key(model_sha, row)
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = float(compute())
+        self.put(key, value)
+        return value, False
+
+    # ---------- INFO ----------
+    def snapshot(self) -> dict:
+        with self._lock:
+            snap = dict(self.stats)
+            snap["size"] = len(self._mem)
+        total = snap["hits"] + snap["misses"]
+        snap["hit_rate"] = round(snap["hits"] / total, 4) if total else 0.0
+        return snap
@@ -0,0 +1,88 @@
+"""Schema coercion + predict with CatBoost fallback, usable outside Streamlit."""
+import numpy as np
+import pandas as pd
+
+from metrics import inc
+from schema import FEATURE_ORDER, CAT_COLS, MODEL_DEFAULTS, Validation, coerce_frame
+
+
+def records_to_frame(records, feature_names=FEATURE_ORDER) -> pd.DataFrame:
+    """List of dicts (e.g. JSON rows) → DataFrame in model column order."""
+    return pd.DataFrame.from_records(list(records), columns=list(feature_names))
+
+
+def ensure_dataframe_schema(df_in: pd.DataFrame, feature_names=FEATURE_ORDER, cat_cols=CAT_COLS) -> pd.DataFrame:
+    # lenient: dipakai untuk form / JSON (lihat schema.coerce_frame); upload → schema.validate_and_coerce
+    return coerce_frame(df_in, feature_names, cat_cols)
+
+
+def predict_valid(predict_fn, validation: Validation) -> np.ndarray:
+    """``predict_fn`` on the valid rows only; rows with errors get NaN."""
+    preds = np.full(len(validation.errors), np.nan)
+    valid = validation.valid
+    if valid.all():
+        preds[:] = np.asarray(predict_fn(validation.frame), dtype="float64").reshape(-1)
+    elif valid.any():
+        preds[valid] = np.asarray(predict_fn(validation.frame[valid]), dtype="float64").reshape(-1)
+    return preds
+
+
+def add_prediction_columns(out: pd.DataFrame, preds, errors: pd.Series | None = None, intervals=None) -> pd.DataFrame:
+    """``Prediction`` (rounded, empty for invalid rows), optional interval and ``Error`` columns; modifies ``out``."""
+    preds = np.asarray(preds, dtype="float64")
+    out["Prediction"] = pd.array(np.rint(preds), dtype="Int64")  # bulatkan ke integer
+    if intervals is not None:
+        intervals.add_columns(out, preds)
+    if errors is not None:
+        out["Error"] = errors.to_numpy()
+    return out
+
+
+def model_feature_names(model_obj) -> list | None:
+    """Input columns the fitted model expects (``feature_names_in_`` or CatBoost ``feature_names_``)."""
+    names = getattr(model_obj, "feature_names_in_", None)
+    if names is None:
+        est = model_obj.steps[-1][1] if hasattr(model_obj, "steps") else model_obj
+        est = getattr(est, "regressor_", est)
+        names = getattr(est, "feature_names_", None)
+    return list(names) if names is not None else None
+
+
+def with_model_defaults(df: pd.DataFrame, model_obj) -> pd.DataFrame:
+    """Add the model-only features (``MODEL_DEFAULTS``) the input lacks, in the model's column order."""
+    expected = model_feature_names(model_obj)
+    if not expected:
+        return df
+    missing = [c for c in expected if c not in df.columns and c in MODEL_DEFAULTS]
+    if not missing:
+        return df
+    df = df.assign(**{c: MODEL_DEFAULTS[c] for c in missing})
+    return df[[c for c in expected if c in df.columns]]
+
+
+def predict_safely(model_obj, df_pred: pd.DataFrame, feature_names=None, cat_cols=CAT_COLS,
+                   thread_count: int | None = None) -> np.ndarray:
+    """Pipeline ``predict``, falling back to a CatBoost ``Pool``.
+
+    ``thread_count`` is passed through to CatBoost's ``predict`` (via
+    Pipeline / TransformedTargetRegressor predict params) on both paths;
+    ``None`` keeps CatBoost's default (all cores).
+    """
+    df_pred = with_model_defaults(df_pred, model_obj)
+    kw = {} if thread_count is None else {"thread_count": thread_count}
+    try:
+        preds = model_obj.predict(df_pred, **kw)
+    except Exception:
+        # fallback CatBoost murni (≈ 2x biaya request → dihitung)
+        inc("predict_fallback_total", path="catboost_pool", source="predictor")
+        try:
+            from catboost import Pool
+        except ImportError as ie:
+            raise RuntimeError("Model kemungkinan CatBoost. Install dulu: pip install catboost") from ie
+        cat_in_df = [c for c in list(cat_cols) + list(MODEL_DEFAULTS) if c in df_pred.columns]
+        names = list(feature_names or df_pred.columns)
+        if len(names) != df_pred.shape[1]:
+            names = list(df_pred.columns)  # kolom default ikut ditambahkan di atas
+        pool = Pool(df_pred, cat_features=cat_in_df, feature_names=names)
+        preds = model_obj.predict(pool, **kw)
+    return np.asarray(preds, dtype="float64").reshape(-1)
@@ -0,0 +1,134 @@
+"""Process-wide resources shared by every page (``st.cache_resource``).
+
+Defined once here so the Calculator pages, the Admin page and the warm-up
+hook (warmup.py) hit the same cache entries: the model is unpickled once per
+process instead of once per page.
+
+The hot path only needs the compiled scorer, which comes from the slim native
+artifact (fast_scorer.py) when one exists for the model's SHA-256; the sklearn
+pipeline is unpickled lazily, for the fallback paths only.
+"""
+import pandas as pd
+import streamlit as st
+
+from comparables import ComparablesIndex, load_or_build_comparables_index
+from dataset_store import load_dataset
+from explain import Explanation, explain_frame
+from fast_scorer import load_or_export_compiled
+from inference_client import health
+from intervals import IntervalTable, load_or_build_interval_table
+from metrics import span
+from model_registry import active_ref
+from model_store import CACHE_DIR, load_model, resolve_model_artifact
+from options_index import OptionsIndex, load_or_build_options_index
+from prediction_cache import PredictionCache
+
+
+@st.cache_resource(show_spinner="Loading dataset…")
+def load_dataset_cached() -> pd.DataFrame:
+    # frame compact (category/int sempit) dari cache Parquet; read-only, dipakai bersama semua session
+    return load_dataset()
+
+
+# max_entries: model aktif + versi sebelumnya (request yang masih jalan saat promote) + cadangan
+@st.cache_resource(show_spinner=False, max_entries=3)
+def resolve_model_cached(url: str, expected_sha256: str, cache_dir: str = "") -> tuple[str, str]:
+    # file lokal / cache sha256 dulu, download hanya kalau keduanya tidak ada → (path, sha256)
+    with span("model_resolve"):
+        path, sha = resolve_model_artifact(url, expected_sha256, cache_dir=cache_dir or CACHE_DIR)
+    return str(path), sha
+
+
+@st.cache_resource(show_spinner="Loading model into memory…", max_entries=3)
+def load_model_cached(url: str, expected_sha256: str, cache_dir: str = ""):
+    # pipeline sklearn lengkap → (model, sha256); hanya untuk fallback / halaman yang butuh
+    path, sha = resolve_model_cached(url, expected_sha256, cache_dir)
+    with span("model_load"):
+        return load_model(path), sha
+
+
+@st.cache_resource(show_spinner="Loading model…", max_entries=3)
+def load_compiled_scorer(url: str, expected_sha256: str, cache_dir: str = ""):
+    # CatBoost native tanpa pandas/sklearn; None kalau bentuk pipeline tidak didukung
+    _, sha = resolve_model_cached(url, expected_sha256, cache_dir)
+    with span("model_load", kind="compiled"):
+        return load_or_export_compiled(sha, lambda: load_model_cached(url, expected_sha256, cache_dir)[0])
+
+
+def active_model_sha():
+    """``(sha256, ModelRef)`` of the registry's active version, without unpickling anything.
+
+    Not cached itself: the registry state is re-read (one ``stat``) on every
+    call, so a ``promote`` takes effect on the next rerun without a restart.
+    """
+    ref = active_ref()
+    _, sha = resolve_model_cached(ref.url, ref.sha256, ref.cache_dir)
+    return sha, ref
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def remote_model_sha(url: str) -> str:
+    """sha256 of the model the inference service serves, re-read at most every 30 s.
+
+    Keys caches (intervals, sweeps, jobs) without a ``/health`` round-trip per
+    request; a model swap on the server shows up within the TTL. Errors are
+    raised, not cached, so a key never silently degrades to the URL.
+    """
+    sha = health(url).get("model_sha256")
+    if not sha:
+        raise RuntimeError(f"Inference service {url} did not report model_sha256")
+    return sha
+
+
+def frame_predictor(ref):
+    """``X -> prices`` for whole frames (interval calibration): compiled scorer, else the pipeline."""
+    def _predict(X):
+        scorer = load_compiled_scorer(ref.url, ref.sha256, ref.cache_dir)
+        if scorer is not None:
+            try:
+                return scorer.predict_frame(X)
+            except (KeyError, TypeError, ValueError):
+                pass
+        from predictor import predict_safely
+
+        model, _ = load_model_cached(ref.url, ref.sha256, ref.cache_dir)
+        return predict_safely(model, X)
+    return _predict
+
+
+def frame_explainer(ref):
+    """``X -> Explanation`` (native CatBoost SHAP); needs the compiled scorer, the pipeline has no fallback."""
+    def _explain(X) -> Explanation:
+        scorer = load_compiled_scorer(ref.url, ref.sha256, ref.cache_dir)
+        if scorer is None:
+            raise ValueError("Explanations need a pipeline shape supported by the compiled scorer.")
+        with span("explain", kind="single" if len(X) == 1 else "batch"):
+            return explain_frame(scorer, X)
+    return _explain
+
+
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache(db_path: str) -> PredictionCache:
+    # satu instance untuk semua session; key = sha256 model + spec mobil
+    return PredictionCache(db_path=db_path)
+
+
+@st.cache_resource(show_spinner="Indexing form options…")
+def get_options_index() -> OptionsIndex:
+    # dibangun sekali per versi dataset, dipersist sebagai JSON kecil
+    return load_or_build_options_index(load_dataset_cached())
+
+
+@st.cache_resource(show_spinner="Indexing comparable listings…")
+def get_comparables_index() -> ComparablesIndex:
+    # listing berharga per Make/Type, dipersist sebagai .npz per versi dataset
+    return load_or_build_comparables_index(load_dataset_cached())
+
+
+@st.cache_resource(show_spinner="Calibrating price intervals…")
+def get_interval_table(model_sha: str, _predict_fn) -> IntervalTable | None:
+    # quantile residual conformal per (Make, bucket Year), dipersist per model + dataset
+    try:
+        return load_or_build_interval_table(load_dataset_cached(), _predict_fn, model_sha)
+    except Exception:
+        return None  # mis. sklearn tidak tersedia → pita ±18% lama / tanpa kolom interval
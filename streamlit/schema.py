@@ -0,0 +1,142 @@
+"""Feature schema shared by pages, services and CLI tools.
+
+Single source for column order, model dtypes, allowed vocabularies and numeric
+sanity ranges, plus the coercion used everywhere a frame goes into the model:
+
+* ``coerce_frame``        lenient (single rows / JSON): reindex + cast, no checks
+* ``validate_and_coerce`` strict (uploads): cast and validate in one pass over
+  each column → model-ready frame + per-row error bitmask
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Urutan fitur FINAL yang dipakai model (harus cocok dengan training)
+FEATURE_ORDER = [
+    "Make", "Type", "Year", "Origin", "Color", "Options",
+    "Engine_Size", "Fuel_Type", "Gear_Type", "Mileage", "Region",
+]
+CAT_COLS = ["Make", "Type", "Origin", "Color", "Options", "Fuel_Type", "Gear_Type", "Region"]
+NUM_COLS = ["Year", "Engine_Size", "Mileage"]
+
+# Fitur model yang tidak ditanya form/upload → nilai tetap. Semua listing berharga
+# di data training punya Negotiable=False (listing "negotiable" tidak punya Price).
+MODEL_DEFAULTS = {"Negotiable": "False"}
+
+# dtype frame yang masuk model
+CAT_DTYPE = "string"
+NUM_DTYPE = "float64"
+
+# Kolom dengan nilai tetap (dari UsedCarsSA_Clean_EN.csv). Make/Type/Region
+# sengaja terbuka: nilai baru tetap bisa di-score (CatBoost: kategori tak dikenal).
+VOCAB = {
+    "Origin": ["Gulf Arabic", "Other", "Saudi", "Unknown"],
+    "Color": ["Another Color", "Black", "Blue", "Bronze", "Brown", "Golden", "Green", "Grey",
+              "Navy", "Oily", "Orange", "Red", "Silver", "White", "Yellow"],
+    "Options": ["Full", "Semi Full", "Standard"],
+    "Fuel_Type": ["Diesel", "Gas", "Hybrid"],
+    "Gear_Type": ["Automatic", "Manual"],
+}
+
+# Batas kewajaran (inklusif) untuk upload; batas form Calculator lebih sempit, lihat options_index.py
+NUM_RANGES = {
+    "Year": (1950, 2030),
+    "Engine_Size": (0.5, 10.0),
+    "Mileage": (0, 20_000_000),
+}
+
+# bit i: kolom FEATURE_ORDER[i] kosong / tidak bisa dibaca
+# bit 16 + i: nilai di luar NUM_RANGES / tidak ada di VOCAB
+_MISSING_BIT = {c: np.uint32(1 << i) for i, c in enumerate(FEATURE_ORDER)}
+_INVALID_BIT = {c: np.uint32(1 << (16 + i)) for i, c in enumerate(FEATURE_ORDER)}
+
+
+def _coerce_cat(s: pd.Series) -> pd.Series:
+    return s.astype(CAT_DTYPE).str.strip()
+
+
+def _coerce_num(s: pd.Series) -> np.ndarray:
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=NUM_DTYPE, na_value=np.nan)
+
+
+def coerce_frame(df: pd.DataFrame, feature_names=FEATURE_ORDER, cat_cols=CAT_COLS) -> pd.DataFrame:
+    """Reindex to ``feature_names`` and cast (absent columns become missing values)."""
+    cols = {}
+    for c in feature_names:
+        if c not in df.columns:
+            cols[c] = (pd.Series(pd.NA, index=df.index, dtype=CAT_DTYPE) if c in cat_cols
+                       else pd.Series(np.nan, index=df.index, dtype=NUM_DTYPE))
+        elif c in cat_cols:
+            cols[c] = _coerce_cat(df[c])
+        elif c in NUM_COLS:
+            cols[c] = _coerce_num(df[c])
+        else:
+            cols[c] = df[c]
+    return pd.DataFrame(cols, index=df.index, columns=list(feature_names))
+
+
+@dataclass(frozen=True)
+class Validation:
+    frame: pd.DataFrame  # model-ready, FEATURE_ORDER
+    errors: np.ndarray   # uint32 bitmask per row, 0 = valid
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.errors == 0
+
+    @property
+    def n_invalid(self) -> int:
+        return int(np.count_nonzero(self.errors))
+
+    def messages(self) -> pd.Series:
+        """Per-row text such as ``"Year: missing; Color: unknown value"`` ("" if valid)."""
+        return error_messages(self.errors, self.frame.index)
+
+
+def error_messages(errors: np.ndarray, index=None) -> pd.Series:
+    out = np.full(len(errors), "", dtype=object)
+    bad = np.flatnonzero(errors)
+    if len(bad):
+        e = errors[bad]
+        parts = np.full(len(bad), "", dtype=object)
+        for c in FEATURE_ORDER:
+            problem = "out of range" if c in NUM_COLS else "unknown value"
+            for bit, text in ((_MISSING_BIT[c], f"{c}: missing"), (_INVALID_BIT[c], f"{c}: {problem}")):
+                hit = (e & bit) != 0
+                if hit.any():
+                    parts[hit] = parts[hit] + np.where(parts[hit] == "", "", "; ") + text
+        out[bad] = parts
+    return pd.Series(out, index=index, dtype=object)
+
+
+def validate_and_coerce(df: pd.DataFrame, vocab=VOCAB, ranges=NUM_RANGES) -> Validation:
+    """Cast every feature column once and flag bad rows instead of filling them.
+
+    Missing *columns* raise ``RuntimeError`` (the upload is unusable); bad
+    *values* only mark their row in ``errors``. Numeric NaN stays NaN.
+    """
+    missing = [c for c in FEATURE_ORDER if c not in df.columns]
+    if missing:
+        raise RuntimeError(f"Dataset missing required columns: {', '.join(missing)}")
+
+    errors = np.zeros(len(df), dtype=np.uint32)
+    cols = {}
+    for c in FEATURE_ORDER:
+        if c in CAT_COLS:
+            s = _coerce_cat(df[c])
+            empty = (s.isna() | (s == "")).to_numpy(dtype=bool, na_value=True)
+            errors[empty] |= _MISSING_BIT[c]
+            if c in vocab:
+                unknown = ~s.isin(vocab[c]).to_numpy(dtype=bool, na_value=False) & ~empty
+                errors[unknown] |= _INVALID_BIT[c]
+            cols[c] = s
+        else:
+            x = _coerce_num(df[c])
+            nan = np.isnan(x)
+            errors[nan] |= _MISSING_BIT[c]
+            if c in ranges:
+                lo, hi = ranges[c]
+                errors[~nan & ((x < lo) | (x > hi))] |= _INVALID_BIT[c]
+            cols[c] = x
+    return Validation(frame=pd.DataFrame(cols, index=df.index, columns=FEATURE_ORDER), errors=errors)
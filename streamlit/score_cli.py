@@ -0,0 +1,191 @@
+"""Batch scoring from the command line, sharded across a process pool.
+
+Each worker loads the joblib pipeline once (pool initializer) and scores
+shards of ``--chunk-rows`` rows with the same schema/fallback logic as the
+"Calculator for team" page. Results are written in input order, with at most
+``2 * workers`` shards in flight so memory stays bounded.
+
+    python score_cli.py inventory.csv predictions.csv --workers 8
+    python score_cli.py inventory.parquet predictions.parquet
+    python score_cli.py inventory.csv predictions.csv --intervals intervals.json
+
+Parquet input/output needs ``pyarrow``.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from batch_stream import READ_DTYPES
+from predictor import add_prediction_columns, predict_safely, predict_valid
+from schema import FEATURE_ORDER, error_messages, validate_and_coerce
+
+DEFAULT_CHUNK_ROWS = 20_000
+
+# ====== WORKER ======
+_MODEL = None
+_SCORER = None
+_THREADS = 1
+_MISS = ""  # alasan compiled path tidak dipakai di worker ini ("" = dipakai)
+
+
+def _init_worker(url: str, expected_sha256: str, threads: int):
+    global _MODEL, _SCORER, _THREADS, _MISS
+    from fast_scorer import CompiledScorer
+    from model_store import load_model_artifact
+
+    _MODEL, _ = load_model_artifact(url, expected_sha256)
+    _THREADS = threads
+    try:
+        _SCORER = CompiledScorer.from_pipeline(_MODEL)
+    except ValueError as e:
+        _SCORER, _MISS = None, f"unsupported pipeline: {e}"
+
+
+def _predict(X: pd.DataFrame) -> np.ndarray:
+    global _MISS
+    if _SCORER is not None:
+        try:
+            # thread_count eksplisit supaya N worker tidak saling rebutan core
+            return _SCORER.predict_frame(X, thread_count=_THREADS)
+        except (KeyError, TypeError, ValueError) as e:
+            _MISS = f"{type(e).__name__}: {e}"
+    # fallback juga dibatasi ke _THREADS (default CatBoost = semua core per worker)
+    return predict_safely(_MODEL, X, thread_count=_THREADS)
+
+
+def _score_chunk(chunk: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, str]:
+    """(predictions, error bitmask, compiled-path miss reason); rows with errors are not scored (NaN)."""
+    v = validate_and_coerce(chunk)
+    return predict_valid(_predict, v), v.errors, _MISS
+
+
+# ====== IO ======
+def _is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in (".parquet", ".pq")
+
+
+def iter_input(path: Path, chunk_rows: int):
+    if _is_parquet(path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as ie:
+            raise RuntimeError("Parquet input butuh pyarrow: pip install pyarrow") from ie
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=READ_DTYPES):
+            chunk.columns = [c.strip() for c in chunk.columns]
+            yield chunk
+
+
+class _Writer:
+    def __init__(self, path: Path):
+        self.path = path
+        self._parquet = _is_parquet(path)
+        self._pq_writer = None
+        self._fh = None if self._parquet else open(path, "w", encoding="utf-8", newline="")
+        self._first = True
+
+    def write(self, df: pd.DataFrame):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self.path, table.schema)
+            self._pq_writer.write_table(table)
+        else:
+            df.to_csv(self._fh, header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+        if self._fh is not None:
+            self._fh.close()
+
+
+# ====== DRIVER ======
+def score_file(input_path, output_path, workers: int | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+               threads_per_worker: int = 1, url: str | None = None, expected_sha256: str | None = None,
+               log=print, intervals=None) -> int:
+    from model_store import MODEL_URL, EXPECTED_SHA256
+
+    input_path, output_path = Path(input_path), Path(output_path)
+    workers = workers or os.cpu_count() or 1
+    url = MODEL_URL if url is None else url
+    expected_sha256 = EXPECTED_SHA256 if expected_sha256 is None else expected_sha256
+
+    writer = _Writer(output_path)
+    pending: deque = deque()
+    rows = 0
+    warned = False
+    t0 = time.perf_counter()
+
+    def _drain_one():
+        nonlocal rows, warned
+        chunk, fut = pending.popleft()
+        preds, errors, miss = fut.result()
+        if miss and not warned:
+            # sekali per run, bukan per chunk
+            log(f"Compiled scorer not used ({miss}); scoring through the sklearn pipeline "
+                f"with thread_count={threads_per_worker} per worker.")
+            warned = True
+        add_prediction_columns(chunk, preds, error_messages(errors, chunk.index), intervals)
+        writer.write(chunk)
+        rows += len(chunk)
+        log(f"  {rows:,} rows scored ({rows / (time.perf_counter() - t0):,.0f} rows/s)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(url, expected_sha256, threads_per_worker)) as pool:
+            for chunk in iter_input(input_path, chunk_rows):
+                missing = [c for c in FEATURE_ORDER if c not in chunk.columns]
+                if missing:
+                    raise RuntimeError(f"Dataset missing required columns: {', '.join(missing)}")
+                pending.append((chunk, pool.submit(_score_chunk, chunk)))
+                # urutan output = urutan input: tulis shard terdepan dulu
+                if len(pending) >= 2 * workers:
+                    _drain_one()
+            while pending:
+                _drain_one()
+    finally:
+        writer.close()
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Score a CSV/Parquet file with the CatBoost pipeline")
+    ap.add_argument("input", help="input .csv or .parquet (kolom sesuai FEATURE_ORDER)")
+    ap.add_argument("output", help="output .csv or .parquet (input columns + Prediction + Error)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    ap.add_argument("--threads-per-worker", type=int, default=1)
+    ap.add_argument("--intervals", help="IntervalTable JSON (python intervals.py --out ...) "
+                                        "→ adds Prediction_Low / Prediction_High")
+    ap.add_argument("--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    intervals = None
+    if args.intervals:
+        from intervals import IntervalTable
+        intervals = IntervalTable.from_json(Path(args.intervals).read_text(encoding="utf-8"))
+
+    log = (lambda *_: None) if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+    t0 = time.perf_counter()
+    rows = score_file(args.input, args.output, args.workers, args.chunk_rows,
+                      args.threads_per_worker, log=log, intervals=intervals)
+    dt = time.perf_counter() - t0
+    print(f"Scored {rows:,} rows in {dt:,.1f}s → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
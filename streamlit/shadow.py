@@ -0,0 +1,131 @@
+"""Shadow scoring: compare a candidate model with the live one on real traffic.
+
+When model_registry.py has a shadow version, ``submit`` samples
+``shadow_rate`` of the calls, and a single background worker re-scores those
+rows with the candidate after the response has already gone out. The request
+path only pays for a ``random()`` and a queue put; when the worker falls
+behind (``SHADOW_MAX_PENDING``) samples are dropped, not queued.
+
+Per comparison we record
+
+* ``carprice_stage_seconds{stage="shadow_predict", version=...}`` (candidate latency)
+* ``carprice_shadow_latency_ratio``  candidate / live latency
+* ``carprice_shadow_price_delta_ratio``  ``|candidate - live| / live`` per row
+* a JSON line in ``SHADOW_LOG`` and an in-memory ring for the Admin page.
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from metrics import REGISTRY, inc, span
+from model_registry import REGISTRY_DIR, ModelRef, shadow_ref
+
+SHADOW_MAX_PENDING = int(os.environ.get("SHADOW_MAX_PENDING", "8"))
+SHADOW_LOG = os.environ.get("SHADOW_LOG", str(REGISTRY_DIR / "shadow_log.jsonl"))
+RECENT = 500
+
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+_pending = threading.BoundedSemaphore(SHADOW_MAX_PENDING)
+_recent: deque = deque(maxlen=RECENT)
+_loaded: dict = {}  # ModelRef → (model, scorer); cuma kandidat terakhir yang disimpan
+
+
+def _load(ref: ModelRef):
+    with _lock:
+        hit = _loaded.get(ref)
+    if hit is not None:
+        return hit
+    from fast_scorer import CompiledScorer
+
+    model, _ = ref.load()
+    try:
+        scorer = CompiledScorer.from_pipeline(model)
+    except ValueError:
+        scorer = None
+    with _lock:
+        _loaded.clear()
+        _loaded[ref] = (model, scorer)
+    return model, scorer
+
+
+def _predict(model, scorer, X):
+    import pandas as pd
+    from predictor import predict_safely, records_to_frame
+    from schema import coerce_frame
+
+    X = coerce_frame(X if isinstance(X, pd.DataFrame) else records_to_frame(X))
+    if scorer is not None:
+        try:
+            return scorer.predict_frame(X)
+        except (KeyError, TypeError, ValueError):
+            pass
+    return predict_safely(model, X)
+
+
+def _compare(ref: ModelRef, X, live, live_seconds: float, live_version: str, source: str):
+    try:
+        model, scorer = _load(ref)
+        t0 = time.perf_counter()
+        with span("shadow_predict", version=ref.version):
+            cand = np.asarray(_predict(model, scorer, X), dtype="float64").reshape(-1)
+        seconds = time.perf_counter() - t0
+        live = np.asarray(live, dtype="float64").reshape(-1)
+        delta = np.abs(cand - live) / np.clip(np.abs(live), 1.0, None)
+        for d in delta[np.isfinite(delta)]:
+            REGISTRY.observe("shadow_price_delta_ratio", float(d), version=ref.version)
+        if live_seconds > 0:
+            REGISTRY.observe("shadow_latency_ratio", seconds / live_seconds, version=ref.version)
+        inc("shadow_rows_total", len(cand), version=ref.version)
+        record = {
+            "ts": time.time(), "source": source, "live": live_version, "shadow": ref.version,
+            "rows": int(len(cand)), "live_ms": round(live_seconds * 1000, 3), "shadow_ms": round(seconds * 1000, 3),
+            "mean_abs_delta": float(np.nanmean(np.abs(cand - live))) if len(cand) else 0.0,
+            "mean_delta_ratio": float(np.nanmean(delta)) if len(cand) else 0.0,
+        }
+        with _lock:
+            _recent.append(record)
+        if SHADOW_LOG:
+            try:
+                Path(SHADOW_LOG).parent.mkdir(parents=True, exist_ok=True)
+                with open(SHADOW_LOG, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError:
+                pass
+    except Exception:
+        inc("shadow_errors_total", version=ref.version)
+    finally:
+        _pending.release()
+
+
+def submit(X, live_preds, live_seconds: float, live_version: str, source: str = "") -> bool:
+    """Maybe shadow-score ``X`` (feature frame or list of row dicts); returns whether it was queued.
+
+    ``live_preds`` / ``live_seconds`` are what the live model answered and how
+    long it took, so the comparison is done entirely in the background.
+    """
+    shadow = shadow_ref()
+    if shadow is None:
+        return False
+    ref, rate = shadow
+    if random.random() >= rate:
+        return False
+    if not _pending.acquire(blocking=False):
+        inc("shadow_dropped_total", version=ref.version)
+        return False
+    _executor.submit(_compare, ref, X.copy(), np.array(live_preds, dtype="float64"),
+                     live_seconds, live_version, source)
+    return True
+
+
+def recent() -> list[dict]:
+    """Latest comparisons (newest last), for the Admin page."""
+    with _lock:
+        return list(_recent)
@@ -0,0 +1,289 @@
+"""Scripted, parallel retraining of ``best_catboost_pipeline.joblib``.
+
+Replaces the notebook flow (serial ``RandomizedSearchCV`` over ``pipeline_2``):
+
+* same data prep and split as gamma_final.ipynb (Price > 0, ``dropna``,
+  ``train_test_split(test_size=0.2, random_state=0)``, see intervals.py),
+* K-fold CV on the training part; the prepared frame + fold ids are cached on
+  disk per data version and every worker builds its CatBoost ``Pool``\\s once,
+* random search + successive halving on the iteration budget: every candidate
+  gets a short budget, only the best ``1/eta`` go on with ``eta×`` more
+  iterations; each fit early-stops on its validation fold,
+* (candidate, fold) fits run in a process pool with an explicit
+  ``thread_count`` per fit, so ``workers × threads`` matches the cores,
+* optional wall-clock budget: no new rung is started after ``--time-budget-s``.
+
+The winner is refit on the whole training part with the same
+``Pipeline([("logtransform_model", TransformedTargetRegressor(CatBoostRegressor))])``
+shape as the shipped artifact, scored on the test part, and written together
+with ``feature_names.json``, ``cat_cols.json`` and ``training_report.json``
+(``--register`` also adds it to model_registry.py as a new version).
+
+    python train.py --out-dir artifacts --candidates 27 --workers 4 --threads-per-worker 2
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import dataset_version, load_dataset
+from intervals import HOLDOUT_SIZE, HOLDOUT_SEED
+from model_store import MODEL_FILENAME, sha256_file
+from schema import FEATURE_ORDER, CAT_COLS
+
+TRAIN_CACHE_DIR = Path(os.environ.get("TRAIN_CACHE_DIR", Path.home() / ".cache" / "carprice" / "train"))
+
+# fitur training = 11 fitur form + Negotiable (sama dengan pipeline_2 di notebook)
+TRAIN_FEATURES = FEATURE_ORDER + ["Negotiable"]
+TRAIN_CAT_COLS = CAT_COLS + ["Negotiable"]
+TARGET = "Price"
+
+BASE_PARAMS = {"loss_function": "MAE", "random_seed": 42, "verbose": 0, "allow_writing_files": False}
+MAX_ITERATIONS = 1000
+EARLY_STOPPING_ROUNDS = 50
+MIN_RUNG_ITERATIONS = 50
+DEFAULT_FOLDS = 3
+DEFAULT_CANDIDATES = 27
+DEFAULT_ETA = 3
+FOLD_SEED = 42
+
+
+# ====== DATA ======
+def prepare_training_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Notebook cleaning: numeric Price > 0, no missing values, categoricals as str."""
+    d = df[TRAIN_FEATURES + [TARGET]].copy()
+    d[TARGET] = pd.to_numeric(d[TARGET], errors="coerce")
+    d = d[d[TARGET] > 0].dropna()
+    for c in TRAIN_CAT_COLS:
+        d[c] = d[c].astype(str)
+    return d
+
+
+def split_train_test(d: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(d, test_size=HOLDOUT_SIZE, random_state=HOLDOUT_SEED)
+
+
+def cache_folds(train: pd.DataFrame, n_folds: int, cache_dir=TRAIN_CACHE_DIR) -> Path:
+    """Persist the prepared training frame + fold ids once per (data, n_folds)."""
+    out = Path(cache_dir) / f"{dataset_version(train)[:16]}_k{n_folds}"
+    frame, folds = out / "train.parquet", out / "folds.npy"
+    if not folds.exists():  # folds.npy ditulis terakhir → ada berarti lengkap
+        out.mkdir(parents=True, exist_ok=True)
+        train.reset_index(drop=True).to_parquet(frame, index=False)
+        fold_id = np.random.default_rng(FOLD_SEED).permutation(len(train)) % n_folds
+        np.save(folds, fold_id.astype("int8"))
+    return out
+
+
+# ====== SEARCH SPACE ======
+def sample_params(rng) -> dict:
+    """One draw from the notebook's ``param_distributions`` (minus iterations, see halving)."""
+    params = {
+        "learning_rate": float(rng.uniform(0.01, 0.21)),
+        "depth": int(rng.integers(4, 10)),
+        "l2_leaf_reg": float(rng.uniform(1, 11)),
+        # bagging_temperature hanya berlaku untuk bootstrap Bayesian
+        "bootstrap_type": "Bayesian",
+        "bagging_temperature": float(rng.uniform(0, 1)),
+        "grow_policy": str(rng.choice(["SymmetricTree", "Depthwise", "Lossguide"])),
+    }
+    # Ordered boosting hanya didukung untuk SymmetricTree
+    params["boosting_type"] = (str(rng.choice(["Plain", "Ordered"]))
+                               if params["grow_policy"] == "SymmetricTree" else "Plain")
+    return params
+
+
+def rung_budgets(n_candidates: int, eta: int, max_iterations: int) -> list[int]:
+    """Iteration budget per rung, e.g. 27 candidates, eta 3 → [50, 111, 333, 1000]."""
+    n_rungs = int(math.floor(math.log(max(n_candidates, 1), eta) + 1e-9)) + 1
+    return [max(MIN_RUNG_ITERATIONS, int(max_iterations / eta ** (n_rungs - 1 - r))) for r in range(n_rungs)]
+
+
+# ====== WORKER ======
+_POOLS = None
+_THREADS = 1
+
+
+def _init_worker(cache: str, threads: int):
+    global _POOLS, _THREADS
+    from catboost import Pool
+
+    d = pd.read_parquet(Path(cache) / "train.parquet")
+    fold_id = np.load(Path(cache) / "folds.npy")
+    X, y = d[TRAIN_FEATURES], d[TARGET].to_numpy(dtype="float64")
+    _POOLS = []
+    for k in range(int(fold_id.max()) + 1):
+        tr, va = fold_id != k, fold_id == k
+        _POOLS.append((Pool(X.loc[tr], np.log1p(y[tr]), cat_features=TRAIN_CAT_COLS),
+                       Pool(X.loc[va], np.log1p(y[va]), cat_features=TRAIN_CAT_COLS),
+                       y[va]))
+    _THREADS = threads
+
+
+def _fit_fold(params: dict, fold: int, iterations: int) -> tuple[float, int]:
+    """MAE in SAR on the validation fold + best iteration (early stopping)."""
+    from catboost import CatBoostRegressor
+
+    train_pool, valid_pool, y_valid = _POOLS[fold]
+    model = CatBoostRegressor(**BASE_PARAMS, **params, iterations=iterations,
+                              thread_count=_THREADS, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    model.fit(train_pool, eval_set=valid_pool, use_best_model=True)
+    mae = float(np.mean(np.abs(y_valid - np.expm1(model.predict(valid_pool)))))
+    best = model.get_best_iteration()
+    return mae, (iterations - 1 if best is None else int(best))
+
+
+# ====== DRIVER ======
+def search(cache: Path, n_candidates: int = DEFAULT_CANDIDATES, n_folds: int = DEFAULT_FOLDS,
+           eta: int = DEFAULT_ETA, max_iterations: int = MAX_ITERATIONS, workers: int = 1,
+           threads_per_worker: int = 1, time_budget_s: float | None = None, seed: int = 42, log=print):
+    """Successive halving over random candidates → ``(params, cv_mae, iterations, history)``."""
+    rng = np.random.default_rng(seed)
+    candidates = [sample_params(rng) for _ in range(n_candidates)]
+    alive = list(range(n_candidates))
+    history, best = [], None
+    t0 = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(cache), threads_per_worker)) as pool:
+        for rung, budget in enumerate(rung_budgets(n_candidates, eta, max_iterations)):
+            if best is not None and time_budget_s and time.perf_counter() - t0 > time_budget_s:
+                log(f"Time budget reached before rung {rung}; keeping the best candidate so far.")
+                break
+            futs = {(c, k): pool.submit(_fit_fold, candidates[c], k, budget)
+                    for c in alive for k in range(n_folds)}
+            scores = {}
+            for c in alive:
+                try:
+                    res = [futs[(c, k)].result() for k in range(n_folds)]
+                except Exception as e:  # kombinasi param tidak valid → gugur
+                    log(f"  candidate {c} failed: {e}")
+                    scores[c] = (math.inf, budget)
+                    continue
+                scores[c] = (float(np.mean([r[0] for r in res])), int(np.mean([r[1] for r in res])) + 1)
+                history.append({"rung": rung, "budget": budget, "candidate": c, "cv_mae": scores[c][0],
+                                "best_iteration": scores[c][1], **candidates[c]})
+
+            alive.sort(key=lambda c: scores[c][0])
+            if math.isfinite(scores[alive[0]][0]):
+                best = (alive[0], *scores[alive[0]])
+            log(f"rung {rung}: {len(alive)} candidates × {n_folds} folds @ {budget} it → "
+                f"best CV MAE {scores[alive[0]][0]:,.0f} ({time.perf_counter() - t0:,.0f}s)")
+            alive = alive[:max(1, len(alive) // eta)]
+
+    if best is None:
+        raise RuntimeError("Semua kandidat gagal di-fit; cek versi catboost / data.")
+    c, cv_mae, iterations = best
+    return candidates[c], cv_mae, iterations, history
+
+
+def build_pipeline(params: dict, iterations: int, thread_count: int = -1):
+    from catboost import CatBoostRegressor
+    from sklearn.compose import TransformedTargetRegressor
+    from sklearn.pipeline import Pipeline
+
+    regressor = CatBoostRegressor(**BASE_PARAMS, **params, iterations=iterations,
+                                  thread_count=thread_count, cat_features=TRAIN_CAT_COLS)
+    return Pipeline(steps=[
+        ("logtransform_model", TransformedTargetRegressor(regressor=regressor, func=np.log1p, inverse_func=np.expm1)),
+    ])
+
+
+def evaluate(y_true, y_pred) -> dict:
+    y_true, y_pred = np.asarray(y_true, dtype="float64"), np.asarray(y_pred, dtype="float64")
+    resid = y_true - y_pred
+    return {"mae": float(np.mean(np.abs(resid))),
+            "mape": float(np.mean(np.abs(resid) / y_true)),
+            "r2": float(1 - np.sum(resid ** 2) / np.sum((y_true - y_true.mean()) ** 2))}
+
+
+def write_artifacts(pipeline, out_dir, report: dict) -> Path:
+    import joblib
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / MODEL_FILENAME
+    joblib.dump(pipeline, path)
+    (out_dir / "feature_names.json").write_text(json.dumps(TRAIN_FEATURES), encoding="utf-8")
+    (out_dir / "cat_cols.json").write_text(json.dumps(TRAIN_CAT_COLS), encoding="utf-8")
+    report["artifact"] = {"path": str(path), "sha256": sha256_file(path)}
+    (out_dir / "training_report.json").write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    ap = argparse.ArgumentParser(description="Retrain the CatBoost pipeline (parallel random search + halving)")
+    ap.add_argument("--out-dir", default="artifacts", help="where the joblib + metadata JSON are written")
+    ap.add_argument("--csv", help="training CSV (default: UsedCarsSA_Clean_EN.csv via dataset_store)")
+    ap.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES)
+    ap.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    ap.add_argument("--eta", type=int, default=DEFAULT_ETA, help="halving factor")
+    ap.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+    ap.add_argument("--threads-per-worker", type=int, default=2)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: cores / threads-per-worker)")
+    ap.add_argument("--time-budget-s", type=float, default=None)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--register", metavar="VERSION", nargs="?", const="",
+                    help="also add the artifact to the model registry (optionally under VERSION)")
+    args = ap.parse_args(argv)
+
+    log = lambda msg: print(msg, file=sys.stderr)  # noqa: E731
+    workers = args.workers or max(1, cores // args.threads_per_worker)
+    t0 = time.perf_counter()
+
+    data = prepare_training_frame(load_dataset(args.csv))
+    train, test = split_train_test(data)
+    cache = cache_folds(train, args.folds)
+    log(f"{len(train):,} train / {len(test):,} test rows; folds cached in {cache}")
+    log(f"{workers} workers × {args.threads_per_worker} threads, "
+        f"budgets {rung_budgets(args.candidates, args.eta, args.max_iterations)}")
+
+    params, cv_mae, iterations, history = search(
+        cache, args.candidates, args.folds, args.eta, args.max_iterations,
+        workers, args.threads_per_worker, args.time_budget_s, args.seed, log,
+    )
+    t_search = time.perf_counter() - t0
+    log(f"Best: CV MAE {cv_mae:,.0f} with {iterations} iterations, {params}")
+
+    pipeline = build_pipeline(params, iterations, thread_count=cores)
+    pipeline.fit(train[TRAIN_FEATURES], train[TARGET])
+    metrics = evaluate(test[TARGET], pipeline.predict(test[TRAIN_FEATURES]))
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "data_version": dataset_version(data),
+        "rows": {"train": len(train), "test": len(test)},
+        "search": {"candidates": args.candidates, "folds": args.folds, "eta": args.eta,
+                   "workers": workers, "threads_per_worker": args.threads_per_worker,
+                   "seconds": round(t_search, 1), "history": history},
+        "best": {"params": params, "iterations": iterations, "cv_mae": cv_mae},
+        "test": metrics,
+        "seconds_total": round(time.perf_counter() - t0, 1),
+    }
+    path = write_artifacts(pipeline, args.out_dir, report)
+    print(f"Test MAE {metrics['mae']:,.0f} · MAPE {metrics['mape']:.2%} · R² {metrics['r2']:.3f}")
+    if args.register is None:
+        print(f"Model written to {path} (sha256 {report['artifact']['sha256']}); "
+              f"set MODEL_SHA256 or register it to deploy it.")
+        return
+    from model_registry import register
+
+    info = register(path, args.register or None, {"test": metrics, "best": report["best"],
+                                                   "data_version": report["data_version"]})
+    print(f"Registered as {info['version']}; shadow it with "
+          f"`python model_registry.py shadow {info['version']}` before promoting.")
+
+
+if __name__ == "__main__":
+    main()
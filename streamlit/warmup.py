@@ -0,0 +1,151 @@
+"""Preload + warm-up when the app process starts, with a readiness flag.
+
+``start_warmup()`` is called at the top of Homepage.py and every page
+(idempotent, once per process). In a background thread it fills the shared
+``st.cache_resource`` entries from resources.py (compiled scorer from its
+slim native artifact — the sklearn pipeline only if that is unavailable or
+fails on real rows —, dataset, options index, comparables index, interval
+table) and then runs a few predictions on real rows of UsedCarsSA_Clean_EN.csv
+through the single-row and batch code paths, so the first user doesn't pay for
+download / unpickle / first-call cost. Ready is only reported once the path
+the pages will use has predicted successfully.
+
+Readiness, for health checks:
+
+* ``is_ready()`` / ``status()`` in-process (Admin page)
+* gauge ``carprice_ready`` and ``GET /ready`` on the metrics exporter
+  (``METRICS_PORT``): 200 when warm, 503 before
+* ``READY_FILE``: touched when warm, e.g. for an ``exec: test -f`` probe
+
+inference_server.py uses ``sample_rows`` + ``warm_model`` before it starts listening.
+"""
+import os
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from metrics import set_gauge, span, inc
+
+WARMUP_ROWS = int(os.environ.get("WARMUP_ROWS", "8"))
+READY_FILE = os.environ.get("READY_FILE", "")
+
+_lock = threading.Lock()
+_thread = None
+_ready = threading.Event()
+_status = {"state": "idle", "step": "", "error": "", "seconds": None, "version": ""}
+
+
+def sample_rows(df, n: int = WARMUP_ROWS, seed: int = 0):
+    """``n`` complete rows of ``df`` in model-ready form."""
+    from schema import FEATURE_ORDER, coerce_frame
+
+    rows = df[FEATURE_ORDER].dropna()
+    return coerce_frame(rows.sample(min(n, len(rows)), random_state=seed).reset_index(drop=True))
+
+
+def warm_model(model, scorer, rows, load_model=None) -> list[str]:
+    """Single-row + batch predictions through the paths the pages use; returns errors (if any).
+
+    ``model=None`` skips the sklearn pipeline while the compiled scorer works.
+    If the scorer is missing or fails, the pipeline is what the pages fall
+    back to, so it is loaded (``load_model()``) and warmed too. Raises
+    ``RuntimeError`` when neither path could be warmed.
+    """
+    from predictor import predict_safely
+
+    errors = []
+    warmed = False
+    if scorer is not None:
+        try:
+            for rec in rows.to_dict("records"):
+                scorer.predict_one(rec)
+            scorer.predict_frame(rows)
+            warmed = True
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"compiled scorer: {e}")  # halaman juga jatuh ke pipeline
+    if model is None and not warmed and load_model is not None:
+        model = load_model()
+    if model is not None:
+        try:
+            for i in range(len(rows)):
+                predict_safely(model, rows.iloc[[i]])
+            predict_safely(model, rows)
+            warmed = True
+        except Exception as e:
+            errors.append(f"pipeline: {e}")
+    if not warmed:
+        raise RuntimeError("; ".join(errors) or "no model to warm up")
+    return errors
+
+
+def _set(**kw):
+    with _lock:
+        _status.update(kw)
+
+
+def _run():
+    import resources
+
+    t0 = time.perf_counter()
+    _set(state="warming")
+    try:
+        with span("warmup", step="model"):
+            _set(step="model")
+            model_sha, ref = resources.active_model_sha()
+            _set(version=ref.version)
+            # artifact native (tanpa sklearn); pipeline hanya kalau scorer tidak bisa dibangun
+            scorer = resources.load_compiled_scorer(ref.url, ref.sha256, ref.cache_dir)
+            model = None if scorer is not None else resources.load_model_cached(ref.url, ref.sha256, ref.cache_dir)[0]
+        with span("warmup", step="dataset"):
+            _set(step="dataset")
+            df = resources.load_dataset_cached()
+            resources.get_options_index()
+            resources.get_comparables_index()
+        with span("warmup", step="predict"):
+            _set(step="predict")
+            errors = warm_model(model, scorer, sample_rows(df),
+                                load_model=lambda: resources.load_model_cached(ref.url, ref.sha256, ref.cache_dir)[0])
+        with span("warmup", step="intervals"):
+            _set(step="intervals")
+            resources.get_interval_table(model_sha, resources.frame_predictor(ref))
+    except Exception as e:
+        inc("warmup_failures_total")
+        _set(state="failed", step="", error=f"{e}\n{traceback.format_exc(limit=3)}",
+             seconds=round(time.perf_counter() - t0, 2))
+        return
+
+    # ready = minimal satu path yang dipakai halaman sudah warm; error path lain
+    # (mis. scorer gagal, pipeline OK) dicatat di status / Admin
+    _set(state="ready", step="", error="\n".join(errors), seconds=round(time.perf_counter() - t0, 2))
+    _ready.set()
+    set_gauge("ready", 1)
+    if READY_FILE:
+        try:
+            Path(READY_FILE).touch()
+        except OSError:
+            pass
+
+
+def start_warmup() -> bool:
+    """Start the warm-up thread once per process; returns ``is_ready()``."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            set_gauge("ready", 0)
+            _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+            _thread.start()
+    return _ready.is_set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def wait_ready(timeout: float | None = None) -> bool:
+    return _ready.wait(timeout)
+
+
+def status() -> dict:
+    with _lock:
+        return dict(_status, ready=_ready.is_set())
@@ -0,0 +1,72 @@
+"""What-if sweeps for the single-car Calculator.
+
+Starting from the spec in the form, ``build_grid`` varies up to two numeric
+features (Mileage / Year / Engine_Size, full cartesian grid) or one
+categorical feature (alternative Colors / Regions) and ``sweep`` scores the
+whole grid in one batched ``predict`` call. The grid is built column-wise
+(``np.repeat`` / ``np.tile``), no per-point DataFrame or model call.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from schema import FEATURE_ORDER, coerce_frame
+
+NUMERIC_AXES = ["Mileage", "Year", "Engine_Size"]
+CATEGORICAL_AXES = ["Color", "Region"]
+MAX_GRID_ROWS = 5_000
+
+# pembulatan titik grid supaya label enak dibaca (dan key cache stabil)
+_STEP = {"Mileage": 1000, "Year": 1, "Engine_Size": 0.1}
+
+
+def numeric_values(axis: str, lo: float, hi: float, points: int) -> list:
+    """``points`` evenly spaced values in ``[lo, hi]``, rounded to the axis step, deduplicated."""
+    step = _STEP.get(axis, 0)
+    x = np.linspace(float(lo), float(hi), max(int(points), 2))
+    if step:
+        x = np.round(x / step) * step
+    x = np.unique(np.round(x, 6))
+    return [int(v) for v in x] if axis != "Engine_Size" else [float(v) for v in x]
+
+
+def build_grid(base: dict, axes: dict) -> pd.DataFrame:
+    """Cartesian grid over ``axes`` (``{column: values}``, at most 2), other columns from ``base``."""
+    if not 1 <= len(axes) <= 2:
+        raise ValueError("Sweep one or two features at a time")
+    sizes = [len(v) for v in axes.values()]
+    n = int(np.prod(sizes))
+    if n == 0:
+        raise ValueError("Nothing to sweep: pick at least one value")
+    if n > MAX_GRID_ROWS:
+        raise ValueError(f"Grid has {n:,} points (max {MAX_GRID_ROWS:,}); use fewer points")
+
+    cols = {c: np.repeat(np.asarray([base[c]], dtype=object), n) for c in FEATURE_ORDER if c in base}
+    inner = 1
+    for c, values in reversed(list(axes.items())):
+        v = np.asarray(values, dtype=object)
+        cols[c] = np.tile(np.repeat(v, inner), n // (len(v) * inner))
+        inner *= len(v)
+    return pd.DataFrame(cols, columns=[c for c in FEATURE_ORDER if c in cols])
+
+
+def sweep(base: dict, axes: dict, predict_fn, intervals=None) -> pd.DataFrame:
+    """Grid + ``Price`` (one ``predict_fn`` call), plus ``Price_Low`` / ``Price_High`` when ``intervals`` is given."""
+    grid = build_grid(base, axes)
+    X = coerce_frame(grid)
+    pred = np.asarray(predict_fn(X), dtype="float64").reshape(-1)
+    out = pd.DataFrame({c: X[c] if c in NUMERIC_AXES else grid[c].astype(str) for c in axes})
+    out["Price"] = pred
+    if intervals is not None:
+        lo, hi = intervals.bounds(X["Make"], X["Year"], pred)
+        out["Price_Low"], out["Price_High"] = lo, hi
+    return out
+
+
+def cache_key(base: dict, axes: dict) -> tuple[str, str]:
+    """Stable strings for ``st.cache_data`` (numpy scalars → plain JSON)."""
+    def _plain(v):
+        return v.item() if isinstance(v, np.generic) else v
+    return (json.dumps({k: _plain(v) for k, v in base.items()}, sort_keys=True),
+            json.dumps({k: [_plain(v) for v in vs] for k, vs in axes.items()}))